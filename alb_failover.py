@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - ALB Failover Model
+==================================================
+Reads the target group health_check settings and deregistration_delay from
+alb.tf, and the number of registered targets from your configuration, and
+works out how long a dead web instance keeps receiving traffic:
+
+  - detection time: failure until the ALB marks the target unhealthy
+  - failover time:  failure until no request goes to a failed target
+  - traffic lost:   share of requests sent to failed targets meanwhile
+
+It then simulates failure scenarios (one instance, a whole AZ) with random
+health-check phases, and shows how other interval/threshold settings would
+change detection time.
+
+Usage:
+    python alb_failover.py                  # Analyze current directory
+    python alb_failover.py --targets 2,4,8  # Simulate other target counts
+    python alb_failover.py --rps 200        # Express losses in requests
+    python alb_failover.py --json           # Machine-readable report
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+from tfconfig import TerraformConfig, EvaluationError, UNKNOWN, expression_references
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# aws_lb_target_group defaults in the AWS provider
+DEFAULT_HEALTH_CHECK = {
+    "enabled": True,
+    "interval": 30,
+    "timeout": 5,
+    "healthy_threshold": 3,
+    "unhealthy_threshold": 3,
+}
+DEFAULT_DEREGISTRATION_DELAY = 300
+DEFAULT_TARGETS = 2
+AVAILABILITY_ZONES = 2   # ec2.tf spreads instances with count.index % 2
+DEFAULT_TRIALS = 5000
+
+# Settings compared in the tuning table: (interval, unhealthy_threshold)
+TUNING_GRID = [(5, 2), (10, 2), (10, 3), (15, 2), (30, 2), (30, 3)]
+
+
+def _value(config, expr, default, notes, label):
+    """Evaluate an attribute statically, falling back to `default`."""
+    if expr is None:
+        return default
+    try:
+        value = config.evaluate(expr, count_index=0)
+    except EvaluationError:
+        value = UNKNOWN
+    if value is UNKNOWN or value is None:
+        notes.append(f"{label} is only known after apply; assuming {default}")
+        return default
+    return value
+
+
+def read_settings(config):
+    """Return the health-check settings of the web target group.
+
+    Prefers the target group the listener forwards to for the current
+    use_ecs value (count > 0), then any target group. Missing attributes
+    take the AWS provider defaults.
+    """
+    notes = []
+    groups = [b for b, rtype, _ in config.resources() if rtype == "aws_lb_target_group"]
+    chosen = None
+    for block in groups:
+        keys = config.instance_keys(block)
+        if keys is UNKNOWN or keys:
+            chosen = block
+            break
+    if chosen is None and groups:
+        chosen = groups[0]
+
+    settings = dict(DEFAULT_HEALTH_CHECK, deregistration_delay=DEFAULT_DEREGISTRATION_DELAY)
+    if chosen is None:
+        notes.append("no aws_lb_target_group in alb.tf yet; using AWS defaults")
+        settings["target_group"] = None
+        return settings, notes
+
+    settings["target_group"] = f"aws_lb_target_group.{chosen.labels[1]}"
+    settings["deregistration_delay"] = int(_value(
+        config, chosen.attributes.get("deregistration_delay"), DEFAULT_DEREGISTRATION_DELAY,
+        notes, "deregistration_delay"))
+    health = next((b for b in chosen.blocks if b.kind == "health_check"), None)
+    if health is None:
+        notes.append(f"{settings['target_group']} has no health_check block; using AWS defaults")
+        return settings, notes
+    for key, default in DEFAULT_HEALTH_CHECK.items():
+        value = _value(config, health.attributes.get(key), default, notes, f"health_check.{key}")
+        settings[key] = bool(value) if key == "enabled" else int(value)
+    return settings, notes
+
+
+def configured_targets(config, target_group):
+    """Return the number of targets registered with the target group."""
+    if target_group:
+        name = target_group.split(".", 1)[1]
+        total = 0
+        found = False
+        for block, rtype, _ in config.resources():
+            if rtype != "aws_lb_target_group_attachment":
+                continue
+            expr = block.attributes.get("target_group_arn")
+            refs = expression_references(expr) if expr is not None else []
+            if not any(path[:2] == ["aws_lb_target_group", name] for path in map(list, refs)):
+                continue
+            keys = config.instance_keys(block)
+            if keys is not UNKNOWN:
+                total += len(keys)
+                found = True
+        if found and total:
+            return total
+    count = config.variable("web_instance_count")
+    return int(count) if isinstance(count, (int, float)) and count > 0 else DEFAULT_TARGETS
+
+
+def validate_settings(s):
+    """Return warnings for values the AWS API would reject or that look risky."""
+    warnings = []
+    if not 5 <= s["interval"] <= 300:
+        warnings.append(f"interval {s['interval']}s is outside the allowed 5-300s")
+    if not 2 <= s["timeout"] <= 120:
+        warnings.append(f"timeout {s['timeout']}s is outside the allowed 2-120s")
+    if s["timeout"] >= s["interval"]:
+        warnings.append(f"timeout ({s['timeout']}s) must be smaller than interval ({s['interval']}s)")
+    for key in ("healthy_threshold", "unhealthy_threshold"):
+        if not 2 <= s[key] <= 10:
+            warnings.append(f"{key} {s[key]} is outside the allowed 2-10")
+    if not 0 <= s["deregistration_delay"] <= 3600:
+        warnings.append(f"deregistration_delay {s['deregistration_delay']}s is outside 0-3600s")
+    if not s["enabled"]:
+        warnings.append("health checks are disabled: failed targets keep receiving traffic until deregistered")
+    return warnings
+
+
+def detection_bounds(interval, timeout, unhealthy_threshold):
+    """Best, mean and worst detection time for a target that stops answering.
+
+    The first failing check starts 0..interval after the failure and each
+    failing check takes `timeout` to give up; `unhealthy_threshold`
+    consecutive failures mark the target unhealthy.
+    """
+    base = (unhealthy_threshold - 1) * interval + timeout
+    return base, base + interval / 2, base + interval
+
+
+def model(s, targets):
+    """Closed-form worst case for one failed target out of `targets`."""
+    best, mean, worst = detection_bounds(s["interval"], s["timeout"], s["unhealthy_threshold"])
+    share = 1.0 if targets <= 1 else 1.0 / targets
+    return {
+        "targets": targets,
+        "detection_seconds": {"best": best, "mean": mean, "worst": worst},
+        # The ALB stops routing to a target as soon as it is marked unhealthy
+        "failover_seconds": worst,
+        "traffic_share_lost": share,
+        "lost_full_traffic_seconds": worst * share,
+        "recovery_seconds": s["healthy_threshold"] * s["interval"],
+        "drain_seconds": s["deregistration_delay"],
+        "outage": targets <= 1,
+    }
+
+
+def _lost_traffic(detections, targets):
+    """Integrate the share of traffic routed to failed, undetected targets.
+
+    Until detected, a failed target takes its round-robin share of
+    requests. Once every target is unhealthy the ALB fails open and routes
+    to all of them, so everything is lost.
+    """
+    lost = 0.0
+    now = 0.0
+    failed = len(detections)
+    for i, d in enumerate(sorted(detections)):
+        undetected = failed - i
+        in_rotation = targets - i
+        share = 1.0 if in_rotation == undetected else undetected / in_rotation
+        lost += (d - now) * share
+        now = d
+    return lost
+
+
+def simulate(s, targets, failed, trials, rng):
+    """Monte Carlo over random health-check phases for `failed` of `targets`."""
+    interval, timeout, threshold = s["interval"], s["timeout"], s["unhealthy_threshold"]
+    failovers = []
+    losses = []
+    for _ in range(trials):
+        detections = [rng.uniform(0, interval) + (threshold - 1) * interval + timeout for _ in range(failed)]
+        failovers.append(max(detections))
+        if failed >= targets:
+            # Fail-open: no healthy target left, so traffic is lost until recovery
+            losses.append(max(detections))
+        else:
+            losses.append(_lost_traffic(detections, targets))
+    failovers.sort()
+    losses.sort()
+
+    def pct(values, p):
+        return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+    return {
+        "targets": targets,
+        "failed": failed,
+        "failover_seconds": {"p50": pct(failovers, 50), "p99": pct(failovers, 99), "max": failovers[-1]},
+        "lost_full_traffic_seconds": {"p50": pct(losses, 50), "p99": pct(losses, 99), "max": losses[-1]},
+        "outage": failed >= targets,
+    }
+
+
+def scenarios(s, targets, trials, seed):
+    """Simulate one-instance and one-AZ failures for a target count."""
+    rng = random.Random(seed)
+    az_failed = (targets + AVAILABILITY_ZONES - 1) // AVAILABILITY_ZONES
+    out = [dict(simulate(s, targets, 1, trials, rng), scenario="instance failure")]
+    if targets > 1:
+        out.append(dict(simulate(s, targets, az_failed, trials, rng), scenario="AZ failure"))
+    return out
+
+
+def tuning_table(s, targets):
+    rows = []
+    for interval, threshold in TUNING_GRID:
+        timeout = min(s["timeout"], interval - 1)
+        _, _, worst = detection_bounds(interval, timeout, threshold)
+        rows.append({"interval": interval, "unhealthy_threshold": threshold, "timeout": timeout,
+                     "worst_detection_seconds": worst,
+                     "lost_full_traffic_seconds": worst / max(targets, 1) if targets > 1 else worst,
+                     "current": interval == s["interval"] and threshold == s["unhealthy_threshold"]})
+    return rows
+
+
+def analyze(config, target_counts=None, trials=DEFAULT_TRIALS, seed=0):
+    """Build the full report as a JSON-serialisable dict."""
+    settings, notes = read_settings(config)
+    configured = configured_targets(config, settings["target_group"])
+    counts = target_counts or [configured]
+    return {
+        "settings": settings,
+        "notes": notes,
+        "warnings": validate_settings(settings),
+        "configured_targets": configured,
+        "model": [model(settings, n) for n in counts],
+        "scenarios": [sc for n in counts for sc in scenarios(settings, n, trials, seed)],
+        "tuning": tuning_table(settings, configured),
+    }
+
+
+def _fmt(seconds):
+    return f"{seconds:.0f}s" if seconds >= 10 else f"{seconds:.1f}s"
+
+
+def print_report(report, rps=None):
+    s = report["settings"]
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  ALB Health Check & Failover Model{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    print(f"  Target group: {s['target_group'] or '(none yet)'}")
+    print(f"    interval {s['interval']}s, timeout {s['timeout']}s, "
+          f"unhealthy_threshold {s['unhealthy_threshold']}, healthy_threshold {s['healthy_threshold']}, "
+          f"deregistration_delay {s['deregistration_delay']}s")
+    for note in report["notes"]:
+        print(f"    {Colors.YELLOW}[!]{Colors.END} {note}")
+    for warning in report["warnings"]:
+        print(f"    {Colors.RED}[X]{Colors.END} {warning}")
+
+    def lost(seconds):
+        text = f"{_fmt(seconds)} of full traffic"
+        return text + (f" (~{seconds * rps:.0f} requests at {rps:g} req/s)" if rps else "")
+
+    for m in report["model"]:
+        d = m["detection_seconds"]
+        print(f"\n  {Colors.CYAN}One target fails ({m['targets']} registered):{Colors.END}")
+        print(f"    Detection:  {_fmt(d['best'])} best, {_fmt(d['mean'])} mean, "
+              f"{Colors.BOLD}{_fmt(d['worst'])} worst{Colors.END}")
+        print(f"    Failover:   {_fmt(m['failover_seconds'])} worst "
+              f"({m['traffic_share_lost']:.0%} of requests fail until then)")
+        if m["outage"]:
+            print(f"    Lost:       {Colors.RED}everything until a replacement passes its health checks "
+                  f"(single target){Colors.END}")
+        else:
+            print(f"    Lost:       {lost(m['lost_full_traffic_seconds'])} worst")
+        print(f"    Recovery:   {_fmt(m['recovery_seconds'])} for a replacement to pass "
+              f"{s['healthy_threshold']} checks")
+        print(f"    Drain:      {_fmt(m['drain_seconds'])} before a deregistered target can be terminated")
+
+    print(f"\n  {Colors.CYAN}Simulated failures (random health-check phase):{Colors.END}")
+    for sc in report["scenarios"]:
+        f, l = sc["failover_seconds"], sc["lost_full_traffic_seconds"]
+        label = f"{sc['scenario']}, {sc['failed']}/{sc['targets']} down"
+        color = Colors.RED if sc["outage"] else ""
+        end = Colors.END if color else ""
+        print(f"    {color}{label:<30}{end} failover p50 {_fmt(f['p50']):>5} p99 {_fmt(f['p99']):>5}   "
+              f"lost p99 {_fmt(l['p99'])}" + (f" (~{l['p99'] * rps:.0f} req)" if rps else ""))
+        if sc["outage"]:
+            print(f"      {Colors.RED}No healthy target remains: the ALB fails open and every request fails.{Colors.END}")
+
+    print(f"\n  {Colors.CYAN}Other settings ({report['configured_targets']} targets):{Colors.END}")
+    print("    interval  threshold  worst detection  lost")
+    for row in report["tuning"]:
+        marker = f"  {Colors.GREEN}<- current{Colors.END}" if row["current"] else ""
+        print(f"    {row['interval']:>7}s  {row['unhealthy_threshold']:>9}  {_fmt(row['worst_detection_seconds']):>15}  "
+              f"{_fmt(row['lost_full_traffic_seconds']):>5}{marker}")
+    print(f"\n    Shorter intervals detect failures sooner but send more health-check requests per target.")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ALB health-check and failover latency model")
+    parser.add_argument("--targets", help="Comma-separated target counts to simulate (default: configured)")
+    parser.add_argument("--rps", type=float, help="Request rate, to express losses as request counts")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="Simulated failures per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the simulation")
+    parser.add_argument("--var-file", action="append", default=[], help="Extra .tfvars file (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    counts = None
+    if args.targets:
+        try:
+            counts = sorted({int(n) for n in args.targets.split(",") if n.strip()})
+        except ValueError:
+            parser.error("--targets must be a comma-separated list of integers")
+        if not counts or counts[0] < 1:
+            parser.error("--targets must be >= 1")
+    if args.trials < 1:
+        parser.error("--trials must be >= 1")
+
+    config = TerraformConfig.load(".", args.var_file)
+    report = analyze(config, counts, args.trials, args.seed)
+    try:
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report, args.rps)
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) went away; keep the exit-time flush quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Apply Critical Path & Parallelism Advisor
+=========================================================================
+Builds the resource dependency graph from the references in your .tf files,
+weights each resource with an estimated creation time, and reports:
+
+  - the critical path (the chain of resources that bounds `terraform apply`)
+  - the expected wall time for different `-parallelism` values
+  - which dependency edges serialise the apply, and how much each costs
+
+Estimates start from typical AWS creation times and are refined from the
+"Creation complete after ..." lines of real `terraform apply` output.
+
+Usage:
+    python apply_advisor.py                        # Analyze current directory
+    python apply_advisor.py --parallelism 1,4,10   # Choose levels to simulate
+    terraform apply 2>&1 | tee apply.log
+    python apply_advisor.py --record apply.log     # Learn from a real apply
+    python apply_advisor.py --json                 # Machine-readable report
+"""
+
+import os
+import re
+import sys
+import json
+import heapq
+import argparse
+
+from tfconfig import TerraformConfig, expression_references
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+TIMINGS_FILE = ".apply-timings.json"
+
+# Typical creation times on real AWS, in seconds.
+DEFAULT_ESTIMATES = {
+    "aws_vpc": 3,
+    "aws_subnet": 2,
+    "aws_internet_gateway": 2,
+    "aws_eip": 2,
+    "aws_nat_gateway": 105,
+    "aws_route_table": 2,
+    "aws_route_table_association": 1,
+    "aws_route": 2,
+    "aws_security_group": 3,
+    "aws_security_group_rule": 1,
+    "aws_lb": 180,
+    "aws_lb_target_group": 2,
+    "aws_lb_listener": 2,
+    "aws_lb_target_group_attachment": 1,
+    "aws_instance": 40,
+    "aws_db_subnet_group": 2,
+    "aws_db_instance": 480,
+    "aws_ecs_cluster": 10,
+    "aws_ecs_task_definition": 1,
+    "aws_ecs_service": 60,
+    "aws_iam_role": 2,
+    "aws_iam_role_policy_attachment": 1,
+    "aws_cloudwatch_log_group": 1,
+}
+DEFAULT_ESTIMATE = 5
+DATA_SOURCE_ESTIMATE = 1
+
+# How many observed samples the built-in estimate is worth when blending.
+PRIOR_WEIGHT = 1
+
+DEFAULT_PARALLELISM = [1, 2, 4, 8, 10, 16, 32]
+
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+_COMPLETE_RE = re.compile(
+    r'^(?:module\.[\w-]+(?:\[[^\]]*\])?\.)*'
+    r'(?P<address>(?:data\.)?(?P<type>[\w-]+)\.[\w-]+(?:\[[^\]]*\])?): '
+    r'(?:Creation|Read) complete after (?P<duration>(?:\d+h)?(?:\d+m)?(?:\d+(?:\.\d+)?s)?)'
+)
+
+
+def parse_duration(text):
+    """Convert Terraform's '1m45s' style durations to seconds."""
+    total = 0.0
+    for value, unit in re.findall(r'(\d+(?:\.\d+)?)([hms])', text):
+        total += float(value) * {"h": 3600, "m": 60, "s": 1}[unit]
+    return total
+
+
+def format_duration(seconds):
+    """Format seconds as '8m 12s'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def load_timings(path=TIMINGS_FILE):
+    """Load recorded per-type timings: {type: {"samples": n, "total": s}}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("types", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_timings(timings, path=TIMINGS_FILE):
+    """Write recorded timings back to disk."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"types": timings}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def record_apply_log(text, timings):
+    """Add every 'complete after' duration in an apply log to `timings`.
+
+    Returns the number of samples recorded.
+    """
+    recorded = 0
+    for line in _ANSI_RE.sub('', text).splitlines():
+        m = _COMPLETE_RE.match(line.strip())
+        if not m or not m.group("duration"):
+            continue
+        rtype = m.group("type")
+        if m.group("address").startswith("data."):
+            rtype = "data." + rtype
+        entry = timings.setdefault(rtype, {"samples": 0, "total": 0.0})
+        entry["samples"] += 1
+        entry["total"] += parse_duration(m.group("duration"))
+        recorded += 1
+    return recorded
+
+
+def estimate_seconds(rtype, timings, data=False):
+    """Blend the built-in estimate for a type with recorded samples."""
+    key = f"data.{rtype}" if data else rtype
+    prior = DATA_SOURCE_ESTIMATE if data else DEFAULT_ESTIMATES.get(rtype, DEFAULT_ESTIMATE)
+    entry = timings.get(key)
+    if not entry or not entry.get("samples"):
+        return float(prior)
+    return (prior * PRIOR_WEIGHT + entry["total"]) / (PRIOR_WEIGHT + entry["samples"])
+
+
+def build_graph(config, timings):
+    """Build the instance-level apply graph.
+
+    Returns {address: {"block": "type.name", "type": ..., "seconds": ...,
+    "deps": [addresses], "explicit": {block addresses from depends_on}}}.
+    Every instance of a block depends on every instance of each block it
+    references, which is how Terraform orders them too.
+    """
+    instances_by_block = {}
+    nodes = {}
+    for mode in ("data", "resource"):
+        for inst in config.expected_instances(mode):
+            prefix = "data." if mode == "data" else ""
+            block_addr = f"{prefix}{inst.type}.{inst.name}"
+            address = inst.address.replace("[?]", "")
+            instances_by_block.setdefault(block_addr, []).append(address)
+            nodes[address] = {
+                "block": block_addr,
+                "type": inst.type,
+                "seconds": estimate_seconds(inst.type, timings, data=(mode == "data")),
+                "deps": [],
+                "explicit": set(),
+                "_source": inst.block,
+            }
+
+    block_deps = {}
+    for address, node in nodes.items():
+        if node["block"] not in block_deps:
+            block = node["_source"]
+            explicit = set()
+            if "depends_on" in block.attributes:
+                for path in expression_references(block.attributes["depends_on"]):
+                    if path[0] == "data" and len(path) > 2:
+                        explicit.add(f"data.{path[1]}.{path[2]}")
+                    elif len(path) > 1:
+                        explicit.add(f"{path[0]}.{path[1]}")
+            block_deps[node["block"]] = (config.dependencies(block), explicit)
+        deps, explicit = block_deps[node["block"]]
+        node["explicit"] = explicit
+        for dep in sorted(deps):
+            if dep != node["block"]:
+                node["deps"].extend(instances_by_block.get(dep, []))
+    for node in nodes.values():
+        del node["_source"]
+    return nodes
+
+
+def topological_order(nodes):
+    """Return addresses in dependency order; raise ValueError on a cycle."""
+    indegree = {a: len(n["deps"]) for a, n in nodes.items()}
+    dependents = {a: [] for a in nodes}
+    for a, n in nodes.items():
+        for d in n["deps"]:
+            dependents[d].append(a)
+    ready = sorted(a for a, deg in indegree.items() if deg == 0)
+    order = []
+    while ready:
+        a = ready.pop()
+        order.append(a)
+        for b in dependents[a]:
+            indegree[b] -= 1
+            if indegree[b] == 0:
+                ready.append(b)
+    if len(order) != len(nodes):
+        cycle = sorted(a for a, deg in indegree.items() if deg > 0)
+        raise ValueError("dependency cycle between: " + ", ".join(cycle[:6]))
+    return order
+
+
+def critical_path(nodes, skip_edge=None):
+    """Return (length_seconds, [addresses]) of the longest dependency chain.
+
+    `skip_edge` is an optional (from_block, to_block) pair whose instance
+    edges are ignored, used to measure what each edge costs.
+    """
+    finish = {}
+    via = {}
+    for a in topological_order(nodes):
+        node = nodes[a]
+        start, best = 0.0, None
+        for d in node["deps"]:
+            if skip_edge and (nodes[d]["block"], node["block"]) == skip_edge:
+                continue
+            if finish[d] > start:
+                start, best = finish[d], d
+        finish[a] = start + node["seconds"]
+        via[a] = best
+    if not finish:
+        return 0.0, []
+    end = max(finish, key=lambda a: (finish[a], a))
+    path = []
+    while end is not None:
+        path.append(end)
+        end = via[end]
+    return finish[path[0]], path[::-1]
+
+
+def simulate(nodes, parallelism):
+    """Simulate Terraform's walk with at most `parallelism` concurrent operations.
+
+    Terraform starts an operation as soon as its dependencies are done and
+    a semaphore slot is free; ready operations are taken in the order they
+    became ready. Returns the simulated wall time in seconds.
+    """
+    remaining = {a: len(n["deps"]) for a, n in nodes.items()}
+    dependents = {a: [] for a in nodes}
+    for a, n in nodes.items():
+        for d in n["deps"]:
+            dependents[d].append(a)
+
+    ready = [(0.0, a) for a in sorted(nodes) if remaining[a] == 0]
+    heapq.heapify(ready)
+    running = []
+    now = 0.0
+    while ready or running:
+        while ready and len(running) < parallelism:
+            ready_at, a = heapq.heappop(ready)
+            heapq.heappush(running, (max(now, ready_at) + nodes[a]["seconds"], a))
+        now, done = heapq.heappop(running)
+        for b in dependents[done]:
+            remaining[b] -= 1
+            if remaining[b] == 0:
+                heapq.heappush(ready, (now, b))
+    return now
+
+
+def serialising_edges(nodes, path, length):
+    """Rank the block-level edges on the critical path by the time they cost."""
+    edges = []
+    for prev, cur in zip(path, path[1:]):
+        edge = (nodes[prev]["block"], nodes[cur]["block"])
+        if edge[0] == edge[1] or edge in [e["edge"] for e in edges]:
+            continue
+        without, _ = critical_path(nodes, skip_edge=edge)
+        edges.append({
+            "edge": edge,
+            "saves": length - without,
+            "explicit": edge[0] in nodes[cur]["explicit"],
+        })
+    edges.sort(key=lambda e: -e["saves"])
+    return edges
+
+
+def analyze(config, timings, levels):
+    """Run the full analysis and return a JSON-serialisable report."""
+    nodes = build_graph(config, timings)
+    length, path = critical_path(nodes)
+    total_work = sum(n["seconds"] for n in nodes.values())
+    start = 0.0
+    path_report = []
+    for a in path:
+        path_report.append({"address": a, "start": start, "seconds": nodes[a]["seconds"]})
+        start += nodes[a]["seconds"]
+    return {
+        "resources": len(nodes),
+        "total_work": total_work,
+        "critical_path": {"seconds": length, "resources": path_report},
+        "parallelism": [
+            {"level": p, "seconds": simulate(nodes, p), "lower_bound": max(length, total_work / p)}
+            for p in levels
+        ],
+        "serialising_edges": [
+            {"from": e["edge"][0], "to": e["edge"][1], "saves": e["saves"], "explicit": e["explicit"]}
+            for e in serialising_edges(nodes, path, length)
+        ],
+        "estimates": {
+            rtype: estimate_seconds(rtype, timings)
+            for rtype in sorted({n["type"] for a, n in nodes.items() if not a.startswith("data.")})
+        },
+    }
+
+
+def print_report(report, timings):
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Terraform Apply Critical Path{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    if not report["resources"]:
+        print(f"  {Colors.YELLOW}[!]{Colors.END} No resources declared yet (uncomment some .tf blocks first)\n")
+        return
+
+    cp = report["critical_path"]
+    print(f"  {Colors.BOLD}Critical path: {format_duration(cp['seconds'])}{Colors.END}"
+          f"  ({report['resources']} resources, {format_duration(report['total_work'])} of total work)\n")
+    for step in cp["resources"]:
+        print(f"    {format_duration(step['start']):>8}  +{format_duration(step['seconds']):<7} {step['address']}")
+
+    print(f"\n  {Colors.CYAN}Expected wall time by -parallelism:{Colors.END}")
+    best = min(p["seconds"] for p in report["parallelism"])
+    for p in report["parallelism"]:
+        note = " (terraform default)" if p["level"] == 10 else ""
+        color = Colors.GREEN if p["seconds"] <= best + 0.5 else ""
+        end = Colors.END if color else ""
+        print(f"    {p['level']:>4}  {color}{format_duration(p['seconds']):>8}{end}{note}")
+    saturated = next(p["level"] for p in report["parallelism"] if p["seconds"] <= best + 0.5)
+    print(f"\n    Beyond -parallelism={saturated} the critical path, not concurrency, bounds the apply.")
+
+    edges = [e for e in report["serialising_edges"] if e["saves"] >= 1]
+    print(f"\n  {Colors.CYAN}Edges that serialise the apply:{Colors.END}")
+    if not edges:
+        print("    (none - the critical path is a single resource)")
+    for e in edges:
+        kind = "depends_on" if e["explicit"] else "reference"
+        print(f"    {e['from']} -> {e['to']}  "
+              f"{Colors.YELLOW}{format_duration(e['saves'])}{Colors.END} ({kind})")
+
+    measured = sorted(t for t in report["estimates"] if timings.get(t, {}).get("samples"))
+    print(f"\n  Estimates: {len(measured)} of {len(report['estimates'])} resource types refined "
+          f"from recorded applies ({TIMINGS_FILE})")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical path and -parallelism advisor for terraform apply")
+    parser.add_argument("--parallelism", default=",".join(str(p) for p in DEFAULT_PARALLELISM),
+                        help="Comma-separated -parallelism levels to simulate")
+    parser.add_argument("--record", metavar="LOG", action="append", default=[],
+                        help="Learn creation times from a saved 'terraform apply' log (repeatable)")
+    parser.add_argument("--timings", default=TIMINGS_FILE, help="Recorded timings file")
+    parser.add_argument("--var-file", action="append", default=[], help="Extra .tfvars file (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    timings = load_timings(args.timings)
+    if args.record:
+        recorded = 0
+        for log in args.record:
+            try:
+                with open(log, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError as e:
+                print(f"  {Colors.RED}[X]{Colors.END} Cannot read apply log {log}: {e.strerror or e}")
+                return 1
+            recorded += record_apply_log(text, timings)
+        save_timings(timings, args.timings)
+        if not args.json:
+            print(f"\n  {Colors.GREEN}[OK]{Colors.END} Recorded {recorded} resource timing(s) to {args.timings}")
+
+    try:
+        levels = sorted({int(p) for p in args.parallelism.split(",") if p.strip()})
+    except ValueError:
+        parser.error("--parallelism must be a comma-separated list of integers")
+    if not levels or levels[0] < 1:
+        parser.error("--parallelism levels must be >= 1")
+
+    config = TerraformConfig.load(".", args.var_file)
+    try:
+        report = analyze(config, timings, levels)
+    except ValueError as e:
+        print(f"  {Colors.RED}[X]{Colors.END} {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, timings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - AWS Targets
+===========================================
+Profile/region targets for the AWS CLI calls made by dashboard.py and
+run.py --verify, and the limits on how many of those calls run at once.
+
+A target is written PROFILE@REGION. Either part may be left out: "eu-west-1"
+uses the default profile, and "prod@" uses the profile's own region.
+
+ConcurrencyLimiter caps AWS CLI processes per target and overall, so one
+target with many resources cannot use up every slot and a long list of
+targets cannot start hundreds of processes at once.
+
+Usage:
+    targets = parse_targets(["us-east-1", "prod@eu-west-1"])
+    limiter = ConcurrencyLimiter(total=16, per_target=8)
+    with limiter.slot(targets[0]):
+        subprocess.run(["aws", *cli_args(targets[0]), "ec2", "describe-vpcs"])
+"""
+
+import threading
+import contextlib
+from collections import namedtuple
+
+DEFAULT_TOTAL_LIMIT = 16
+DEFAULT_TARGET_LIMIT = 8
+
+
+class Target(namedtuple("Target", ["profile", "region"])):
+    """One AWS CLI profile and region; None means the CLI default."""
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Stable name used to key merged snapshots, e.g. "prod@eu-west-1"."""
+        return f"{self.profile or 'default'}@{self.region or 'default'}"
+
+
+def parse_target(spec):
+    """Parse PROFILE@REGION, REGION or PROFILE@ into a Target."""
+    spec = spec.strip()
+    if not spec:
+        raise ValueError("empty target")
+    profile, sep, region = spec.rpartition("@")
+    if not sep:
+        profile = ""
+    if any(c.isspace() for c in spec) or "/" in spec:
+        raise ValueError(f"invalid target {spec!r} (expected PROFILE@REGION)")
+    return Target(profile or None, region or None)
+
+
+def parse_targets(specs):
+    """Parse repeated and comma-separated target specs, dropping duplicates."""
+    targets = []
+    for spec in specs:
+        for part in spec.split(","):
+            if part.strip():
+                target = parse_target(part)
+                if target not in targets:
+                    targets.append(target)
+    return targets
+
+
+def cli_args(target):
+    """AWS CLI arguments selecting `target` (none for the default target)."""
+    args = []
+    if target is not None and target.profile:
+        args += ["--profile", target.profile]
+    if target is not None and target.region:
+        args += ["--region", target.region]
+    return args
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent calls per target and across all targets."""
+
+    def __init__(self, total=DEFAULT_TOTAL_LIMIT, per_target=DEFAULT_TARGET_LIMIT):
+        self.configure(total, per_target)
+
+    def configure(self, total, per_target):
+        """Replace the limits; call before any slot is taken."""
+        self._total = threading.BoundedSemaphore(total)
+        self._per_target_limit = per_target
+        self._per_target = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def slot(self, target=None):
+        """Hold one call slot for `target` (always taken before a global slot)."""
+        with self._lock:
+            semaphore = self._per_target.get(target)
+            if semaphore is None:
+                semaphore = self._per_target[target] = threading.BoundedSemaphore(self._per_target_limit)
+        with semaphore, self._total:
+            yield
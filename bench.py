@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Checker Benchmarks
+============================================================
+Generates synthetic challenge trees from 1x to 1000x the size of the
+shipped .tf files and times run.py against them: the whole scoring path of
+main(), each check_*_config on its own, and batch grading throughput.
+
+Each tree holds a completed copy of every starter file followed by
+replicas that alternate between the commented-out starter blocks (as
+shipped) and completed blocks with renamed labels, so comment density
+stays close to a real submission.
+
+Results are written as JSON. With --compare, the run fails (exit 1) when
+throughput drops or peak memory grows by more than --threshold against a
+saved baseline.
+
+Usage:
+    python bench.py                               # 1x, 10x, 100x, 1000x
+    python bench.py --scales 1,10 --repeat 5
+    python bench.py --save bench-baseline.json    # Record a baseline
+    python bench.py --compare bench-baseline.json # Fail on regression
+"""
+
+import os
+import re
+import sys
+import io
+import glob
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import run
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_SCALES = (1, 10, 100, 1000)
+DEFAULT_THRESHOLD = 0.10
+BATCH_TREES = 50
+BATCH_SCALE = 1
+BASELINE_VERSION = 1
+
+CHECKS = [
+    "check_provider_config",
+    "check_vpc_config",
+    "check_security_config",
+    "check_alb_config",
+    "check_ec2_config",
+    "check_ecs_config",
+    "check_rds_config",
+    "check_variables_config",
+]
+
+_BLOCK_START = re.compile(r'# (resource|data|output|variable|module|locals) ')
+_LABELLED = re.compile(r'^(\s*#?\s*(?:resource|data)\s+"[^"]+"\s+"|\s*#?\s*(?:variable|output|module)\s+")([^"]+)"',
+                       re.MULTILINE)
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def _uncomment_starters(text, filename):
+    """Complete a starter file by uncommenting its commented-out blocks.
+
+    Prose comments between blocks are kept, as in a finished submission.
+    """
+    out = []
+    in_block = False
+    for line in text.splitlines(keepends=True):
+        if not in_block and _BLOCK_START.match(line):
+            in_block = True
+        if in_block and line.startswith('#'):
+            body = line[2:] if line.startswith('# ') else line[1:]
+            out.append(body)
+            if body.rstrip() == '}':
+                in_block = False
+            continue
+        if filename == 'main.tf' and re.match(r'# (terraform|provider|  |\})', line):
+            out.append(line[2:])
+            continue
+        out.append(line)
+    return ''.join(out)
+
+
+def _rename_labels(text, suffix):
+    return _LABELLED.sub(lambda m: f'{m.group(1)}{m.group(2)}{suffix}"', text)
+
+
+def generate_tree(dest, scale, source=None):
+    """Write a synthetic challenge tree `scale` times the shipped size.
+
+    Returns the total bytes of .tf written.
+    """
+    source = source or os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(dest, exist_ok=True)
+    total = 0
+    for path in sorted(glob.glob(os.path.join(source, '*.tf'))):
+        name = os.path.basename(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            starter = f.read()
+        solved = _uncomment_starters(starter, name)
+        parts = [solved]
+        for i in range(1, scale):
+            parts.append(_rename_labels(starter if i % 2 else solved, f"_r{i}"))
+        content = '\n'.join(parts)
+        with open(os.path.join(dest, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        total += len(content.encode('utf-8'))
+    return total
+
+
+def _skip_validate(root=None):
+    return None, "skipped in benchmark"
+
+
+def score_tree(root):
+    """Run run.main() in `root` with output discarded; return its exit code.
+
+    `terraform validate` is replaced with a no-op: it measures the
+    terraform binary, not the checker.
+    """
+    cwd = os.getcwd()
+    argv = sys.argv
+    validate = run.run_terraform_validate
+    os.chdir(root)
+    sys.argv = ['run.py']
+    run.run_terraform_validate = _skip_validate
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run.main()
+    finally:
+        run.run_terraform_validate = validate
+        sys.argv = argv
+        os.chdir(cwd)
+
+
+def _best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _peak_memory(func):
+    """Peak Python heap allocated while running func (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_scale(root, tf_bytes, repeat):
+    """Time main() and each check in one generated tree."""
+    result = {"tf_bytes": tf_bytes}
+    score_tree(root)  # Warm up
+    result["main_seconds"] = _best_time(lambda: score_tree(root), repeat)
+    result["main_mb_per_second"] = tf_bytes / result["main_seconds"] / 1e6
+    result["peak_bytes"] = _peak_memory(lambda: score_tree(root))
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        result["checks"] = {name: _best_time(getattr(run, name), repeat) for name in CHECKS}
+    finally:
+        os.chdir(cwd)
+    return result
+
+
+def bench_batch(work, trees, scale, jobs, repeat):
+    """Grade `trees` independent trees; return throughput in trees/second."""
+    roots = []
+    for i in range(trees):
+        root = os.path.join(work, f"batch-{i}")
+        generate_tree(root, scale)
+        roots.append(root)
+
+    def grade_all():
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                list(pool.map(score_tree, roots))
+        else:
+            for root in roots:
+                score_tree(root)
+
+    score_tree(roots[0])  # Warm up imports and regex caches
+    elapsed = _best_time(grade_all, repeat)
+    return {"trees": trees, "scale": scale, "jobs": jobs, "seconds": elapsed,
+            "trees_per_second": trees / elapsed}
+
+
+def run_benchmarks(scales, repeat, batch_trees, jobs):
+    work = tempfile.mkdtemp(prefix="tf-bench-")
+    try:
+        results = {
+            "version": BASELINE_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scales": {},
+        }
+        for scale in scales:
+            root = os.path.join(work, f"x{scale}")
+            tf_bytes = generate_tree(root, scale)
+            print(f"  {scale:>5}x  {tf_bytes / 1e6:8.2f} MB ... ", end="", flush=True)
+            result = bench_scale(root, tf_bytes, repeat)
+            results["scales"][str(scale)] = result
+            print(f"{result['main_seconds'] * 1000:9.1f} ms  {result['main_mb_per_second']:6.2f} MB/s  "
+                  f"peak {result['peak_bytes'] / 1e6:7.1f} MB")
+            shutil.rmtree(root, ignore_errors=True)
+        if batch_trees:
+            print(f"  batch   {batch_trees} trees x{BATCH_SCALE}, {jobs} job(s) ... ", end="", flush=True)
+            results["batch"] = bench_batch(work, batch_trees, BATCH_SCALE, jobs, repeat)
+            print(f"{results['batch']['trees_per_second']:.1f} trees/s")
+        return results
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def print_checks(results):
+    print(f"\n  {Colors.CYAN}Per-check time (ms):{Colors.END}")
+    scales = list(results["scales"])
+    print("  " + f"{'check':<26}" + "".join(f"{s + 'x':>10}" for s in scales))
+    for name in CHECKS:
+        row = "".join(f"{results['scales'][s]['checks'][name] * 1000:10.2f}" for s in scales)
+        print(f"  {name:<26}{row}")
+
+
+def compare(current, baseline, threshold):
+    """Return a list of regressions of `current` against `baseline`."""
+    regressions = []
+    for scale, base in baseline.get("scales", {}).items():
+        cur = current["scales"].get(scale)
+        if cur is None:
+            continue
+        if cur["main_mb_per_second"] < base["main_mb_per_second"] * (1 - threshold):
+            regressions.append(f"{scale}x throughput {cur['main_mb_per_second']:.2f} MB/s "
+                               f"< baseline {base['main_mb_per_second']:.2f} MB/s")
+        if cur["peak_bytes"] > base["peak_bytes"] * (1 + threshold):
+            regressions.append(f"{scale}x peak memory {cur['peak_bytes'] / 1e6:.1f} MB "
+                               f"> baseline {base['peak_bytes'] / 1e6:.1f} MB")
+    base_batch, cur_batch = baseline.get("batch"), current.get("batch")
+    same_setup = base_batch and cur_batch and all(
+        base_batch.get(k) == cur_batch.get(k) for k in ("trees", "scale", "jobs"))
+    if same_setup:
+        if cur_batch["trees_per_second"] < base_batch["trees_per_second"] * (1 - threshold):
+            regressions.append(f"batch throughput {cur_batch['trees_per_second']:.1f} trees/s "
+                               f"< baseline {base_batch['trees_per_second']:.1f} trees/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the challenge checker on synthetic trees")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated tree sizes relative to the shipped files (default: 1,10,100,1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is kept")
+    parser.add_argument("--batch", type=int, default=BATCH_TREES,
+                        help="Trees graded for the throughput benchmark (0 to skip)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for batch grading")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression (default: 0.10)")
+    args = parser.parse_args()
+
+    try:
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    except ValueError:
+        parser.error("--scales must be comma-separated integers")
+    if not scales or min(scales) < 1:
+        parser.error("--scales must be positive")
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  {Colors.RED}[X]{Colors.END} Could not read baseline {args.compare}: {e}")
+            return 2
+
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Checker Benchmarks{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    results = run_benchmarks(scales, args.repeat, args.batch, args.jobs)
+    print_checks(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n  Baseline written to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n  {Colors.CYAN}Against {args.compare} (threshold {args.threshold:.0%}):{Colors.END}")
+        if regressions:
+            for line in regressions:
+                print(f"      {Colors.RED}[X]{Colors.END} {line}")
+            print()
+            return 1
+        print(f"      {Colors.GREEN}[OK]{Colors.END} No regressions")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,17 +8,40 @@ Usage:
     python dashboard.py              # Open dashboard (LocalStack)
     python dashboard.py --aws        # Use real AWS credentials
     python dashboard.py --no-browser # Just start server
+    python dashboard.py --trace trace.json  # Record a Chrome trace until Ctrl+C
+    python dashboard.py --workers 4 --bind 0.0.0.0 --port 9000  # Multi-core serving
+    python dashboard.py --db inventory.db --retention-days 30   # Keep more history
+    python dashboard.py --aws --target prod@us-east-1,prod@eu-west-1  # Several regions
+
+Prometheus metrics are served at /metrics, and each page load returns a
+Server-Timing header with per-collector durations. The port is bound before
+the LocalStack/credential check and the first collection, which run in the
+background while pages show a "collecting" state. Every snapshot is saved
+to SQLite: startup renders the last one straight away, and /history shows
+how the tiers changed over time. Tiers with more than 200 instances are
+rendered as a virtual list that pages cards in from /api/instances, and
+/api/search?q= looks up resources by IP, CIDR, name, ID or tag.
 """
 
 import json
 import subprocess
 import sys
 import os
-import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import signal
+import socket
+from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading
 import time
 import argparse
+import re
+import functools
+import datetime
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from metrics import Counter, Gauge, Histogram, REGISTRY
+from awstargets import ConcurrencyLimiter, cli_args, parse_targets
+import tracing
 
 # For Windows compatibility
 if sys.platform == 'win32':
@@ -28,6 +51,85 @@ if sys.platform == 'win32':
 LOCALSTACK_ENDPOINT = "http://localhost:4566"
 USE_AWS = False
 
+# CloudWatch sparklines: one datapoint per period over the last hour
+METRIC_PERIOD = 60
+METRIC_WINDOW = 3600
+MAX_METRIC_QUERIES = 500  # GetMetricData limit per request
+INSTANCE_METRICS = [
+    ("cpu", "CPUUtilization", "Average"),
+    ("net_in", "NetworkIn", "Sum"),
+    ("net_out", "NetworkOut", "Sum"),
+]
+_metrics_cache = {}  # target -> (key, data)
+
+# Tiers with more EC2 instances/ECS tasks than this render as a virtual list:
+# the page holds only the aggregates, and the cards in view are fetched from
+# /api/instances a page at a time
+VIRTUAL_LIST_THRESHOLD = 200
+INSTANCE_PAGE_SIZE = 100
+INSTANCE_PAGE_MAX = 500
+VIRTUAL_CARD_HEIGHT = 170  # Fixed card height in the virtual list, px
+
+# Concurrent AWS CLI calls (each one is a subprocess)
+AWS_MAX_WORKERS = 8
+AWS_LIMITER_TOTAL = 16
+AWS_LIMITER_PER_TARGET = AWS_MAX_WORKERS
+AWS_LIMITER = ConcurrencyLimiter(AWS_LIMITER_TOTAL, AWS_LIMITER_PER_TARGET)
+ECS_DESCRIBE_CLUSTERS_BATCH = 100  # describe-clusters limit
+ECS_DESCRIBE_SERVICES_BATCH = 10   # describe-services limit
+ECS_DESCRIBE_TASKS_BATCH = 100     # describe-tasks limit
+
+# ALB target health and RDS status change quickly but are polled on every
+# refresh, so they are cached briefly rather than fetched per page load.
+LB_RDS_CACHE_TTL = 15
+
+DEFAULT_BIND = "localhost"
+DEFAULT_PORT = 8080
+# With --workers, one collector process refreshes the shared snapshot this often
+SNAPSHOT_REFRESH = 10
+_shared_snapshot = None  # SharedSnapshot reader in worker processes
+
+# Snapshot history in SQLite (--db); retention runs every COMPACT_EVERY saves
+DEFAULT_DB = "dashboard-snapshots.db"
+SNAPSHOT_RETENTION_DAYS = 7
+SNAPSHOT_MAX_ROWS = 10000
+COMPACT_EVERY = 100
+HISTORY_ROWS = 200
+_store_config = {"path": None, "max_age": SNAPSHOT_RETENTION_DAYS * 86400,
+                 "max_snapshots": SNAPSHOT_MAX_ROWS, "saves": 0}
+_stores = {}  # One SnapshotStore per process; connections must not cross fork()
+_stored_snapshot_cache = {}  # The last snapshot loaded by ID, while its tiers are paged
+# Startup state: the last stored snapshot, served until the first collection
+# (running in the "collecting" thread) finishes and leaves its result in "first"
+_warm_start = {"snapshot": None, "collecting": None, "first": None}
+
+# Profile/region targets (--target). With none, the CLI defaults are used and
+# snapshots hold one inventory; otherwise each target is collected
+# concurrently and the snapshot holds {"targets": {"profile@region": ...}}.
+TARGET_WAIT = 5  # Seconds a refresh waits for slow targets before merging without them
+_targets = []
+_fanout = {"latest": {}, "pending": {}, "lock": threading.RLock(), "pool": None}
+
+# /api/search: one InventoryIndex per process, updated from the snapshot it last indexed
+SEARCH_LIMIT = 50
+SEARCH_LIMIT_MAX = 500
+_search_index = {"index": None, "snapshot": None}
+
+# Prometheus metrics served on /metrics
+AWS_CALL_SECONDS = Histogram("dashboard_aws_call_seconds", "AWS CLI call latency",
+                             ["service", "action", "outcome"])
+COLLECT_SECONDS = Histogram("dashboard_collect_seconds", "Time spent in each snapshot collector",
+                            ["collector"])
+RENDER_SECONDS = Histogram("dashboard_render_seconds", "generate_html render time")
+CACHE_HITS = Counter("dashboard_cache_hits_total", "Collector cache hits", ["cache"])
+CACHE_MISSES = Counter("dashboard_cache_misses_total", "Collector cache misses", ["cache"])
+REFRESHES_IN_FLIGHT = Gauge("dashboard_refreshes_in_flight", "Snapshot collections currently running")
+REFRESHES_IN_FLIGHT.set(0)
+SNAPSHOT_AGE = Gauge("dashboard_snapshot_age_seconds", "Seconds since the last snapshot was collected")
+_snapshot_state = {"collected_at": None, "latest": None}  # latest: the snapshot last rendered
+SNAPSHOT_AGE.set_function(
+    lambda: None if _snapshot_state["collected_at"] is None else time.time() - _snapshot_state["collected_at"])
+
 class Colors:
     GREEN = '\033[92m'
     RED = '\033[91m'
@@ -37,27 +139,56 @@ class Colors:
     END = '\033[0m'
 
 
-def run_aws_command(service, action, extra_args=None):
-    """Run an AWS CLI command."""
+def _describe_call(service, action, extra_args=None, target=None):
+    span_args = {"service": service, "action": action}
+    if target is not None:
+        span_args["target"] = target.key
+    return span_args
+
+
+@tracing.traced("aws", describe=_describe_call)
+def run_aws_command(service, action, extra_args=None, target=None):
+    """Run an AWS CLI command against `target` (default profile and region if None).
+
+    Calls wait for a slot in AWS_LIMITER, which caps concurrent calls per
+    target and overall.
+    """
     cmd = ["aws"]
     if not USE_AWS:
         cmd.extend(["--endpoint-url", LOCALSTACK_ENDPOINT])
+    cmd.extend(cli_args(target))
     cmd.extend([service, action, "--output", "json"])
     if extra_args:
         cmd.extend(extra_args)
 
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        if result.returncode == 0:
-            return json.loads(result.stdout) if result.stdout else {}
-        return None
-    except Exception:
-        return None
-
-
-def get_vpcs():
+    outcome = "error"
+    with AWS_LIMITER.slot(target):
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            if result.returncode == 0:
+                data = json.loads(result.stdout) if result.stdout else {}
+                outcome = "ok"
+                return data
+            return None
+        except subprocess.TimeoutExpired:
+            outcome = "timeout"
+            return None
+        except Exception:
+            outcome = "exception"
+            return None
+        finally:
+            AWS_CALL_SECONDS.observe(time.perf_counter() - started, service=service, action=action, outcome=outcome)
+
+
+def _tag_map(resource, field="Tags"):
+    """A resource's tags as {key: value}."""
+    return {tag["Key"]: tag.get("Value", "") for tag in resource.get(field) or []}
+
+
+def get_vpcs(target=None):
     """Get VPCs (filter out default)."""
-    data = run_aws_command("ec2", "describe-vpcs")
+    data = run_aws_command("ec2", "describe-vpcs", target=target)
     if not data:
         return []
 
@@ -73,14 +204,15 @@ def get_vpcs():
             vpcs.append({
                 "id": vpc["VpcId"],
                 "cidr": vpc["CidrBlock"],
-                "name": name
+                "name": name,
+                "tags": _tag_map(vpc)
             })
     return vpcs
 
 
-def get_subnets(vpc_ids=None):
+def get_subnets(vpc_ids=None, target=None):
     """Get subnets grouped by tier."""
-    data = run_aws_command("ec2", "describe-subnets")
+    data = run_aws_command("ec2", "describe-subnets", target=target)
     if not data:
         return {"public": [], "app": [], "database": []}
 
@@ -110,14 +242,15 @@ def get_subnets(vpc_ids=None):
                 "id": subnet["SubnetId"],
                 "cidr": subnet["CidrBlock"],
                 "az": subnet.get("AvailabilityZone", ""),
-                "name": name
+                "name": name,
+                "tags": _tag_map(subnet)
             })
     return subnets
 
 
-def get_instances(vpc_ids=None):
+def get_instances(vpc_ids=None, target=None):
     """Get EC2 instances grouped by tier."""
-    data = run_aws_command("ec2", "describe-instances")
+    data = run_aws_command("ec2", "describe-instances", target=target)
     if not data:
         return {"web": [], "app": []}
 
@@ -144,14 +277,16 @@ def get_instances(vpc_ids=None):
                     "type": instance.get("InstanceType", ""),
                     "state": instance.get("State", {}).get("Name", "unknown"),
                     "private_ip": instance.get("PrivateIpAddress", ""),
-                    "name": name or "(unnamed)"
+                    "az": instance.get("Placement", {}).get("AvailabilityZone", ""),
+                    "name": name or "(unnamed)",
+                    "tags": _tag_map(instance)
                 })
     return instances
 
 
-def get_security_groups(vpc_ids=None):
+def get_security_groups(vpc_ids=None, target=None):
     """Get security groups."""
-    data = run_aws_command("ec2", "describe-security-groups")
+    data = run_aws_command("ec2", "describe-security-groups", target=target)
     if not data:
         return []
 
@@ -171,14 +306,15 @@ def get_security_groups(vpc_ids=None):
         sgs.append({
             "id": sg["GroupId"],
             "name": sg.get("GroupName", ""),
-            "ports": ports
+            "ports": ports,
+            "tags": _tag_map(sg)
         })
     return sgs
 
 
-def get_internet_gateways(vpc_ids=None):
+def get_internet_gateways(vpc_ids=None, target=None):
     """Get internet gateways."""
-    data = run_aws_command("ec2", "describe-internet-gateways")
+    data = run_aws_command("ec2", "describe-internet-gateways", target=target)
     if not data:
         return []
 
@@ -194,41 +330,351 @@ def get_internet_gateways(vpc_ids=None):
             if tag["Key"] == "Name":
                 name = tag["Value"]
         if name or vpc_id:
-            igws.append({"id": igw["InternetGatewayId"], "name": name})
+            igws.append({"id": igw["InternetGatewayId"], "name": name, "tags": _tag_map(igw)})
     return igws
 
 
-def generate_html():
-    """Generate the dashboard HTML with clear 3-tier visualization."""
-    vpcs = get_vpcs()
-    vpc_ids = [v["id"] for v in vpcs] if vpcs else None
+def ttl_cache(ttl):
+    """Cache a collector's result for `ttl` seconds, per argument tuple."""
+    def decorator(func):
+        entries = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                hit = entries.get(args)
+            if hit and now - hit[0] < ttl:
+                CACHE_HITS.inc(cache=func.__name__)
+                return hit[1]
+            CACHE_MISSES.inc(cache=func.__name__)
+            value = func(*args)
+            with lock:
+                entries[args] = (now, value)
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
+
+
+def _chunks(items, size):
+    """Split a list into lists of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _ecs_tier(name):
+    """Map an ECS service/task family name to the web or app tier."""
+    return "app" if "app" in name.lower() else "web"
+
+
+def get_ecs_inventory(target=None):
+    """Get ECS clusters, services and tasks, with tasks grouped by tier.
+
+    Uses the batch APIs after one (CLI-paginated) list call per cluster:
+    describe-clusters and describe-tasks 100 at a time, describe-services
+    10 at a time. The
+    list calls for all clusters run concurrently, then every describe
+    batch across all clusters runs concurrently, so even a large cluster
+    refreshes in a handful of round trips.
+    """
+    inventory = {"clusters": [], "services": [], "tasks": {"web": [], "app": []}}
+    data = run_aws_command("ecs", "list-clusters", target=target)
+    cluster_arns = (data or {}).get("clusterArns", [])
+    if not cluster_arns:
+        return inventory
+
+    with ThreadPoolExecutor(max_workers=AWS_MAX_WORKERS) as pool:
+        described = [pool.submit(run_aws_command, "ecs", "describe-clusters", ["--clusters"] + batch, target)
+                     for batch in _chunks(cluster_arns, ECS_DESCRIBE_CLUSTERS_BATCH)]
+        listed = {
+            arn: (pool.submit(run_aws_command, "ecs", "list-services", ["--cluster", arn], target),
+                  pool.submit(run_aws_command, "ecs", "list-tasks",
+                              ["--cluster", arn, "--desired-status", "RUNNING"], target))
+            for arn in cluster_arns
+        }
+
+        service_batches = []
+        task_batches = []
+        for arn, (services, tasks) in listed.items():
+            service_arns = (services.result() or {}).get("serviceArns", [])
+            task_arns = (tasks.result() or {}).get("taskArns", [])
+            for batch in _chunks(service_arns, ECS_DESCRIBE_SERVICES_BATCH):
+                service_batches.append(pool.submit(run_aws_command, "ecs", "describe-services",
+                                                   ["--cluster", arn, "--services"] + batch, target))
+            for batch in _chunks(task_arns, ECS_DESCRIBE_TASKS_BATCH):
+                task_batches.append(pool.submit(run_aws_command, "ecs", "describe-tasks",
+                                                ["--cluster", arn, "--tasks"] + batch, target))
+
+        for future in described:
+            for cluster in (future.result() or {}).get("clusters", []):
+                inventory["clusters"].append({
+                    "name": cluster.get("clusterName", ""),
+                    "status": cluster.get("status", "unknown"),
+                    "running_tasks": cluster.get("runningTasksCount", 0),
+                    "services": cluster.get("activeServicesCount", 0),
+                })
 
-    subnets = get_subnets(vpc_ids)
-    instances = get_instances(vpc_ids)
-    security_groups = get_security_groups(vpc_ids)
-    igws = get_internet_gateways(vpc_ids)
+        for future in service_batches:
+            for service in (future.result() or {}).get("services", []):
+                name = service.get("serviceName", "")
+                inventory["services"].append({
+                    "name": name,
+                    "tier": _ecs_tier(name),
+                    "status": service.get("status", "unknown"),
+                    "desired": service.get("desiredCount", 0),
+                    "running": service.get("runningCount", 0),
+                    "launch_type": service.get("launchType", ""),
+                })
 
-    mode = "Real AWS" if USE_AWS else "LocalStack"
-    total_subnets = len(subnets["public"]) + len(subnets["app"]) + len(subnets["database"])
-    total_instances = len(instances["web"]) + len(instances["app"])
+        for future in task_batches:
+            for task in (future.result() or {}).get("tasks", []):
+                group = task.get("group", "")
+                family = task.get("taskDefinitionArn", "").rsplit("/", 1)[-1].split(":")[0]
+                name = group.split(":", 1)[1] if group.startswith("service:") else family
+                private_ip = ""
+                for attachment in task.get("attachments", []):
+                    for detail in attachment.get("details", []):
+                        if detail.get("name") == "privateIPv4Address":
+                            private_ip = detail.get("value", "")
+                inventory["tasks"][_ecs_tier(name)].append({
+                    "id": task.get("taskArn", "").rsplit("/", 1)[-1],
+                    "type": task.get("launchType", "ECS"),
+                    "state": task.get("lastStatus", "unknown").lower(),
+                    "private_ip": private_ip,
+                    "az": task.get("availabilityZone", ""),
+                    "name": name or "(task)",
+                })
+    return inventory
+
+
+@ttl_cache(LB_RDS_CACHE_TTL)
+def get_alb_and_rds(target=None):
+    """Get load balancers, listeners, target health and RDS instances.
+
+    Load balancers, target groups and DB instances are described
+    concurrently; then listeners for every load balancer and
+    describe-target-health for every target group run concurrently.
+    The result is cached for LB_RDS_CACHE_TTL seconds.
+    """
+    inventory = {"load_balancers": [], "target_groups": [], "databases": []}
+    with ThreadPoolExecutor(max_workers=AWS_MAX_WORKERS) as pool:
+        lbs_future = pool.submit(run_aws_command, "elbv2", "describe-load-balancers", None, target)
+        tgs_future = pool.submit(run_aws_command, "elbv2", "describe-target-groups", None, target)
+        dbs_future = pool.submit(run_aws_command, "rds", "describe-db-instances", None, target)
+
+        lbs = (lbs_future.result() or {}).get("LoadBalancers", [])
+        tgs = (tgs_future.result() or {}).get("TargetGroups", [])
+        listener_futures = [
+            pool.submit(run_aws_command, "elbv2", "describe-listeners",
+                        ["--load-balancer-arn", lb["LoadBalancerArn"]], target)
+            for lb in lbs
+        ]
+        health_futures = [
+            pool.submit(run_aws_command, "elbv2", "describe-target-health",
+                        ["--target-group-arn", tg["TargetGroupArn"]], target)
+            for tg in tgs
+        ]
+
+        tg_names = {tg["TargetGroupArn"]: tg.get("TargetGroupName", "") for tg in tgs}
+        for lb, future in zip(lbs, listener_futures):
+            listeners = []
+            for listener in (future.result() or {}).get("Listeners", []):
+                forward = [tg_names.get(a.get("TargetGroupArn"), "")
+                           for a in listener.get("DefaultActions", []) if a.get("TargetGroupArn")]
+                listeners.append({
+                    "port": listener.get("Port"),
+                    "protocol": listener.get("Protocol", ""),
+                    "target_groups": forward,
+                })
+            inventory["load_balancers"].append({
+                "name": lb.get("LoadBalancerName", ""),
+                "dns": lb.get("DNSName", ""),
+                "state": lb.get("State", {}).get("Code", "unknown"),
+                "scheme": lb.get("Scheme", ""),
+                "listeners": listeners,
+            })
+
+        for tg, future in zip(tgs, health_futures):
+            targets = []
+            counts = {}
+            for desc in (future.result() or {}).get("TargetHealthDescriptions", []):
+                state = desc.get("TargetHealth", {}).get("State", "unknown")
+                counts[state] = counts.get(state, 0) + 1
+                targets.append({
+                    "id": desc.get("Target", {}).get("Id", ""),
+                    "port": desc.get("Target", {}).get("Port"),
+                    "state": state,
+                    "reason": desc.get("TargetHealth", {}).get("Reason", ""),
+                })
+            inventory["target_groups"].append({
+                "name": tg.get("TargetGroupName", ""),
+                "port": tg.get("Port"),
+                "protocol": tg.get("Protocol", ""),
+                "health": counts,
+                "targets": targets,
+            })
 
-    # Build instance cards HTML
-    web_instances_html = ""
-    for inst in instances["web"]:
-        web_instances_html += f'''
+        for db in (dbs_future.result() or {}).get("DBInstances", []):
+            inventory["databases"].append({
+                "id": db.get("DBInstanceIdentifier", ""),
+                "engine": f"{db.get('Engine', '')} {db.get('EngineVersion', '')}".strip(),
+                "class": db.get("DBInstanceClass", ""),
+                "status": db.get("DBInstanceStatus", "unknown"),
+                "multi_az": db.get("MultiAZ", False),
+                "endpoint": db.get("Endpoint", {}).get("Address", ""),
+                "az": db.get("AvailabilityZone", ""),
+                "tags": _tag_map(db, "TagList"),
+            })
+    return inventory
+
+
+def alb_panel_html(traffic):
+    """Build the load balancer / target health panel for the public tier."""
+    if not traffic["load_balancers"] and not traffic["target_groups"]:
+        return ('<div style="margin-top:10px;font-size:0.9em;opacity:0.8;">'
+                'Note: ALB requires LocalStack Pro. In production, ALB distributes traffic here.</div>')
+    html = '<div class="instances-grid" style="margin-top:10px;">'
+    for lb in traffic["load_balancers"]:
+        listeners = ", ".join(
+            f'{l["protocol"]}:{l["port"]}' + (f' &rarr; {", ".join(l["target_groups"])}' if l["target_groups"] else "")
+            for l in lb["listeners"]) or "No listeners"
+        html += f'''
             <div class="instance-card">
-                <div class="instance-name">{inst["name"]}</div>
-                <div class="instance-id">{inst["id"][:20]}</div>
+                <div class="instance-name">{lb["name"]}</div>
+                <div class="instance-id">{lb["dns"]}</div>
                 <div class="instance-details">
-                    <span class="badge">{inst["type"]}</span>
-                    <span class="badge status-{inst["state"]}">{inst["state"]}</span>
+                    <span class="badge">{lb["scheme"] or "alb"}</span>
+                    <span class="badge status-{lb["state"]}">{lb["state"]}</span>
+                </div>
+                <div class="instance-ip">{listeners}</div>
+            </div>'''
+    for tg in traffic["target_groups"]:
+        health = " ".join(f'<span class="badge health-{state}">{n} {state}</span>'
+                          for state, n in sorted(tg["health"].items())) or '<span class="badge">no targets</span>'
+        html += f'''
+            <div class="instance-card">
+                <div class="instance-name">{tg["name"]}</div>
+                <div class="instance-id">{tg["protocol"]}:{tg["port"]}</div>
+                <div class="instance-details">{health}</div>
+            </div>'''
+    return html + "</div>"
+
+
+def rds_panel_html(traffic):
+    """Build the RDS status panel for the database tier."""
+    if not traffic["databases"]:
+        return ('<div style="margin-top:10px;font-size:0.9em;opacity:0.8;">'
+                'Note: RDS requires LocalStack Pro. In production, MySQL/PostgreSQL runs here.</div>')
+    html = '<div class="instances-grid" style="margin-top:10px;">'
+    for db in traffic["databases"]:
+        html += f'''
+            <div class="instance-card">
+                <div class="instance-name">{db["id"]}</div>
+                <div class="instance-id">{db["endpoint"] or "no endpoint yet"}</div>
+                <div class="instance-details">
+                    <span class="badge">{db["class"]}</span>
+                    <span class="badge">{db["engine"]}</span>
+                    <span class="badge status-{db["status"]}">{db["status"]}</span>
+                    {'<span class="badge">Multi-AZ</span>' if db["multi_az"] else ""}
                 </div>
-                <div class="instance-ip">IP: {inst["private_ip"] or "N/A"}</div>
             </div>'''
+    return html + "</div>"
+
+
+def get_instance_metrics(instance_ids, target=None):
+    """Get CPU and network series for many instances in batched GetMetricData calls.
+
+    All instances share one request (up to MAX_METRIC_QUERIES queries each),
+    and results are cached until the next period boundary, so refreshing
+    within the same minute makes no API calls.
+    Returns {instance_id: {"cpu": [...], "net_in": [...], "net_out": [...]}}.
+    """
+    end = int(time.time()) // METRIC_PERIOD * METRIC_PERIOD
+    key = (end, tuple(sorted(instance_ids)))
+    cached = _metrics_cache.get(target)
+    if cached and cached[0] == key:
+        CACHE_HITS.inc(cache="get_instance_metrics")
+        return cached[1]
+    CACHE_MISSES.inc(cache="get_instance_metrics")
+    import tempfile  # Loaded off the startup path
+
+    queries = {}
+    for i, instance_id in enumerate(sorted(instance_ids)):
+        for j, (short, metric, stat) in enumerate(INSTANCE_METRICS):
+            queries[f"m{i}_{j}"] = (instance_id, short, {
+                "Id": f"m{i}_{j}",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": "AWS/EC2",
+                        "MetricName": metric,
+                        "Dimensions": [{"Name": "InstanceId", "Value": instance_id}],
+                    },
+                    "Period": METRIC_PERIOD,
+                    "Stat": stat,
+                },
+                "ReturnData": True,
+            })
 
-    app_instances_html = ""
-    for inst in instances["app"]:
-        app_instances_html += f'''
+    metrics = {instance_id: {short: [] for short, _, _ in INSTANCE_METRICS} for instance_id in instance_ids}
+    batch = [q for _, _, q in queries.values()]
+    start_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(end - METRIC_WINDOW))
+    end_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(end))
+    for offset in range(0, len(batch), MAX_METRIC_QUERIES):
+        # Large query lists exceed the command-line length limit, so pass them as a file
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(batch[offset:offset + MAX_METRIC_QUERIES], f)
+            queries_file = f.name
+        try:
+            data = run_aws_command("cloudwatch", "get-metric-data", [
+                "--metric-data-queries", f"file://{queries_file}",
+                "--start-time", start_time,
+                "--end-time", end_time,
+                "--scan-by", "TimestampAscending",
+            ], target)
+        finally:
+            os.unlink(queries_file)
+        for result in (data or {}).get("MetricDataResults", []):
+            if result.get("Id") not in queries:
+                continue
+            instance_id, short, _ = queries[result["Id"]]
+            metrics[instance_id][short].extend(result.get("Values", []))
+
+    _metrics_cache[target] = (key, metrics)
+    return metrics
+
+
+def sparkline_svg(values, width=120, height=22):
+    """Render a series as a small inline SVG polyline."""
+    if len(values) < 2:
+        return '<span class="spark-empty">no data</span>'
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    step = width / (len(values) - 1)
+    points = " ".join(
+        f"{i * step:.1f},{height - 1 - (v - low) / span * (height - 2):.1f}" for i, v in enumerate(values)
+    )
+    return (f'<svg class="spark" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline points="{points}" /></svg>')
+
+
+def format_bytes(value):
+    """Format a byte count as '12.3 KB'."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def instance_card_html(inst, metrics):
+    """Build the HTML card for one instance, with CPU/network sparklines."""
+    series = metrics.get(inst["id"], {})
+    cpu = series.get("cpu", [])
+    net = [a + b for a, b in zip(series.get("net_in", []), series.get("net_out", []))]
+    cpu_label = f"{cpu[-1]:.0f}%" if cpu else ""
+    net_label = format_bytes(net[-1]) if net else ""
+    return f'''
             <div class="instance-card">
                 <div class="instance-name">{inst["name"]}</div>
                 <div class="instance-id">{inst["id"][:20]}</div>
@@ -237,8 +683,536 @@ def generate_html():
                     <span class="badge status-{inst["state"]}">{inst["state"]}</span>
                 </div>
                 <div class="instance-ip">IP: {inst["private_ip"] or "N/A"}</div>
+                <div class="instance-metric"><span class="metric-label">CPU {cpu_label}</span>{sparkline_svg(cpu)}</div>
+                <div class="instance-metric"><span class="metric-label">Net {net_label}</span>{sparkline_svg(net)}</div>
             </div>'''
 
+
+def select_target(snapshot, target=None):
+    """Return (inventory, target key) to show for `snapshot`.
+
+    For a merged multi-target snapshot, `target` ("profile@region") picks
+    the inventory; it defaults to the first target with data.
+    """
+    if "targets" not in snapshot:
+        return snapshot, None
+    parts = snapshot["targets"]
+    if target not in parts:
+        target = next((key for key, part in parts.items() if part), next(iter(parts), None))
+    return parts.get(target) or empty_snapshot(), target
+
+
+def _by_count(counts):
+    """`counts` ordered by descending count, then by key."""
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def tier_summary(inventory, tier):
+    """Counts for one tier panel: total, and members per state and per type."""
+    cached = inventory.get("tier_summaries", {}).get(tier)
+    if cached is not None:
+        return cached
+    states, types = {}, {}
+    for group in (inventory["instances"][tier], inventory["ecs"]["tasks"][tier]):
+        for member in group:
+            states[member["state"]] = states.get(member["state"], 0) + 1
+            types[member["type"]] = types.get(member["type"], 0) + 1
+    return {"total": sum(states.values()), "states": _by_count(states), "types": _by_count(types)}
+
+
+def tier_summary_html(summary):
+    if not summary["total"]:
+        return ""
+    states = "".join(f'<span class="badge status-{state}">{count} {state}</span>'
+                     for state, count in summary["states"].items())
+    types = ", ".join(f"{count} {kind}" for kind, count in summary["types"].items())
+    return f'<div class="tier-summary">{states}<span class="types">{types}</span></div>'
+
+
+def instance_page(inventory, tier, offset, limit):
+    """One page of a tier's EC2 instances then ECS tasks, for /api/instances."""
+    ec2, tasks = inventory["instances"][tier], inventory["ecs"]["tasks"][tier]
+    members = ec2[offset:offset + limit]
+    if len(members) < limit:
+        members += tasks[max(0, offset - len(ec2)):offset + limit - len(ec2)]
+    metrics = inventory["metrics"]
+    return {
+        "tier": tier,
+        "total": len(ec2) + len(tasks),
+        "offset": offset,
+        "collected_at": inventory.get("collected_at"),
+        "items": [dict(member, html=instance_card_html(member, metrics)) for member in members],
+    }
+
+
+# Renders each .instances-virtual list: only the rows in view are in the DOM,
+# and their cards are fetched from /api/instances one page at a time
+VIRTUAL_LIST_JS = """
+        document.querySelectorAll('.instances-virtual').forEach((list) => {
+            const grid = list.querySelector('.instances-grid');
+            const spacer = list.querySelector('.virtual-spacer');
+            const pageSize = Number(list.dataset.pageSize);
+            const style = getComputedStyle(grid);
+            const gap = parseFloat(style.rowGap) || 0;
+            const rowHeight = parseFloat(style.gridAutoRows) + gap;
+            const pages = new Map();  // page number -> items, or null while loading
+            let total = Number(list.dataset.total), columns = 1, shown = '', frame = 0;
+
+            function load(page) {
+                pages.set(page, null);
+                const params = new URLSearchParams({tier: list.dataset.tier, offset: page * pageSize, limit: pageSize});
+                if (list.dataset.target) params.set('target', list.dataset.target);
+                if (list.dataset.snapshot) params.set('snapshot', list.dataset.snapshot);
+                fetch('/api/instances?' + params)
+                    .then((response) => response.json())
+                    .then((data) => {
+                        pages.set(page, data.items);
+                        if (data.total !== total) {
+                            total = data.total;
+                            layout();
+                        }
+                        schedule();
+                    })
+                    .catch(() => pages.delete(page));
+            }
+
+            function layout() {
+                // Same column count as grid-template-columns: repeat(auto-fill, minmax(200px, 1fr))
+                columns = Math.max(1, Math.floor((grid.clientWidth + gap) / (200 + gap)));
+                spacer.style.height = Math.ceil(total / columns) * rowHeight + 'px';
+                shown = '';
+            }
+
+            function render() {
+                frame = 0;
+                const first = Math.floor(list.scrollTop / rowHeight);
+                const rows = Math.ceil(list.clientHeight / rowHeight) + 1;
+                const start = first * columns, end = Math.min(total, (first + rows) * columns);
+                let html = '', key = start + ':' + end;
+                for (let i = start; i < end; i++) {
+                    const page = Math.floor(i / pageSize);
+                    const items = pages.get(page);
+                    if (items === undefined) load(page);
+                    const item = items && items[i - page * pageSize];
+                    key += item ? '+' : '-';
+                    html += item ? item.html : '<div class="instance-card loading">Loading&hellip;</div>';
+                }
+                if (key !== shown) {
+                    shown = key;
+                    grid.style.transform = 'translateY(' + first * rowHeight + 'px)';
+                    grid.innerHTML = html;
+                }
+            }
+
+            function schedule() {
+                if (!frame) frame = requestAnimationFrame(render);
+            }
+
+            list.addEventListener('scroll', schedule);
+            window.addEventListener('resize', () => { layout(); schedule(); });
+            layout();
+            schedule();
+        });"""
+
+
+def tier_cards_html(inventory, tier, target=None, snapshot_id=None):
+    """The cards of one tier, or a virtual list that loads them when the tier is large."""
+    ec2, tasks = inventory["instances"][tier], inventory["ecs"]["tasks"][tier]
+    total = len(ec2) + len(tasks)
+    if total <= VIRTUAL_LIST_THRESHOLD:
+        cards = "".join(instance_card_html(inst, inventory["metrics"]) for inst in ec2 + tasks)
+        empty = f'<span class="empty">No {tier} instances</span>'
+        return f'<div class="instances-grid">{cards or empty}</div>'
+    attrs = f'data-tier="{tier}" data-total="{total}" data-page-size="{INSTANCE_PAGE_SIZE}"'
+    if target:
+        attrs += f' data-target="{target}"'
+    if snapshot_id is not None:
+        attrs += f' data-snapshot="{snapshot_id}"'
+    return (f'<div class="instances-virtual" {attrs} onclick="event.stopPropagation()">'
+            f'<div class="virtual-spacer"></div><div class="instances-grid"></div></div>')
+
+
+def _timed(timings, name, func, *args):
+    """Run one collector, recording its duration for metrics and Server-Timing."""
+    with COLLECT_SECONDS.time(collector=name) as timer, tracing.span(f"collect {name}", "collect"):
+        value = func(*args)
+    timings.append((name, timer.seconds))
+    return value
+
+
+def collect_snapshot(target=None):
+    """Collect everything the dashboard renders for one target into a snapshot dict.
+
+    The snapshot also carries when it was collected and how long each
+    collector took, as a list of (collector, seconds).
+    """
+    timings = []
+    REFRESHES_IN_FLIGHT.inc()
+    try:
+        vpcs = _timed(timings, "vpcs", get_vpcs, target)
+        vpc_ids = [v["id"] for v in vpcs] if vpcs else None
+        subnets = _timed(timings, "subnets", get_subnets, vpc_ids, target)
+        instances = _timed(timings, "instances", get_instances, vpc_ids, target)
+        security_groups = _timed(timings, "security_groups", get_security_groups, vpc_ids, target)
+        igws = _timed(timings, "igws", get_internet_gateways, vpc_ids, target)
+        ecs = _timed(timings, "ecs", get_ecs_inventory, target)
+        traffic = _timed(timings, "alb_rds", get_alb_and_rds, target)
+        # One batched CloudWatch request for all instances
+        metrics = _timed(timings, "metrics", get_instance_metrics,
+                         [i["id"] for tier in ("web", "app") for i in instances[tier]], target)
+    finally:
+        REFRESHES_IN_FLIGHT.dec()
+
+    collected_at = time.time()
+    _snapshot_state["collected_at"] = collected_at
+    snapshot = {
+        "collected_at": collected_at,
+        "timings": timings,
+        "vpcs": vpcs,
+        "subnets": subnets,
+        "instances": instances,
+        "security_groups": security_groups,
+        "igws": igws,
+        "ecs": ecs,
+        "traffic": traffic,
+        "metrics": metrics,
+    }
+    # Aggregated once here so rendering does not depend on the fleet size
+    snapshot["tier_summaries"] = {tier: tier_summary(snapshot, tier) for tier in ("web", "app")}
+    return snapshot
+
+
+def empty_snapshot():
+    """A snapshot with no resources, rendered for targets not collected yet."""
+    return {
+        "collected_at": None,
+        "timings": [],
+        "vpcs": [],
+        "subnets": {"public": [], "app": [], "database": []},
+        "instances": {"web": [], "app": []},
+        "security_groups": [],
+        "igws": [],
+        "ecs": {"clusters": [], "services": [], "tasks": {"web": [], "app": []}},
+        "traffic": {"load_balancers": [], "target_groups": [], "databases": []},
+        "metrics": {},
+    }
+
+
+def _target_done(key, future):
+    with _fanout["lock"]:
+        _fanout["pending"].pop(key, None)
+        try:
+            _fanout["latest"][key] = future.result()
+        except Exception as e:
+            print(f"  {Colors.YELLOW}[!]{Colors.END} Collection for {key} failed: {e}")
+
+
+def collect_targets(targets, wait=None):
+    """Collect every target concurrently and merge what is ready after `wait` seconds.
+
+    `wait` defaults to TARGET_WAIT.
+
+    A target still collecting keeps its previous snapshot (or none) in the
+    merge and is updated when it finishes, so a slow or unreachable
+    region never holds up the others. A target is never collected twice
+    at once.
+    """
+    with _fanout["lock"]:
+        if _fanout["pool"] is None:
+            _fanout["pool"] = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="target")
+        for target in targets:
+            if target.key not in _fanout["pending"]:
+                future = _fanout["pool"].submit(collect_snapshot, target)
+                _fanout["pending"][target.key] = future
+                future.add_done_callback(functools.partial(_target_done, target.key))
+        futures = list(_fanout["pending"].values())
+    wait_futures(futures, timeout=TARGET_WAIT if wait is None else wait)
+    return merged_snapshot(targets)
+
+
+def merged_snapshot(targets):
+    """Merge the latest snapshot of each target, keyed by "profile@region"."""
+    with _fanout["lock"]:
+        snapshots = {t.key: _fanout["latest"].get(t.key) for t in targets}
+        collecting = sorted(key for key in snapshots if key in _fanout["pending"])
+    collected = [snap["collected_at"] for snap in snapshots.values() if snap]
+    return {
+        "collected_at": max(collected) if collected else time.time(),
+        "timings": [(key, sum(seconds for _, seconds in snap["timings"]))
+                    for key, snap in snapshots.items() if snap],
+        "targets": snapshots,
+        "collecting": collecting,
+    }
+
+
+def collect_inventory():
+    """Collect the default target, or every --target merged."""
+    if _targets:
+        return collect_targets(_targets)
+    return collect_snapshot()
+
+
+def snapshot_store():
+    """Return this process's SnapshotStore, or None when --no-db is set."""
+    if _store_config["path"] is None:
+        return None
+    pid = os.getpid()
+    if pid not in _stores:
+        from snapshotstore import SnapshotStore  # Loaded off the startup path (sqlite3)
+        _stores[pid] = SnapshotStore(_store_config["path"])
+    return _stores[pid]
+
+
+def snapshot_summary(snapshot):
+    """Per-tier counts stored with each snapshot for the history view.
+
+    A merged multi-target snapshot is summed over its targets.
+    """
+    if "targets" in snapshot:
+        totals = {}
+        for part in snapshot["targets"].values():
+            for key, value in snapshot_summary(part or empty_snapshot()).items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+    instances, ecs, traffic = snapshot["instances"], snapshot["ecs"], snapshot["traffic"]
+    return {
+        "subnets": sum(len(v) for v in snapshot["subnets"].values()),
+        "web": len(instances["web"]) + len(ecs["tasks"]["web"]),
+        "app": len(instances["app"]) + len(ecs["tasks"]["app"]),
+        "healthy_targets": sum(tg["health"].get("healthy", 0) for tg in traffic["target_groups"]),
+        "databases": len(traffic["databases"]),
+    }
+
+
+def search_records(snapshot):
+    """Flatten a snapshot into {key: record} for the search index.
+
+    Keys are (target, kind, id). Records carry the fields a resource is
+    searched by and "address", its IP or CIDR block, if it has one.
+    """
+    if "targets" in snapshot:
+        records = {}
+        for key, part in snapshot["targets"].items():
+            records.update(search_records(dict(part or empty_snapshot(), target=key)))
+        return records
+    target = snapshot.get("target")
+    records = {}
+
+    def add(kind, resource_id, **fields):
+        record = {"kind": kind, "id": resource_id, **fields}
+        if target:
+            record["target"] = target
+        records[(target, kind, resource_id)] = record
+
+    for vpc in snapshot["vpcs"]:
+        add("vpc", vpc["id"], name=vpc["name"], address=vpc["cidr"], tags=vpc.get("tags", {}))
+    for tier, subnets in snapshot["subnets"].items():
+        for subnet in subnets:
+            add("subnet", subnet["id"], name=subnet["name"], tier=tier, az=subnet["az"],
+                address=subnet["cidr"], tags=subnet.get("tags", {}))
+    for kind, groups in (("instance", snapshot["instances"]), ("task", snapshot["ecs"]["tasks"])):
+        for tier, members in groups.items():
+            for member in members:
+                add(kind, member["id"], name=member["name"], tier=tier, az=member.get("az", ""),
+                    state=member["state"], type=member["type"], address=member["private_ip"],
+                    tags=member.get("tags", {}))
+    for sg in snapshot["security_groups"]:
+        add("security-group", sg["id"], name=sg["name"], tags=sg.get("tags", {}))
+    for igw in snapshot["igws"]:
+        add("internet-gateway", igw["id"], name=igw["name"], tags=igw.get("tags", {}))
+    for cluster in snapshot["ecs"]["clusters"]:
+        add("ecs-cluster", cluster["name"], name=cluster["name"], state=cluster["status"])
+    for service in snapshot["ecs"]["services"]:
+        add("ecs-service", service["name"], name=service["name"], tier=service["tier"],
+            state=service["status"], type=service["launch_type"])
+    traffic = snapshot["traffic"]
+    for lb in traffic["load_balancers"]:
+        add("load-balancer", lb["name"], name=lb["name"], state=lb["state"], dns=lb["dns"])
+    for tg in traffic["target_groups"]:
+        add("target-group", tg["name"], name=tg["name"])
+    for db in traffic["databases"]:
+        add("database", db["id"], name=db["id"], state=db["status"], type=db["class"],
+            engine=db["engine"], az=db.get("az", ""), dns=db["endpoint"], tags=db.get("tags", {}))
+    return records
+
+
+def search_index(snapshot):
+    """This process's InventoryIndex, brought up to date with `snapshot`.
+
+    Only the resources that changed since the last indexed snapshot are
+    re-indexed.
+    """
+    if _search_index["index"] is None:
+        from inventoryindex import InventoryIndex
+        _search_index["index"] = InventoryIndex()
+    if _search_index["snapshot"] is not snapshot:
+        with tracing.span("index snapshot", "search"):
+            _search_index["index"].update(search_records(snapshot))
+        _search_index["snapshot"] = snapshot
+    return _search_index["index"]
+
+
+def persist_snapshot(snapshot):
+    """Save a snapshot to the history store, applying retention now and then."""
+    store = snapshot_store()
+    if store is None:
+        return
+    import sqlite3
+    try:
+        with tracing.span("persist snapshot", "store"):
+            store.save(snapshot, snapshot_summary(snapshot))
+            _store_config["saves"] += 1
+            if _store_config["saves"] % COMPACT_EVERY == 0:
+                store.compact(_store_config["max_age"], _store_config["max_snapshots"])
+    except sqlite3.Error as e:
+        print(f"  {Colors.YELLOW}[!]{Colors.END} Could not save snapshot: {e}")
+
+
+def refresh_snapshot():
+    """Collect a new snapshot and persist it."""
+    snapshot = collect_inventory()
+    persist_snapshot(snapshot)
+    return snapshot
+
+
+def collecting_snapshot():
+    """Placeholder rendered before the first collection finishes."""
+    snapshot = merged_snapshot(_targets) if _targets else empty_snapshot()
+    snapshot["first_collection"] = True
+    return snapshot
+
+
+def current_snapshot():
+    """Return (snapshot, fresh) for a page request.
+
+    A single-process dashboard collects a fresh snapshot per request.
+    While the startup collection runs, requests get the last stored
+    snapshot (or a "collecting" placeholder) instead of waiting, and the
+    first request after it finishes gets its result. A --workers process
+    reads the collector's latest shared snapshot, or the placeholder
+    before there is one.
+    """
+    if _shared_snapshot is None:
+        startup = _warm_start["collecting"]
+        if startup is not None:
+            if startup.is_alive():
+                warm = _warm_start["snapshot"]
+                if warm is None:
+                    return collecting_snapshot(), False
+                _snapshot_state["collected_at"] = warm["collected_at"]
+                return warm, False
+            first = _warm_start["first"]
+            _warm_start.update(snapshot=None, collecting=None, first=None)
+            if first is not None:
+                _snapshot_state["collected_at"] = first["collected_at"]
+                return first, False
+        return refresh_snapshot(), True
+    snapshot, _ = _shared_snapshot.read()
+    if snapshot is None:
+        return collecting_snapshot(), False
+    _snapshot_state["collected_at"] = snapshot["collected_at"]
+    return snapshot, False
+
+
+def latest_snapshot():
+    """The snapshot pages are rendered from, without collecting a new one.
+
+    /api/instances and /api/search read this so they never wait for a
+    collection. Before the first page has been rendered it is the startup
+    collection's result or the stored snapshot, if either exists yet.
+    """
+    if _shared_snapshot is not None:
+        snapshot, _ = _shared_snapshot.read()
+        return snapshot
+    latest = _snapshot_state["latest"]
+    if latest is None or latest.get("first_collection"):
+        return _warm_start["first"] or _warm_start["snapshot"] or latest
+    return latest
+
+
+def stored_snapshot(snapshot_id):
+    """A snapshot from the history store, or None; the last one loaded is kept."""
+    cached = _stored_snapshot_cache.get(snapshot_id)
+    if cached is not None:
+        return cached
+    store = snapshot_store()
+    snapshot = store.load(snapshot_id) if store else None
+    if snapshot is not None:
+        _stored_snapshot_cache.clear()
+        _stored_snapshot_cache[snapshot_id] = snapshot
+    return snapshot
+
+
+def server_timing_header(timings):
+    """Format (name, seconds) pairs as a Server-Timing header value."""
+    return ", ".join(f"{re.sub(r'[^A-Za-z0-9.-]', '-', name)};dur={seconds * 1000:.1f}" for name, seconds in timings)
+
+
+def target_nav_html(snapshot, selected):
+    """Links to every target of a merged snapshot, with its collection state."""
+    links = []
+    for key, part in snapshot["targets"].items():
+        if part is None:
+            state = "collecting&hellip;"
+        else:
+            state = f'{time.time() - part["collected_at"]:.0f}s ago'
+            if key in snapshot["collecting"]:
+                state += ", refreshing"
+        weight = "bold" if key == selected else "normal"
+        links.append(f'<a href="/?target={key}" style="color: #ff9900; font-weight: {weight};">{key}</a> '
+                     f'<span style="color: #888;">({state})</span>')
+    return f'<p class="subtitle">{" &middot; ".join(links)}</p>'
+
+
+def generate_html(snapshot=None, target=None, snapshot_id=None):
+    """Generate the dashboard HTML with clear 3-tier visualization.
+
+    For a merged multi-target snapshot, `target` ("profile@region") picks
+    the inventory shown; it defaults to the first target with data.
+    `snapshot_id` is the stored snapshot being shown, if it is not the
+    latest; large tiers load their cards from that snapshot.
+    """
+    if snapshot is None:
+        snapshot = collect_inventory()
+    first_collection = snapshot.get("first_collection", False)
+    nav = ""
+    if "targets" in snapshot:
+        merged = snapshot
+        snapshot, target = select_target(merged, target)
+        nav = target_nav_html(merged, target)
+    vpcs = snapshot["vpcs"]
+    subnets = snapshot["subnets"]
+    instances = snapshot["instances"]
+    security_groups = snapshot["security_groups"]
+    igws = snapshot["igws"]
+    ecs = snapshot["ecs"]
+    traffic = snapshot["traffic"]
+
+    mode = "Real AWS" if USE_AWS else "LocalStack"
+    collected = datetime.datetime.fromtimestamp(snapshot.get("collected_at") or time.time())
+    if first_collection:
+        # Nothing collected yet: reload until the first snapshot is ready
+        auto_refresh = '<meta http-equiv="refresh" content="2">'
+        snapshot_line = "Collecting inventory&hellip;"
+    else:
+        auto_refresh = ""
+        snapshot_line = f"Snapshot {collected:%Y-%m-%d %H:%M:%S}"
+    total_subnets = len(subnets["public"]) + len(subnets["app"]) + len(subnets["database"])
+    total_instances = len(instances["web"]) + len(instances["app"])
+    total_tasks = len(ecs["tasks"]["web"]) + len(ecs["tasks"]["app"])
+
+    # Build instance cards HTML (a virtual list for large tiers) and per-tier counts
+    web_instances_html = tier_cards_html(snapshot, "web", target, snapshot_id)
+    app_instances_html = tier_cards_html(snapshot, "app", target, snapshot_id)
+    web_summary = tier_summary(snapshot, "web")
+    app_summary = tier_summary(snapshot, "app")
+
+    # ECS services render as a summary line in their tier
+    service_lines = {"web": "", "app": ""}
+    for svc in ecs["services"]:
+        service_lines[svc["tier"]] += (f'<div class="service-line">ECS service <strong>{svc["name"]}</strong>: '
+                                       f'{svc["running"]}/{svc["desired"]} running {svc["launch_type"]}</div>')
+
     # Get VPC info
     vpc = vpcs[0] if vpcs else {"name": "No VPC", "cidr": "N/A", "id": "N/A"}
     igw = igws[0] if igws else {"id": "N/A", "name": "No IGW"}
@@ -248,6 +1222,7 @@ def generate_html():
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    {auto_refresh}
     <title>3-Tier Architecture Dashboard</title>
     <style>
         * {{ box-sizing: border-box; margin: 0; padding: 0; }}
@@ -471,10 +1446,27 @@ def generate_html():
             border-radius: 8px;
             padding: 12px;
         }}
+        .instances-virtual {{ position: relative; height: {3 * (VIRTUAL_CARD_HEIGHT + 10)}px; overflow-y: auto; cursor: default; }}
+        .instances-virtual .instances-grid {{ position: absolute; top: 0; left: 0; right: 0; grid-auto-rows: {VIRTUAL_CARD_HEIGHT}px; }}
+        .instances-virtual .instance-card {{ overflow: hidden; }}
+        .instance-card.loading {{ opacity: 0.4; }}
+        .tier-summary {{ margin-bottom: 10px; font-size: 0.9em; }}
+        .tier-summary .types {{ opacity: 0.8; margin-left: 4px; font-size: 0.85em; }}
         .instance-name {{ font-weight: 600; margin-bottom: 4px; }}
         .instance-id {{ font-family: monospace; font-size: 0.8em; color: rgba(255,255,255,0.7); }}
         .instance-details {{ margin: 8px 0; }}
         .instance-ip {{ font-size: 0.85em; color: rgba(255,255,255,0.8); }}
+        .service-line {{ font-size: 0.85em; margin-bottom: 8px; opacity: 0.9; }}
+        .instance-metric {{
+            display: flex;
+            align-items: center;
+            justify-content: space-between;
+            margin-top: 6px;
+            font-size: 0.75em;
+        }}
+        .metric-label {{ opacity: 0.8; }}
+        .spark polyline {{ fill: none; stroke: currentColor; stroke-width: 1.5; opacity: 0.9; }}
+        .spark-empty {{ opacity: 0.5; font-style: italic; }}
 
         .badge {{
             display: inline-block;
@@ -486,6 +1478,11 @@ def generate_html():
         }}
         .status-running {{ background: #27ae60; }}
         .status-stopped {{ background: #e74c3c; }}
+        .status-active, .status-available {{ background: #27ae60; }}
+        .status-failed {{ background: #e74c3c; }}
+        .health-healthy {{ background: #27ae60; }}
+        .health-unhealthy {{ background: #e74c3c; }}
+        .health-initial, .health-draining {{ background: #f39c12; }}
 
         .subnets-list {{
             display: flex;
@@ -568,6 +1565,8 @@ def generate_html():
     <div class="header">
         <h1>3-Tier Architecture Dashboard</h1>
         <p class="subtitle">AWS Infrastructure Visualization</p>
+        <p class="subtitle">{snapshot_line} &middot; <a href="/history" style="color: #ff9900;">History</a></p>
+        {nav}
         <span class="mode">{mode}</span>
     </div>
 
@@ -584,6 +1583,10 @@ def generate_html():
             <div class="num">{total_instances}</div>
             <div class="label">EC2 Instances</div>
         </div>
+        {f'''<div class="stat-box ec2">
+            <div class="num">{total_tasks}</div>
+            <div class="label">ECS Tasks</div>
+        </div>''' if ecs["clusters"] else ""}
         <div class="stat-box sg">
             <div class="num">{len(security_groups)}</div>
             <div class="label">Security Groups</div>
@@ -618,9 +1621,7 @@ def generate_html():
                 <div class="subnets-list">
                     {"".join(f'<div class="subnet-badge"><div class="name">{s["name"]}</div><div class="cidr">{s["cidr"]}</div></div>' for s in subnets["public"]) or '<span class="empty">No public subnets</span>'}
                 </div>
-                <div style="margin-top:10px;font-size:0.9em;opacity:0.8;">
-                    Note: ALB requires LocalStack Pro. In production, ALB distributes traffic here.
-                </div>
+                {alb_panel_html(traffic)}
             </div>
         </div>
 
@@ -631,12 +1632,12 @@ def generate_html():
             <div class="tier-header">
                 <span class="icon">🖥️</span>
                 <span>WEB TIER - Frontend Servers</span>
-                <span class="count">{len(instances["web"])} instances</span>
+                <span class="count">{web_summary["total"]} instances</span>
             </div>
             <div class="tier-content">
-                <div class="instances-grid">
-                    {web_instances_html or '<span class="empty">No web instances</span>'}
-                </div>
+                {service_lines["web"]}
+                {tier_summary_html(web_summary)}
+                {web_instances_html}
             </div>
         </div>
 
@@ -647,12 +1648,12 @@ def generate_html():
             <div class="tier-header">
                 <span class="icon">⚙️</span>
                 <span>APP TIER - Application Servers</span>
-                <span class="count">{len(instances["app"])} instances</span>
+                <span class="count">{app_summary["total"]} instances</span>
             </div>
             <div class="tier-content">
-                <div class="instances-grid">
-                    {app_instances_html or '<span class="empty">No app instances</span>'}
-                </div>
+                {service_lines["app"]}
+                {tier_summary_html(app_summary)}
+                {app_instances_html}
             </div>
         </div>
 
@@ -669,9 +1670,7 @@ def generate_html():
                 <div class="subnets-list">
                     {"".join(f'<div class="subnet-badge"><div class="name">{s["name"]}</div><div class="cidr">{s["cidr"]}</div></div>' for s in subnets["database"]) or '<span class="empty">No database subnets</span>'}
                 </div>
-                <div style="margin-top:10px;font-size:0.9em;opacity:0.8;">
-                    Note: RDS requires LocalStack Pro. In production, MySQL/PostgreSQL runs here.
-                </div>
+                {rds_panel_html(traffic)}
             </div>
         </div>
     </div>
@@ -918,29 +1917,82 @@ If Primary fails → Automatic failover to Standby (< 60 seconds)</div>
         document.addEventListener('keydown', (e) => {{
             if (e.key === 'Escape') closeModal();
         }});
+{VIRTUAL_LIST_JS}
     </script>
 </body>
 </html>'''
     return html
 
 
+def history_html(rows):
+    """Render the snapshot history page: tier trends and per-snapshot changes."""
+    series = [("web", "Web tier"), ("app", "App tier"), ("healthy_targets", "Healthy targets"),
+              ("subnets", "Subnets"), ("databases", "Databases")]
+    trends = "".join(
+        f'<div class="trend"><span>{label}: <strong>{rows[-1]["summary"].get(key, 0) if rows else 0}</strong></span>'
+        f'{sparkline_svg([r["summary"].get(key, 0) for r in rows], width=240, height=30)}</div>'
+        for key, label in series)
+    table = ""
+    for row in reversed(rows):
+        summary = row["summary"]
+        when = datetime.datetime.fromtimestamp(row["collected_at"])
+        changes = ("" if not (row["added"] or row["changed"] or row["removed"]) else
+                   f'+{row["added"]} ~{row["changed"]} -{row["removed"]}')
+        table += (f'<tr><td><a href="/?snapshot={row["id"]}">{when:%Y-%m-%d %H:%M:%S}</a></td>'
+                  + "".join(f'<td>{summary.get(key, 0)}</td>' for key, _ in series)
+                  + f'<td>{changes}</td></tr>')
+    headings = "".join(f"<th>{label}</th>" for _, label in series)
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>3-Tier Architecture Dashboard - History</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+               background: linear-gradient(135deg, #0f0f23 0%, #1a1a3e 100%); min-height: 100vh;
+               color: #fff; padding: 20px; }}
+        h1 {{ color: #ff9900; margin-bottom: 10px; }}
+        a {{ color: #ff9900; }}
+        .trends {{ display: flex; flex-wrap: wrap; gap: 20px; margin: 20px 0; color: #4ecdc4; }}
+        .trend {{ display: flex; flex-direction: column; gap: 4px; }}
+        .trend span {{ color: #ccc; font-size: 0.9em; }}
+        .spark polyline {{ fill: none; stroke: currentColor; stroke-width: 1.5; }}
+        .spark-empty {{ opacity: 0.5; font-style: italic; }}
+        table {{ border-collapse: collapse; width: 100%; font-size: 0.9em; }}
+        th, td {{ padding: 6px 10px; border-bottom: 1px solid rgba(255,255,255,0.1); text-align: left; }}
+        th {{ color: #888; }}
+    </style>
+</head>
+<body>
+    <h1>Snapshot History</h1>
+    <p><a href="/">&larr; Live dashboard</a> &middot; {len(rows)} snapshot(s)</p>
+    <div class="trends">{trends}</div>
+    <table>
+        <tr><th>Collected</th>{headings}<th>Changes</th></tr>
+        {table}
+    </table>
+</body>
+</html>'''
+
+
 def check_localstack():
     """Check if LocalStack is running."""
+    import urllib.error
+    import urllib.request
     try:
-        result = subprocess.run(
-            ["curl", "-s", f"{LOCALSTACK_ENDPOINT}/_localstack/health"],
-            capture_output=True, text=True, timeout=5
-        )
-        return result.returncode == 0
-    except:
+        with urllib.request.urlopen(f"{LOCALSTACK_ENDPOINT}/_localstack/health", timeout=5):
+            return True
+    except urllib.error.HTTPError:
+        return True  # Reachable; an error status still means it is up
+    except (OSError, ValueError):
         return False
 
 
-def check_aws_credentials():
-    """Check if AWS credentials are configured."""
+def check_aws_credentials(target=None):
+    """Check if AWS credentials are configured (for `target`'s profile)."""
     try:
         result = subprocess.run(
-            ["aws", "sts", "get-caller-identity"],
+            ["aws", *cli_args(target), "sts", "get-caller-identity"],
             capture_output=True, text=True, timeout=10
         )
         return result.returncode == 0
@@ -948,72 +2000,413 @@ def check_aws_credentials():
         return False
 
 
-class DashboardHandler(SimpleHTTPRequestHandler):
+class DashboardHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == "/" or self.path == "/index.html":
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path in ("/", "/index.html") and "snapshot" in query:
+            try:
+                snapshot_id = int(query["snapshot"][0])
+            except ValueError:
+                snapshot_id = None
+            snapshot = stored_snapshot(snapshot_id) if snapshot_id is not None else None
+            if snapshot is None:
+                self.send_error(404, "No such snapshot")
+                return
+            self._send_html(generate_html(snapshot, query.get("target", [None])[0], snapshot_id).encode())
+        elif url.path in ("/", "/index.html"):
+            started = time.perf_counter()
+            with tracing.span("GET /", "http"):
+                snapshot, fresh = current_snapshot()
+                _snapshot_state["latest"] = snapshot
+                with RENDER_SECONDS.time() as render, tracing.span("generate_html", "render"):
+                    html = generate_html(snapshot, query.get("target", [None])[0]).encode()
+            if fresh:
+                timings = list(snapshot["timings"])
+            elif snapshot.get("first_collection"):
+                timings = []
+            else:
+                timings = [("snapshot-age", time.time() - snapshot["collected_at"])]
+            timings += [("render", render.seconds), ("total", time.perf_counter() - started)]
             self.send_response(200)
             self.send_header("Content-type", "text/html")
+            self.send_header("Content-Length", str(len(html)))
+            self.send_header("Server-Timing", server_timing_header(timings))
             self.end_headers()
-            html = generate_html()
-            self.wfile.write(html.encode())
+            self.wfile.write(html)
+        elif url.path == "/metrics":
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == "/api/instances":
+            self._send_instance_page(query)
+        elif url.path == "/api/search":
+            self._send_search(query)
+        elif url.path == "/history":
+            store = snapshot_store()
+            rows = store.history(HISTORY_ROWS) if store else []
+            self._send_html(history_html(rows).encode())
         else:
-            super().do_GET()
+            # Never fall back to serving files: the working directory holds the snapshot DB
+            self.send_error(404, "Not found")
+
+    def _send_instance_page(self, query):
+        """GET /api/instances?tier=web&offset=0&limit=100[&target=...][&snapshot=ID]"""
+        tier = query.get("tier", [""])[0]
+        if tier not in ("web", "app"):
+            self.send_error(400, "tier must be web or app")
+            return
+        try:
+            offset = max(0, int(query.get("offset", ["0"])[0]))
+            limit = min(INSTANCE_PAGE_MAX, max(1, int(query.get("limit", [str(INSTANCE_PAGE_SIZE)])[0])))
+            snapshot_id = int(query["snapshot"][0]) if "snapshot" in query else None
+        except ValueError:
+            self.send_error(400, "offset, limit and snapshot must be integers")
+            return
+        snapshot = stored_snapshot(snapshot_id) if snapshot_id is not None else latest_snapshot()
+        if snapshot is None:
+            self.send_error(404, "No snapshot yet")
+            return
+        inventory, _ = select_target(snapshot, query.get("target", [None])[0])
+        body = json.dumps(instance_page(inventory, tier, offset, limit)).encode()
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_search(self, query):
+        """GET /api/search?q=10.0.11.37[&limit=50]"""
+        text = query.get("q", [""])[0].strip()
+        if not text:
+            self.send_error(400, "q is required")
+            return
+        try:
+            limit = min(SEARCH_LIMIT_MAX, max(1, int(query.get("limit", [str(SEARCH_LIMIT)])[0])))
+        except ValueError:
+            self.send_error(400, "limit must be an integer")
+            return
+        snapshot = latest_snapshot()
+        if snapshot is None:
+            self.send_error(404, "No snapshot yet")
+            return
+        started = time.perf_counter()
+        index = search_index(snapshot)
+        indexed = time.perf_counter()
+        with tracing.span("search", "search"):
+            total, results = index.search(text, limit)
+        searched = time.perf_counter()
+        collected_at = snapshot.get("collected_at")
+        age = None if snapshot.get("first_collection") or collected_at is None else time.time() - collected_at
+        body = json.dumps({
+            "query": text,
+            "total": total,
+            "collected_at": collected_at,
+            "age_seconds": None if age is None else round(age, 1),
+            "collecting": bool(snapshot.get("first_collection")),
+            "results": results,
+        }).encode()
+        timings = [("index", indexed - started), ("search", searched - indexed)]
+        if age is not None:
+            timings.insert(0, ("snapshot-age", age))
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Server-Timing", server_timing_header(timings))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_html(self, html):
+        self.send_response(200)
+        self.send_header("Content-type", "text/html")
+        self.send_header("Content-Length", str(len(html)))
+        self.end_headers()
+        self.wfile.write(html)
 
     def log_message(self, format, *args):
         pass
 
 
+class ReusePortHTTPServer(HTTPServer):
+    """HTTPServer whose port can be bound by several processes at once.
+
+    With SO_REUSEPORT the kernel spreads incoming connections across
+    every process listening on the port.
+    """
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _worker_main(bind, port, snapshot_path, number, trace=None):
+    """Serve pages from the shared snapshot until SIGTERM."""
+    global _shared_snapshot
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl+C
+    signal.signal(signal.SIGTERM, _terminate)
+    from sharedsnapshot import SharedSnapshot
+    _shared_snapshot = SharedSnapshot(snapshot_path)
+    server = ReusePortHTTPServer((bind, port), DashboardHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if trace:
+            tracing.write(f"{trace}.worker{number}")
+
+
+def run_workers(bind, port, workers, refresh=SNAPSHOT_REFRESH, trace=None, startup=None):
+    """Pre-fork `workers` servers on one port and collect for all of them.
+
+    This process is the only collector: it writes a snapshot every
+    `refresh` seconds to a memory-mapped file that every worker reads, and
+    restarts workers that exit. The workers are forked first, so they
+    serve the "collecting" placeholder while `startup()` (the preflight
+    check) runs here; if it returns False the workers are stopped and
+    this returns False. Workers then show the last stored snapshot, when
+    there is one, until the first collection finishes.
+    """
+    from sharedsnapshot import SharedSnapshot
+    snapshot = SharedSnapshot.create()
+    children = {}
+
+    def spawn(number):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _worker_main(bind, port, snapshot.path, number, trace)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = number
+
+    try:
+        for number in range(workers):
+            spawn(number)
+        if startup is not None and not startup():
+            return False
+        if _warm_start["snapshot"] is not None:
+            snapshot.write(_warm_start["snapshot"])
+        next_collect = 0.0
+        while True:
+            if time.monotonic() >= next_collect:
+                try:
+                    snapshot.write(refresh_snapshot())
+                except Exception as e:
+                    print(f"  {Colors.YELLOW}[!]{Colors.END} Collection failed: {e}")
+                next_collect = time.monotonic() + refresh
+            while children:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    break
+                number = children.pop(pid, None)
+                if number is not None:
+                    print(f"  {Colors.YELLOW}[!]{Colors.END} Worker {number} exited (status {status}); restarting")
+                    spawn(number)
+            time.sleep(max(0.0, min(0.5, next_collect - time.monotonic())))
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        snapshot.close(unlink=True)
+
+
+def preflight():
+    """Check LocalStack or the AWS credentials, printing the result.
+
+    Returns False when nothing can be collected. With several targets the
+    credential checks run concurrently.
+    """
+    if USE_AWS:
+        targets = _targets or [None]
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            checked = list(zip(targets, pool.map(check_aws_credentials, targets)))
+        if not any(ok for _, ok in checked):
+            print(f"  Checking AWS credentials... {Colors.RED}NOT CONFIGURED{Colors.END}")
+            print(f"\n  {Colors.YELLOW}Configure AWS credentials first:{Colors.END}")
+            print(f"  aws configure\n")
+            return False
+        print(f"  Checking AWS credentials... {Colors.GREEN}OK{Colors.END}")
+        for target, ok in checked:
+            if not ok:
+                print(f"  {Colors.YELLOW}[!]{Colors.END} No credentials for {target.key}; it will show as empty")
+        return True
+    if not check_localstack():
+        print(f"  Checking LocalStack... {Colors.RED}NOT RUNNING{Colors.END}")
+        print(f"\n  {Colors.YELLOW}Start LocalStack first:{Colors.END}")
+        print(f"  docker-compose up -d\n")
+        return False
+    print(f"  Checking LocalStack... {Colors.GREEN}OK{Colors.END}")
+    return True
+
+
+def open_history():
+    """Open the configured snapshot store and load its last snapshot for a warm start."""
+    import sqlite3
+    db = _store_config["path"]
+    try:
+        store = snapshot_store()
+        store.compact(_store_config["max_age"], _store_config["max_snapshots"])
+        _warm_start["snapshot"] = store.latest()
+    except sqlite3.Error as e:
+        print(f"  {Colors.YELLOW}[!]{Colors.END} Snapshot history disabled ({db}: {e})")
+        _store_config["path"] = None
+    if _warm_start["snapshot"] is not None:
+        age = time.time() - _warm_start["snapshot"]["collected_at"]
+        print(f"  Warm start from {db} (snapshot {age:.0f}s old)")
+
+
 def main():
     global USE_AWS
 
     parser = argparse.ArgumentParser(description="3-Tier Architecture Dashboard")
     parser.add_argument("--aws", action="store_true", help="Use real AWS instead of LocalStack")
     parser.add_argument("--no-browser", action="store_true", help="Don't open browser automatically")
+    parser.add_argument("--trace", metavar="OUT.json", help="Record a Chrome trace-event file, written on exit")
+    parser.add_argument("--bind", default=DEFAULT_BIND, help=f"Address to listen on (default: {DEFAULT_BIND})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Serve from N pre-forked processes sharing the port (SO_REUSEPORT)")
+    parser.add_argument("--refresh", type=float, default=SNAPSHOT_REFRESH,
+                        help=f"Seconds between collections with --workers (default: {SNAPSHOT_REFRESH})")
+    parser.add_argument("--db", default=DEFAULT_DB, metavar="PATH",
+                        help=f"SQLite snapshot history (default: {DEFAULT_DB})")
+    parser.add_argument("--no-db", action="store_true", help="Don't persist snapshots")
+    parser.add_argument("--retention-days", type=float, default=SNAPSHOT_RETENTION_DAYS,
+                        help=f"Drop snapshots older than this (default: {SNAPSHOT_RETENTION_DAYS})")
+    parser.add_argument("--max-snapshots", type=int, default=SNAPSHOT_MAX_ROWS,
+                        help=f"Keep at most this many snapshots (default: {SNAPSHOT_MAX_ROWS})")
+    parser.add_argument("--target", action="append", default=[], metavar="PROFILE@REGION",
+                        help="Collect this profile/region; repeat or comma-separate for several")
+    parser.add_argument("--max-concurrency", type=int, default=AWS_LIMITER_TOTAL,
+                        help=f"AWS CLI calls in flight across all targets (default: {AWS_LIMITER_TOTAL})")
+    parser.add_argument("--per-target-concurrency", type=int, default=AWS_LIMITER_PER_TARGET,
+                        help=f"AWS CLI calls in flight per target (default: {AWS_LIMITER_PER_TARGET})")
     args = parser.parse_args()
 
+    try:
+        _targets[:] = parse_targets(args.target)
+    except ValueError as e:
+        parser.error(f"--target: {e}")
+    if args.max_concurrency < 1 or args.per_target_concurrency < 1:
+        parser.error("concurrency limits must be >= 1")
+    AWS_LIMITER.configure(args.max_concurrency, args.per_target_concurrency)
+
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        parser.error("--workers needs fork() and SO_REUSEPORT (Linux, macOS or BSD)")
+
+    if args.trace:
+        tracing.enable(args.trace)
+
     USE_AWS = args.aws
 
     print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}  3-Tier Architecture Dashboard{Colors.END}")
     print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+    print(f"  Mode: {Colors.YELLOW}Real AWS{Colors.END}" if USE_AWS else f"  Mode: {Colors.CYAN}LocalStack{Colors.END}")
 
-    if USE_AWS:
-        print(f"  Mode: {Colors.YELLOW}Real AWS{Colors.END}")
-        print(f"  Checking AWS credentials... ", end="")
-        if not check_aws_credentials():
-            print(f"{Colors.RED}NOT CONFIGURED{Colors.END}")
-            print(f"\n  {Colors.YELLOW}Configure AWS credentials first:{Colors.END}")
-            print(f"  aws configure\n")
-            sys.exit(1)
-        print(f"{Colors.GREEN}OK{Colors.END}")
-    else:
-        print(f"  Mode: {Colors.CYAN}LocalStack{Colors.END}")
-        print(f"  Checking LocalStack... ", end="")
-        if not check_localstack():
-            print(f"{Colors.RED}NOT RUNNING{Colors.END}")
-            print(f"\n  {Colors.YELLOW}Start LocalStack first:{Colors.END}")
-            print(f"  docker-compose up -d\n")
-            sys.exit(1)
-        print(f"{Colors.GREEN}OK{Colors.END}")
-
-    port = 8080
-    server = HTTPServer(("localhost", port), DashboardHandler)
+    # Listen first: the checks and the first collection run while pages are served
+    port = args.port
+    host = "localhost" if args.bind in ("", "0.0.0.0", "::", "127.0.0.1") else args.bind
+    try:
+        if args.workers > 1:
+            # Fail fast if the port is taken, before forking
+            ReusePortHTTPServer((args.bind, port), DashboardHandler).server_close()
+        else:
+            server = HTTPServer((args.bind, port), DashboardHandler)
+    except OSError as e:
+        print(f"\n  {Colors.RED}[X]{Colors.END} Cannot listen on {args.bind}:{port}: {e}\n")
+        sys.exit(1)
 
     print(f"\n  {Colors.GREEN}Dashboard running at:{Colors.END}")
-    print(f"  {Colors.BOLD}http://localhost:{port}{Colors.END}\n")
+    print(f"  {Colors.BOLD}http://{host}:{port}{Colors.END}\n")
+    if args.workers > 1:
+        print(f"  {args.workers} workers, snapshot refreshed every {args.refresh:g}s\n")
     print(f"  Press Ctrl+C to stop.\n")
 
-    if not args.no_browser:
-        def open_browser():
-            time.sleep(1)
-            webbrowser.open(f"http://localhost:{port}")
-        threading.Thread(target=open_browser, daemon=True).start()
-
+    if not args.no_db:
+        # Set before any fork so --workers processes open the same store for /history
+        _store_config.update(path=args.db, max_age=args.retention_days * 86400,
+                             max_snapshots=args.max_snapshots)
+
+    def start_history():
+        if args.no_db:
+            return None
+        history = threading.Thread(target=open_history, daemon=True)
+        history.start()
+        return history
+
+    def open_browser():
+        if not args.no_browser:
+            import webbrowser
+            webbrowser.open(f"http://{host}:{port}")
+
+    if args.workers > 1:
+        def worker_startup():
+            # Runs in the collector once the workers are serving
+            history = start_history()
+            ok = preflight()
+            if history:
+                history.join()
+            if ok:
+                threading.Thread(target=open_browser, daemon=True).start()
+            return ok
+
+        try:
+            ok = run_workers(args.bind, port, args.workers, args.refresh, args.trace, worker_startup)
+        except KeyboardInterrupt:
+            print(f"\n\n  {Colors.YELLOW}Dashboard stopped.{Colors.END}\n")
+            return
+        if ok is False:
+            sys.exit(1)
+        return
+
+    history = start_history()
+    failed = threading.Event()
+
+    def startup():
+        if not preflight():
+            failed.set()
+            server.shutdown()
+            return
+        if history:
+            history.join()
+        open_browser()
+        try:
+            _warm_start["first"] = refresh_snapshot()
+        except Exception as e:
+            print(f"  {Colors.YELLOW}[!]{Colors.END} First collection failed: {e}")
+
+    _warm_start["collecting"] = threading.Thread(target=startup, name="startup", daemon=True)
+    _warm_start["collecting"].start()
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print(f"\n\n  {Colors.YELLOW}Dashboard stopped.{Colors.END}\n")
-        server.shutdown()
+    finally:
+        server.server_close()
+    if failed.is_set():
+        sys.exit(1)
 
 
 if __name__ == "__main__":
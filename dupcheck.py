@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Near-Duplicate Detection
+==================================================================
+Finds submissions that were probably copied from each other, without
+comparing every pair.
+
+Each submission's .tf files (found the same way run.py finds them,
+including local modules) are stripped of comments and split into tokens.
+Names and literals are replaced by placeholders, so renaming resources or
+changing CIDRs does not hide a copy. Attribute names, block types and
+resource types are kept. Runs of SHINGLE_SIZE tokens ("shingles") that
+also occur in the starter files are dropped, so code everybody got from
+the template doesn't make everyone look alike.
+
+The remaining shingles are summarised by a MinHash signature, computed
+with one-permutation hashing: each shingle is hashed once and lands in
+one of NUM_HASHES bins, and empty bins borrow from their neighbour. The
+fraction of equal bins estimates the Jaccard similarity of two
+submissions. Signatures are split into BANDS bands. Submissions sharing
+any band (locality-sensitive hashing) become candidates, and candidates
+at or above --threshold are grouped into clusters. The cost grows
+linearly with the number of submissions.
+
+Signatures and band buckets live in a SQLite index, so later runs only
+hash new or changed submissions and look up their buckets.
+
+Usage:
+    python dupcheck.py submissions/*                  # Index and report new matches
+    python dupcheck.py --all                          # Report every cluster in the index
+    python dupcheck.py --threshold 0.7 --json cohort2/*
+    python dupcheck.py --index cohort.db --no-baseline submissions/*
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from array import array
+
+from run import strip_comments
+from tfsources import SourceTree
+
+# Enable ANSI colors on Windows
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_INDEX = "dupcheck-index.db"
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+NUM_HASHES = 128
+BANDS = 16  # 8 rows per band: pairs at 0.8 similarity collide with ~99% probability
+MIN_SHINGLES = 30
+EMPTY = (1 << 57) - 1  # Above any bin value (64-bit hash minus the 7 bin bits)
+
+_TOKEN = re.compile(r'"(?:[^"\\\n]|\\.)*"|<<-?[A-Za-z_]\w*|[A-Za-z_][\w-]*|\d+(?:\.\d+)?'
+                    r'|==|!=|<=|>=|&&|\|\||=>|\.\.\.|[{}\[\]().,=?:!<>+\-*/%]')
+# Kept as-is; any other bare identifier is a name chosen by the author
+KEYWORDS = frozenset("""
+    resource data variable output module provider locals terraform var local each count self
+    path true false null for in if
+""".split())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    shingles INTEGER NOT NULL,
+    signature BLOB,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    submission INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, submission)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS buckets_submission ON buckets(submission);
+"""
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def normalize(text):
+    """Return the canonical token list of uncommented HCL `text`."""
+    tokens = _TOKEN.findall(text)
+    out = []
+    for i, tok in enumerate(tokens):
+        first = tok[0]
+        if first == '"':
+            # The type label of a resource or data block is kept
+            out.append(tok if i and tokens[i - 1] in ("resource", "data") else "$str")
+        elif first.isdigit():
+            out.append("$num")
+        elif first == "<":
+            out.append("<<")
+        elif first.isalpha() or first == "_":
+            following = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if tok in KEYWORDS or tok.startswith("aws_") or following in ("=", "{", "("):
+                out.append(tok)  # Keyword, resource type, attribute, block or function name
+            else:
+                out.append("$id")
+        else:
+            out.append(tok)
+    return out
+
+
+def shingle_hashes(tokens, size=SHINGLE_SIZE):
+    """Stable 64-bit hashes of every run of `size` tokens."""
+    return {int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode(), digest_size=8).digest(), "big")
+            for i in range(len(tokens) - size + 1)}
+
+
+def minhash(hashes, num_hashes=NUM_HASHES):
+    """One-permutation MinHash signature of a set of 64-bit hashes."""
+    bits = num_hashes.bit_length() - 1
+    mask = num_hashes - 1
+    signature = [EMPTY] * num_hashes
+    for h in hashes:
+        b, v = h & mask, h >> bits
+        if v < signature[b]:
+            signature[b] = v
+    # Densify: an empty bin takes the next filled bin's value, offset by the
+    # distance so it only matches a bin that borrowed the same way
+    filled = [i for i, v in enumerate(signature) if v != EMPTY]
+    if filled and len(filled) < num_hashes:
+        for i in range(num_hashes):
+            if signature[i] == EMPTY:
+                j = next((k for k in filled if k > i), filled[0])
+                distance = (j - i) % num_hashes
+                signature[i] = (signature[j] + distance * 0x9E3779B97F4A7C15) & EMPTY
+    return signature
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def band_keys(signature, bands=BANDS):
+    """(band, bucket) pairs for LSH; buckets fit a signed SQLite integer."""
+    rows = len(signature) // bands
+    for band in range(bands):
+        chunk = array("Q", signature[band * rows:(band + 1) * rows]).tobytes()
+        yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=7).digest(), "big")
+
+
+def baseline_shingles(directory):
+    """Shingles of the starter files in `directory`, with their commented-out code uncommented."""
+    shingles = set()
+    if not directory:
+        return shingles
+    tree = SourceTree(directory)
+    for rel in tree.files:
+        text = tree.read(rel) or ""
+        text = re.sub(r'(?m)^([ \t]*)(?:#|//) ?', r'\1', text)
+        shingles |= shingle_hashes(normalize(text))
+    return shingles
+
+
+def submission_tokens(path):
+    """Canonical tokens of every .tf file in a submission, in discovery order."""
+    tree = SourceTree(path)
+    tokens = []
+    for rel in tree.files:
+        tokens += normalize(strip_comments(tree.read(rel) or ""))
+    return tokens
+
+
+class DuplicateIndex:
+    """Persistent MinHash signatures and LSH buckets in one SQLite file."""
+
+    def __init__(self, path=DEFAULT_INDEX, baseline=None):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+        self.baseline = baseline_shingles(baseline)
+        settings = {"shingle_size": str(SHINGLE_SIZE), "num_hashes": str(NUM_HASHES), "bands": str(BANDS),
+                    "baseline": hashlib.sha256(array("Q", sorted(self.baseline)).tobytes()).hexdigest()}
+        stored = dict(self.db.execute("SELECT key, value FROM meta"))
+        if stored and stored != settings:
+            raise ValueError(f"{path} was built with other settings or starter files; use a new --index")
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", settings.items())
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def add(self, path):
+        """Index one submission; returns (id, status) with status "new", "changed" or "unchanged"."""
+        path = os.path.abspath(path)
+        tokens = submission_tokens(path)
+        digest = hashlib.sha256("\0".join(tokens).encode()).hexdigest()
+        row = self.db.execute("SELECT id, digest FROM submissions WHERE path = ?", (path,)).fetchone()
+        if row and row[1] == digest:
+            return row[0], "unchanged"
+        shingles = shingle_hashes(tokens) - self.baseline
+        signature = minhash(shingles) if len(shingles) >= MIN_SHINGLES else None
+        blob = array("Q", signature).tobytes() if signature else None
+        with self.db:
+            if row:
+                sid = row[0]
+                self.db.execute("UPDATE submissions SET digest = ?, shingles = ?, signature = ?, indexed_at = ? "
+                                "WHERE id = ?", (digest, len(shingles), blob, time.time(), sid))
+                self.db.execute("DELETE FROM buckets WHERE submission = ?", (sid,))
+            else:
+                sid = self.db.execute("INSERT INTO submissions (path, digest, shingles, signature, indexed_at) "
+                                      "VALUES (?, ?, ?, ?, ?)",
+                                      (path, digest, len(shingles), blob, time.time())).lastrowid
+            if signature:
+                self.db.executemany("INSERT OR IGNORE INTO buckets (band, bucket, submission) VALUES (?, ?, ?)",
+                                    ((band, bucket, sid) for band, bucket in band_keys(signature)))
+        return sid, "changed" if row else "new"
+
+    def _signature(self, sid, cache):
+        if sid not in cache:
+            blob = self.db.execute("SELECT signature FROM submissions WHERE id = ?", (sid,)).fetchone()[0]
+            cache[sid] = array("Q", blob).tolist() if blob else None
+        return cache[sid]
+
+    def _candidate_pairs(self, ids=None):
+        """Pairs sharing at least one bucket; all of them, or those involving `ids`."""
+        pairs = set()
+        if ids is None:
+            rows = self.db.execute("SELECT group_concat(submission) FROM buckets "
+                                   "GROUP BY band, bucket HAVING COUNT(*) > 1")
+            for (members,) in rows:
+                members = sorted(int(m) for m in members.split(","))
+                pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+            return pairs
+        for sid in ids:
+            rows = self.db.execute("SELECT DISTINCT other.submission FROM buckets mine "
+                                   "JOIN buckets other ON other.band = mine.band AND other.bucket = mine.bucket "
+                                   "WHERE mine.submission = ? AND other.submission != ?", (sid, sid))
+            pairs.update((min(sid, other), max(sid, other)) for (other,) in rows)
+        return pairs
+
+    def clusters(self, ids=None, threshold=DEFAULT_THRESHOLD):
+        """Near-duplicate clusters as lists of {"path", "matches": [(path, similarity)]}."""
+        cache = {}
+        parent = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        matches = {}
+        for a, b in self._candidate_pairs(ids):
+            sa, sb = self._signature(a, cache), self._signature(b, cache)
+            if sa is None or sb is None:
+                continue
+            score = similarity(sa, sb)
+            if score >= threshold:
+                parent[find(a)] = find(b)
+                matches.setdefault(a, []).append((b, score))
+                matches.setdefault(b, []).append((a, score))
+
+        groups = {}
+        for sid in matches:
+            groups.setdefault(find(sid), []).append(sid)
+        paths = dict(self.db.execute("SELECT id, path FROM submissions"))
+        result = []
+        for members in groups.values():
+            result.append([{"path": paths[sid],
+                            "matches": sorted(((paths[o], round(s, 3)) for o, s in matches[sid]),
+                                              key=lambda m: -m[1])}
+                           for sid in sorted(members, key=lambda s: paths[s])])
+        result.sort(key=lambda c: (-len(c), -max(m[1] for member in c for m in member["matches"])))
+        return result
+
+    def too_small(self, ids=None):
+        """Submissions with too little code beyond the starter files to compare."""
+        rows = self.db.execute("SELECT id, path FROM submissions WHERE signature IS NULL ORDER BY path")
+        return [path for sid, path in rows if ids is None or sid in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate submissions with MinHash/LSH")
+    parser.add_argument("paths", nargs="*", help="Submission directories to index and check")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"Signature index (default: {DEFAULT_INDEX})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Estimated similarity reported as a near-duplicate (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--baseline", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Directory with the starter .tf files (default: this challenge)")
+    parser.add_argument("--no-baseline", action="store_true", help="Don't discount starter code")
+    parser.add_argument("--all", action="store_true", help="Report every cluster in the index")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if not args.paths and not args.all:
+        parser.error("give submission directories, or --all")
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be between 0 and 1")
+
+    try:
+        return _check(args)
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) went away; keep the exit-time flush quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+def _check(args):
+    """Index `args.paths` and report near-duplicates."""
+    if not args.json:
+        print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  Near-Duplicate Submissions{Colors.END}")
+        print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    try:
+        index = DuplicateIndex(args.index, None if args.no_baseline else args.baseline)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"  {Colors.RED}[X]{Colors.END} {e}\n")
+        return 1
+
+    try:
+        start = time.perf_counter()
+        ids = set()
+        statuses = {}
+        for path in args.paths:
+            if not os.path.isdir(path):
+                if not args.json:
+                    print(f"  {Colors.YELLOW}[!]{Colors.END} Not a directory, skipped: {path}")
+                continue
+            sid, status = index.add(path)
+            ids.add(sid)
+            statuses[os.path.abspath(path)] = status
+        scope = None if args.all else ids
+        clusters = index.clusters(scope, args.threshold)
+        small = index.too_small(scope)
+        # Submissions too small to compare have no signature, so don't count them as indexed
+        for path in index.too_small(ids):
+            statuses.pop(path, None)
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
+        for status in statuses.values():
+            counts[status] += 1
+        elapsed = time.perf_counter() - start
+
+        if args.json:
+            print(json.dumps({"clusters": clusters, "too_small": small, "indexed": counts,
+                              "index_size": len(index)}, indent=2))
+            return 0
+
+        print(f"  Indexed {len(statuses)} submission(s): {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged']} unchanged ({elapsed:.2f}s, index holds {len(index)})\n")
+        if not clusters:
+            print(f"  {Colors.GREEN}[OK]{Colors.END} No near-duplicates at similarity >= {args.threshold}")
+        for number, cluster in enumerate(clusters, 1):
+            print(f"  {Colors.RED}[X]{Colors.END} {Colors.BOLD}Cluster {number}{Colors.END} "
+                  f"({len(cluster)} submissions)")
+            for member in cluster:
+                best = ", ".join(f"{os.path.basename(p) or p} {s:.2f}" for p, s in member["matches"][:3])
+                print(f"      {member['path']}  ~ {best}")
+        for path in small:
+            print(f"  {Colors.YELLOW}[!]{Colors.END} Too little code beyond the starter files to compare: {path}")
+        print()
+        return 1 if clusters else 0
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Fake AWS Endpoint
+=================================================
+A stand-in for LocalStack that speaks enough of the EC2, ELBv2 and RDS
+Query APIs for `run.py --verify` and the dashboard, with deterministic
+inventories of any size and injectable latency, throttling and 501
+responses. Other services (ECS, CloudWatch) answer 501, as on LocalStack
+Community.
+
+The bench command starts a server in-process and measures --verify time,
+dashboard time-to-first-byte and concurrent dashboard throughput against
+it. Both need the AWS CLI installed.
+
+Usage:
+    python fakeaws.py serve --port 4599 --instances 50000 --security-groups 5000
+    python fakeaws.py serve --latency 50 --throttle 0.05 --unsupported elbv2,rds
+    python fakeaws.py bench --instances 5000 --clients 8 --json results.json
+"""
+
+import io
+import sys
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import threading
+import contextlib
+import http.client
+from xml.sax.saxutils import escape
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_PORT = 4599
+ACCOUNT_ID = "000000000000"
+REGION = "us-east-1"
+MAX_TARGETS_PER_GROUP = 1000  # ELBv2 limit
+
+EC2_NS = "http://ec2.amazonaws.com/doc/2016-11-15/"
+ELBV2_NS = "http://elasticloadbalancing.amazonaws.com/doc/2015-12-01/"
+RDS_NS = "http://rds.amazonaws.com/doc/2014-10-31/"
+
+SG_TIERS = [
+    ("alb", 80, "0.0.0.0/0"),
+    ("web", 80, None),
+    ("app", 8080, None),
+    ("db", 3306, None),
+]
+SUBNET_TIERS = ["public", "private-app", "private-db"]
+
+# Query API action -> service
+ACTIONS = {
+    "DescribeVpcs": "ec2",
+    "DescribeSubnets": "ec2",
+    "DescribeInstances": "ec2",
+    "DescribeSecurityGroups": "ec2",
+    "DescribeInternetGateways": "ec2",
+    "DescribeLoadBalancers": "elbv2",
+    "DescribeTargetGroups": "elbv2",
+    "DescribeListeners": "elbv2",
+    "DescribeTargetHealth": "elbv2",
+    "DescribeDBInstances": "rds",
+}
+
+# List members that are not named "item" (EC2) or "member" (ELBv2)
+_LIST_ITEM_NAMES = {"DBInstances": "DBInstance"}
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+class QueryError(Exception):
+    """An AWS API error returned to the client."""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _element(name, value, item):
+    if isinstance(value, dict):
+        inner = "".join(_element(k, v, item) for k, v in value.items() if v is not None)
+    elif isinstance(value, list):
+        child = _LIST_ITEM_NAMES.get(name, item)
+        inner = "".join(_element(child, v, item) for v in value)
+    elif isinstance(value, bool):
+        inner = "true" if value else "false"
+    else:
+        inner = escape(str(value))
+    return f"<{name}>{inner}</{name}>"
+
+
+def _ec2_tags(**tags):
+    return [{"key": k, "value": v} for k, v in tags.items()]
+
+
+class Inventory:
+    """A deterministic 3-tier inventory of a given size.
+
+    Resources are built from their index on each request, so a 50k
+    instance inventory costs nothing until it is described.
+    """
+
+    def __init__(self, instances=4, security_groups=4, subnets=6, target_groups=2,
+                 load_balancers=1, databases=1, project="bench"):
+        self.counts = {
+            "instances": instances,
+            "security_groups": security_groups,
+            "subnets": subnets,
+            "target_groups": target_groups,
+            "load_balancers": load_balancers,
+            "databases": databases,
+        }
+        self.project = project
+        self.vpc_id = "vpc-0b3e0000000000001"
+
+    # -- EC2 ------------------------------------------------------------------
+
+    def vpcs(self):
+        return [
+            {"vpcId": "vpc-0defa000000000000", "state": "available", "cidrBlock": "172.31.0.0/16",
+             "isDefault": True, "tagSet": []},
+            {"vpcId": self.vpc_id, "state": "available", "cidrBlock": "10.0.0.0/16",
+             "isDefault": False, "tagSet": _ec2_tags(Name=f"{self.project}-vpc")},
+        ]
+
+    def subnet(self, i):
+        tier = SUBNET_TIERS[i % len(SUBNET_TIERS)]
+        return {
+            "subnetId": f"subnet-{i:017x}",
+            "vpcId": self.vpc_id,
+            "cidrBlock": f"10.{i // 256 % 256}.{i % 256}.0/24",
+            "availabilityZone": f"{REGION}{'ab'[i // len(SUBNET_TIERS) % 2]}",
+            "state": "available",
+            "tagSet": _ec2_tags(Name=f"{self.project}-{tier}-{i + 1}"),
+        }
+
+    def instance(self, i):
+        tier = "web" if i % 2 == 0 else "app"
+        state = ("stopped", 80) if i % 50 == 49 else ("running", 16)
+        return {
+            "instanceId": f"i-{i:017x}",
+            "imageId": "ami-0123456789abcdef0",
+            "instanceState": {"code": state[1], "name": state[0]},
+            "privateIpAddress": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "instanceType": "t3.micro",
+            "placement": {"availabilityZone": f"{REGION}{'ab'[i // 2 % 2]}"},
+            "vpcId": self.vpc_id,
+            "subnetId": f"subnet-{(1 + i % 2):017x}",
+            "tagSet": _ec2_tags(Name=f"{self.project}-{tier}-{i + 1}", Tier=tier),
+        }
+
+    def security_group(self, i):
+        if i < 0:
+            return {"ownerId": ACCOUNT_ID, "groupId": "sg-0defa000000000000", "groupName": "default",
+                    "groupDescription": "default VPC security group", "vpcId": self.vpc_id,
+                    "ipPermissions": [], "ipPermissionsEgress": [], "tagSet": []}
+        tier, port, cidr = SG_TIERS[i % len(SG_TIERS)]
+        suffix = "" if i < len(SG_TIERS) else f"-{i // len(SG_TIERS)}"
+        source = {"ipRanges": [{"cidrIp": cidr}]} if cidr else {
+            "groups": [{"userId": ACCOUNT_ID, "groupId": f"sg-{max(i - 1, 0):017x}"}]}
+        return {
+            "ownerId": ACCOUNT_ID,
+            "groupId": f"sg-{i:017x}",
+            "groupName": f"{self.project}-{tier}-sg{suffix}",
+            "groupDescription": f"{tier} tier",
+            "vpcId": self.vpc_id,
+            "ipPermissions": [dict({"ipProtocol": "tcp", "fromPort": port, "toPort": port}, **source)],
+            "ipPermissionsEgress": [{"ipProtocol": "-1", "ipRanges": [{"cidrIp": "0.0.0.0/0"}]}],
+            "tagSet": _ec2_tags(Name=f"{self.project}-{tier}-sg{suffix}"),
+        }
+
+    def internet_gateways(self):
+        return [{"internetGatewayId": "igw-0b3e0000000000001",
+                 "attachmentSet": [{"vpcId": self.vpc_id, "state": "available"}],
+                 "tagSet": _ec2_tags(Name=f"{self.project}-igw")}]
+
+    # -- ELBv2 ----------------------------------------------------------------
+
+    def load_balancer_arn(self, i):
+        return f"arn:aws:elasticloadbalancing:{REGION}:{ACCOUNT_ID}:loadbalancer/app/{self.project}-alb-{i}/{i:016x}"
+
+    def target_group_arn(self, j):
+        return f"arn:aws:elasticloadbalancing:{REGION}:{ACCOUNT_ID}:targetgroup/{self.project}-tg-{j}/{j:016x}"
+
+    def load_balancer(self, i):
+        return {
+            "LoadBalancerArn": self.load_balancer_arn(i),
+            "DNSName": f"{self.project}-alb-{i}-{1000 + i}.{REGION}.elb.amazonaws.com",
+            "LoadBalancerName": f"{self.project}-alb" + (f"-{i}" if i else ""),
+            "Scheme": "internet-facing",
+            "VpcId": self.vpc_id,
+            "State": {"Code": "active"},
+            "Type": "application",
+        }
+
+    def target_group(self, j):
+        tier = "web" if j % 2 == 0 else "app"
+        return {
+            "TargetGroupArn": self.target_group_arn(j),
+            "TargetGroupName": f"{self.project}-{tier}-tg" + (f"-{j}" if j > 1 else ""),
+            "Protocol": "HTTP",
+            "Port": 80 if tier == "web" else 8080,
+            "VpcId": self.vpc_id,
+            "HealthCheckPath": "/health",
+            "LoadBalancerArns": [self.load_balancer_arn(j % max(self.counts["load_balancers"], 1))],
+        }
+
+    def listeners(self, lb_index):
+        groups = range(lb_index, self.counts["target_groups"], max(self.counts["load_balancers"], 1))
+        first = next(iter(groups), None)
+        if first is None:
+            return []
+        return [{
+            "ListenerArn": self.load_balancer_arn(lb_index).replace(":loadbalancer/", ":listener/") + "/80",
+            "LoadBalancerArn": self.load_balancer_arn(lb_index),
+            "Port": 80,
+            "Protocol": "HTTP",
+            "DefaultActions": [{"Type": "forward", "TargetGroupArn": self.target_group_arn(first)}],
+        }]
+
+    def target_health(self, j):
+        groups = max(self.counts["target_groups"], 1)
+        out = []
+        for i in range(j, self.counts["instances"], groups):
+            if len(out) >= MAX_TARGETS_PER_GROUP:
+                break
+            healthy = i % 7 != 6
+            health = {"State": "healthy"} if healthy else {
+                "State": "unhealthy", "Reason": "Target.Timeout",
+                "Description": "Request timed out"}
+            out.append({"Target": {"Id": f"i-{i:017x}", "Port": 80}, "HealthCheckPort": "80",
+                        "TargetHealth": health})
+        return out
+
+    # -- RDS ------------------------------------------------------------------
+
+    def database(self, i):
+        return {
+            "DBInstanceIdentifier": f"{self.project}-db" + (f"-{i}" if i else ""),
+            "DBInstanceClass": "db.t3.micro",
+            "Engine": "mysql",
+            "EngineVersion": "8.0.35",
+            "DBInstanceStatus": "available",
+            "MultiAZ": i % 2 == 0,
+            "AllocatedStorage": 20,
+            "Endpoint": {"Address": f"{self.project}-db-{i}.abcdefghijkl.{REGION}.rds.amazonaws.com",
+                         "Port": 3306},
+        }
+
+
+def _ec2_filters(params):
+    """Parse Filter.N.Name / Filter.N.Value.M into {name: set(values)}."""
+    filters = {}
+    n = 1
+    while f"Filter.{n}.Name" in params:
+        values = set()
+        m = 1
+        while f"Filter.{n}.Value.{m}" in params:
+            values.add(params[f"Filter.{n}.Value.{m}"])
+            m += 1
+        filters[params[f"Filter.{n}.Name"]] = values
+        n += 1
+    return filters
+
+
+def _id_list(params, prefix):
+    ids = []
+    n = 1
+    while f"{prefix}.{n}" in params:
+        ids.append(params[f"{prefix}.{n}"])
+        n += 1
+    return set(ids)
+
+
+def _matches(record, filters):
+    for name, values in filters.items():
+        if name == "vpc-id":
+            actual = {record.get("vpcId")} | {a.get("vpcId") for a in record.get("attachmentSet", [])}
+        elif name == "instance-state-name":
+            actual = {record.get("instanceState", {}).get("name")}
+        elif name == "group-name":
+            actual = {record.get("groupName")}
+        elif name == "subnet-id":
+            actual = {record.get("subnetId")}
+        elif name.startswith("tag:"):
+            actual = {t["value"] for t in record.get("tagSet", []) if t["key"] == name[4:]}
+        else:
+            raise QueryError(400, "InvalidParameterValue", f"The filter '{name}' is invalid")
+        if not actual & values:
+            return False
+    return True
+
+
+def _page(records, params, size_param, token_param):
+    """Slice records for one page; return (page, next_token or None)."""
+    start = int(params.get(token_param) or 0)
+    size = int(params.get(size_param) or 0) or len(records)
+    end = start + size
+    return records[start:end], (str(end) if end < len(records) else None)
+
+
+class FakeAWS:
+    """Request handling, fault injection and stats for one inventory."""
+
+    def __init__(self, inventory, latency=0.0, jitter=0.0, throttle=0.0, unsupported=(), seed=0):
+        self.inventory = inventory
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.unsupported = set(unsupported)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, action, status):
+        key = f"{action or '?'} {status}"
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self.lock:
+                extra = self.random.uniform(0, self.jitter)
+            time.sleep(self.latency + extra)
+
+    def should_throttle(self):
+        if not self.throttle:
+            return False
+        with self.lock:
+            return self.random.random() < self.throttle
+
+    # -- responses ------------------------------------------------------------
+
+    def respond(self, action, params):
+        """Return (status, xml) for one Query API request."""
+        service = ACTIONS.get(action)
+        if service is None or service in self.unsupported:
+            return 501, self._error_xml(service, "InternalFailure",
+                                        f"API for service '{service or 'unknown'}' not yet implemented "
+                                        f"or pro feature")
+        if self.should_throttle():
+            if service == "ec2":
+                return 503, self._error_xml(service, "RequestLimitExceeded", "Request limit exceeded.")
+            return 400, self._error_xml(service, "Throttling", "Rate exceeded")
+        try:
+            body = getattr(self, f"_{action}")(params)
+        except QueryError as e:
+            return e.status, self._error_xml(service, e.code, str(e))
+        return 200, self._wrap(service, action, body)
+
+    def _wrap(self, service, action, body):
+        request_id = f"{self.random.getrandbits(64):016x}"
+        if service == "ec2":
+            inner = "".join(_element(k, v, "item") for k, v in body.items() if v is not None)
+            return (f'<?xml version="1.0" encoding="UTF-8"?>\n<{action}Response xmlns="{EC2_NS}">'
+                    f'<requestId>{request_id}</requestId>{inner}</{action}Response>')
+        ns = ELBV2_NS if service == "elbv2" else RDS_NS
+        inner = "".join(_element(k, v, "member") for k, v in body.items() if v is not None)
+        return (f'<?xml version="1.0" encoding="UTF-8"?>\n<{action}Response xmlns="{ns}">'
+                f'<{action}Result>{inner}</{action}Result>'
+                f'<ResponseMetadata><RequestId>{request_id}</RequestId></ResponseMetadata>'
+                f'</{action}Response>')
+
+    def _error_xml(self, service, code, message):
+        if service == "ec2":
+            return (f'<?xml version="1.0" encoding="UTF-8"?>\n<Response><Errors><Error>'
+                    f'<Code>{code}</Code><Message>{escape(message)}</Message></Error></Errors>'
+                    f'<RequestID>0</RequestID></Response>')
+        return (f'<?xml version="1.0" encoding="UTF-8"?>\n<ErrorResponse><Error><Type>Sender</Type>'
+                f'<Code>{code}</Code><Message>{escape(message)}</Message></Error>'
+                f'<RequestId>0</RequestId></ErrorResponse>')
+
+    def _filtered(self, records, params):
+        filters = _ec2_filters(params)
+        return [r for r in records if _matches(r, filters)] if filters else list(records)
+
+    def _DescribeVpcs(self, params):
+        return {"vpcSet": self._filtered(self.inventory.vpcs(), params)}
+
+    def _DescribeSubnets(self, params):
+        inv = self.inventory
+        records = self._filtered((inv.subnet(i) for i in range(inv.counts["subnets"])), params)
+        page, token = _page(records, params, "MaxResults", "NextToken")
+        return {"subnetSet": page, "nextToken": token}
+
+    def _DescribeInstances(self, params):
+        inv = self.inventory
+        ids = _id_list(params, "InstanceId")
+        records = (inv.instance(i) for i in range(inv.counts["instances"]))
+        records = self._filtered((r for r in records if not ids or r["instanceId"] in ids), params)
+        page, token = _page(records, params, "MaxResults", "NextToken")
+        reservations = [{"reservationId": f"r-{r['instanceId'][2:]}", "ownerId": ACCOUNT_ID,
+                         "groupSet": [], "instancesSet": [r]} for r in page]
+        return {"reservationSet": reservations, "nextToken": token}
+
+    def _DescribeSecurityGroups(self, params):
+        inv = self.inventory
+        records = (inv.security_group(i) for i in range(-1, inv.counts["security_groups"]))
+        records = self._filtered(records, params)
+        page, token = _page(records, params, "MaxResults", "NextToken")
+        return {"securityGroupInfo": page, "nextToken": token}
+
+    def _DescribeInternetGateways(self, params):
+        return {"internetGatewaySet": self._filtered(self.inventory.internet_gateways(), params)}
+
+    def _DescribeLoadBalancers(self, params):
+        inv = self.inventory
+        records = [inv.load_balancer(i) for i in range(inv.counts["load_balancers"])]
+        page, marker = _page(records, params, "PageSize", "Marker")
+        return {"LoadBalancers": page, "NextMarker": marker}
+
+    def _DescribeTargetGroups(self, params):
+        inv = self.inventory
+        records = [inv.target_group(j) for j in range(inv.counts["target_groups"])]
+        if params.get("LoadBalancerArn"):
+            records = [r for r in records if params["LoadBalancerArn"] in r["LoadBalancerArns"]]
+        page, marker = _page(records, params, "PageSize", "Marker")
+        return {"TargetGroups": page, "NextMarker": marker}
+
+    def _DescribeListeners(self, params):
+        inv = self.inventory
+        arn = params.get("LoadBalancerArn")
+        for i in range(inv.counts["load_balancers"]):
+            if inv.load_balancer_arn(i) == arn:
+                return {"Listeners": inv.listeners(i)}
+        raise QueryError(400, "LoadBalancerNotFound", f"Load balancer '{arn}' not found")
+
+    def _DescribeTargetHealth(self, params):
+        inv = self.inventory
+        arn = params.get("TargetGroupArn")
+        for j in range(inv.counts["target_groups"]):
+            if inv.target_group_arn(j) == arn:
+                return {"TargetHealthDescriptions": inv.target_health(j)}
+        raise QueryError(400, "TargetGroupNotFound", f"Target group '{arn}' not found")
+
+    def _DescribeDBInstances(self, params):
+        inv = self.inventory
+        records = [inv.database(i) for i in range(inv.counts["databases"])]
+        if params.get("DBInstanceIdentifier"):
+            records = [r for r in records if r["DBInstanceIdentifier"] == params["DBInstanceIdentifier"]]
+            if not records:
+                raise QueryError(404, "DBInstanceNotFound", f"DBInstance {params['DBInstanceIdentifier']} not found")
+        page, marker = _page(records, params, "MaxRecords", "Marker")
+        return {"DBInstances": page, "Marker": marker}
+
+
+class FakeAWSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/_localstack/health"):
+            services = {s: ("disabled" if s in self.server.fake.unsupported else "running")
+                        for s in ("ec2", "elbv2", "rds")}
+            self._send(200, "application/json", json.dumps({"services": services}))
+        else:
+            self._send(404, "text/plain", "not found")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", errors="replace")
+        params = {k: v[0] for k, v in parse_qs(body, keep_blank_values=True).items()}
+        action = params.get("Action")
+        fake = self.server.fake
+        fake.delay()
+        status, xml = fake.respond(action, params)
+        fake.record(action, status)
+        self._send(status, "text/xml", xml)
+
+    def _send(self, status, content_type, text):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(fake, host="127.0.0.1", port=0):
+    """Serve `fake` on a background thread; return the server."""
+    server = ThreadingHTTPServer((host, port), FakeAWSHandler)
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _time_to_first_byte(port, path="/"):
+    """Return (ttfb, total) seconds for one GET against the dashboard."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    try:
+        start = time.perf_counter()
+        conn.request("GET", path)
+        response = conn.getresponse()
+        ttfb = time.perf_counter() - start
+        response.read()
+        return ttfb, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def bench(fake, endpoint, repeat, clients, duration):
+    """Measure --verify, dashboard TTFB and concurrent dashboard throughput."""
+    import run
+    import dashboard
+
+    run.LOCALSTACK_ENDPOINT = endpoint
+    dashboard.LOCALSTACK_ENDPOINT = endpoint
+    results = {"inventory": dict(fake.inventory.counts)}
+
+    # run.py --verify
+    config = run.load_config()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run.verify_localstack_resources(config)
+        times.append(time.perf_counter() - start)
+    results["verify_seconds"] = {"best": min(times), "median": _percentile(times, 50)}
+    print(f"  verify           best {min(times) * 1000:9.1f} ms   median {_percentile(times, 50) * 1000:9.1f} ms")
+
+    # Dashboard time-to-first-byte, with collector caches cleared (cold) and warm
+    server = dashboard.HTTPServer(("127.0.0.1", 0), dashboard.DashboardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        cold, warm = [], []
+        for _ in range(repeat):
+            dashboard.get_alb_and_rds.cache_clear()
+            dashboard._metrics_cache.clear()
+            cold.append(_time_to_first_byte(port)[0])
+            warm.append(_time_to_first_byte(port)[0])
+        results["dashboard_ttfb_seconds"] = {
+            "cold": {"best": min(cold), "median": _percentile(cold, 50)},
+            "warm": {"best": min(warm), "median": _percentile(warm, 50)},
+        }
+        print(f"  dashboard TTFB   cold {_percentile(cold, 50) * 1000:9.1f} ms   "
+              f"warm {_percentile(warm, 50) * 1000:9.1f} ms   (median)")
+
+        # Concurrent clients for a fixed duration
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client():
+            while time.perf_counter() < deadline:
+                try:
+                    _, total = _time_to_first_byte(port)
+                except (OSError, http.client.HTTPException):
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append(total)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        results["dashboard_throughput"] = {
+            "clients": clients,
+            "seconds": elapsed,
+            "requests": len(latencies),
+            "errors": errors[0],
+            "requests_per_second": len(latencies) / elapsed,
+            "latency_seconds": {"p50": _percentile(latencies, 50), "p90": _percentile(latencies, 90),
+                                "p99": _percentile(latencies, 99)},
+        }
+        print(f"  dashboard load   {clients} clients: {len(latencies) / elapsed:7.2f} req/s   "
+              f"p50 {_percentile(latencies, 50) * 1000:.0f} ms   p99 {_percentile(latencies, 99) * 1000:.0f} ms   "
+              f"errors {errors[0]}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results["fake_requests"] = dict(sorted(fake.stats.items()))
+    return results
+
+
+def _add_inventory_args(parser):
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--security-groups", type=int, default=4)
+    parser.add_argument("--subnets", type=int, default=6)
+    parser.add_argument("--target-groups", type=int, default=2)
+    parser.add_argument("--load-balancers", type=int, default=1)
+    parser.add_argument("--databases", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this (ms)")
+    parser.add_argument("--throttle", type=float, default=0.0,
+                        help="Fraction of requests answered with a throttling error")
+    parser.add_argument("--unsupported", default="",
+                        help="Comma-separated services answered with 501 (e.g. elbv2,rds)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def _fake_from_args(args):
+    inventory = Inventory(instances=args.instances, security_groups=args.security_groups,
+                          subnets=args.subnets, target_groups=args.target_groups,
+                          load_balancers=args.load_balancers, databases=args.databases)
+    unsupported = [s.strip() for s in args.unsupported.split(",") if s.strip()]
+    return FakeAWS(inventory, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                   throttle=args.throttle, unsupported=unsupported, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake EC2/ELBv2/RDS endpoint for benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Run the fake endpoint")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    _add_inventory_args(serve_parser)
+    bench_parser = sub.add_parser("bench", help="Benchmark --verify and the dashboard against it")
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--clients", type=int, default=4, help="Concurrent dashboard clients")
+    bench_parser.add_argument("--duration", type=float, default=10.0, help="Seconds of concurrent load")
+    bench_parser.add_argument("--json", metavar="FILE", help="Write results as JSON")
+    _add_inventory_args(bench_parser)
+    args = parser.parse_args()
+
+    fake = _fake_from_args(args)
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Fake AWS Endpoint{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+    print("  Inventory: " + ", ".join(f"{v} {k.replace('_', ' ')}" for k, v in fake.inventory.counts.items()))
+
+    if args.command == "serve":
+        server = ThreadingHTTPServer((args.host, args.port), FakeAWSHandler)
+        server.daemon_threads = True
+        server.fake = fake
+        print(f"  Listening on {Colors.BOLD}http://{args.host}:{args.port}{Colors.END}\n")
+        print(f"  Press Ctrl+C to stop.\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n  {Colors.YELLOW}Stopped.{Colors.END}")
+            for key, count in sorted(fake.stats.items()):
+                print(f"    {count:>8}  {key}")
+            print()
+        return 0
+
+    if shutil.which("aws") is None:
+        print(f"  {Colors.RED}[X]{Colors.END} AWS CLI not installed (run.py and the dashboard shell out to it)\n")
+        return 1
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+    server = start_server(fake)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"  Serving on {endpoint}\n")
+    try:
+        results = bench(fake, endpoint, args.repeat, args.clients, args.duration)
+    finally:
+        server.shutdown()
+        server.server_close()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n  Results written to {args.json}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
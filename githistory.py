@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Git History Grading
+=============================================================
+Scores every commit of a submission's git history without checking
+anything out, to show how a student's score moved over time.
+
+Commits come from one `git log`, and trees and blobs are streamed through
+a single `git cat-file --batch` process. A commit is scored by the set of
+.tf/.tfvars blob IDs it contains: if that set matches a state that was
+already graded (an unchanged commit, or a revert), the earlier result is
+reused. Otherwise the blobs are hard-linked from a content-addressed
+scratch store into a temporary directory and graded with run.grade().
+Each blob is read from git once. Subtrees are cached by tree ID, so
+unchanged directories are not read again. `terraform validate` is not run.
+
+Usage:
+    python githistory.py                       # Timeline of HEAD in the cwd
+    python githistory.py submissions/alice main --json
+    python run.py --history                    # Same, from the checker
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import namedtuple
+
+# Files that can change a score: sources, and variable files (use_ecs)
+SCORED_SUFFIXES = (".tf", ".tfvars", ".tfvars.json")
+SKIPPED_DIRS = (".terraform", ".git")
+
+# One commit on the timeline; unchanged is True when its scored files match the parent's
+HistoryEntry = namedtuple("HistoryEntry", "commit date author subject score max_score unchanged files")
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+class GitError(Exception):
+    """Raised when git fails or `root` is not inside a repository."""
+
+
+def _start_error(root):
+    """GitError for git failing to start in `root`: a bad directory, or no git."""
+    if not os.path.isdir(root):
+        return GitError(f"{root} is not a directory")
+    return GitError("git not installed")
+
+
+def _git(root, *args):
+    try:
+        result = subprocess.run(["git", *args], cwd=root, capture_output=True, check=True)
+    except (FileNotFoundError, NotADirectoryError):
+        raise _start_error(root)
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode(errors="replace").strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+class CatFile:
+    """One long-lived `git cat-file --batch` process."""
+
+    def __init__(self, root):
+        try:
+            self.proc = subprocess.Popen(["git", "cat-file", "--batch"], cwd=root,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except (FileNotFoundError, NotADirectoryError):
+            raise _start_error(root)
+
+    def read(self, oid):
+        """Return (type, content) of an object."""
+        self.proc.stdin.write(oid.encode() + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            raise GitError(f"cannot read object {oid}")
+        size = int(header[2])
+        data = self.proc.stdout.read(size + 1)[:size]  # Content, then a newline
+        return header[1].decode(), data
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+class HistoryGrader:
+    """Grades the commits of one repository, sharing blobs and results."""
+
+    def __init__(self, root="."):
+        self.root = os.path.abspath(root)
+        self.prefix = _git(self.root, "rev-parse", "--show-prefix").decode().strip()
+        self.cat = CatFile(self.root)
+        self.scratch = tempfile.mkdtemp(prefix="tf-history-")
+        self._trees = {}    # tree id -> {path: blob id} of scored files below it
+        self._blobs = set()  # blob ids already in the scratch store
+        self._results = {}  # frozenset of (path, blob id) -> score
+        self.graded = 0
+
+    def close(self):
+        self.cat.close()
+        shutil.rmtree(self.scratch, ignore_errors=True)
+
+    def _entries(self, tree):
+        """Yield (mode, name, object id) for each entry of a tree object."""
+        kind, data = self.cat.read(tree)
+        if kind != "tree":
+            raise GitError(f"{tree} is a {kind}, not a tree")
+        pos, oid_len = 0, len(tree) // 2  # 20 bytes for SHA-1 repositories, 32 for SHA-256
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            yield data[pos:space], data[space + 1:nul].decode(errors="surrogateescape"), \
+                data[nul + 1:nul + 1 + oid_len].hex()
+            pos = nul + 1 + oid_len
+
+    def _files(self, tree):
+        """Scored files below `tree` as {relative path: blob id}."""
+        files = self._trees.get(tree)
+        if files is not None:
+            return files
+        files = {}
+        for mode, name, oid in self._entries(tree):
+            if mode == b"40000":
+                if name not in SKIPPED_DIRS and not name.startswith("."):
+                    for sub, blob in self._files(oid).items():
+                        files[f"{name}/{sub}"] = blob
+            elif mode in (b"100644", b"100755") and name.endswith(SCORED_SUFFIXES):
+                files[name] = oid
+        self._trees[tree] = files
+        return files
+
+    def _subtree(self, tree):
+        """Walk from the commit's root tree down to the submission directory."""
+        for part in self.prefix.strip("/").split("/") if self.prefix else ():
+            tree = next((oid for mode, name, oid in self._entries(tree)
+                         if mode == b"40000" and name == part), None)
+            if tree is None:
+                return None
+        return tree
+
+    def _grade_state(self, files):
+        """Materialise `files` from the blob store and grade them."""
+        import run
+        store = os.path.join(self.scratch, "blobs")
+        os.makedirs(store, exist_ok=True)
+        for blob in files.values():
+            if blob not in self._blobs:
+                _, data = self.cat.read(blob)
+                with open(os.path.join(store, blob), "wb") as f:
+                    f.write(data)
+                self._blobs.add(blob)
+        workdir = tempfile.mkdtemp(dir=self.scratch)
+        try:
+            for path, blob in files.items():
+                target = os.path.join(workdir, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.link(os.path.join(store, blob), target)
+            self.graded += 1
+            return run.grade(workdir, validate=False).score
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def commits(self, rev="HEAD"):
+        """(commit, tree, unix time, author, subject) from oldest to newest."""
+        if rev.startswith("-"):
+            raise GitError(f"invalid revision {rev!r}")
+        out = _git(self.root, "log", "--reverse", "--topo-order",
+                   "--format=%H%x00%T%x00%ct%x00%an%x00%s", rev, "--")
+        for line in out.decode(errors="replace").splitlines():
+            commit, tree, date, author, subject = line.split("\0", 4)
+            yield commit, tree, int(date), author, subject
+
+    def grade(self, rev="HEAD"):
+        """Yield a HistoryEntry per commit, oldest first."""
+        import run
+        previous = None
+        for commit, tree, date, author, subject in self.commits(rev):
+            subtree = self._subtree(tree)
+            files = self._files(subtree) if subtree else {}
+            state = frozenset(files.items())
+            score = self._results.get(state)
+            if score is None:
+                score = self._results[state] = self._grade_state(files)
+            yield HistoryEntry(commit, date, author, subject, score, run.MAX_SCORE, state == previous, len(files))
+            previous = state
+
+
+def grade_history(root=".", rev="HEAD"):
+    """Return the score timeline of `rev` in the repository holding `root`."""
+    grader = HistoryGrader(root)
+    try:
+        return list(grader.grade(rev))
+    finally:
+        grader.close()
+
+
+def print_timeline(entries, elapsed=None, graded=None):
+    """Print one line per commit with the score and its change."""
+    previous = None
+    for entry in entries:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.date))
+        if previous is None or entry.score == previous:
+            change, color = "", Colors.END
+        elif entry.score > previous:
+            change, color = f"+{entry.score - previous}", Colors.GREEN
+        else:
+            change, color = f"{entry.score - previous}", Colors.RED
+        note = f" {Colors.YELLOW}(no .tf changes){Colors.END}" if entry.unchanged else ""
+        print(f"  {entry.commit[:8]}  {when}  {color}{entry.score:>3}/{entry.max_score} {change:>4}{Colors.END}  "
+              f"{entry.subject[:50]}{note}")
+        previous = entry.score
+    if entries:
+        best = max(entries, key=lambda e: e.score)
+        print(f"\n  {len(entries)} commit(s), final score {Colors.BOLD}{entries[-1].score}/{entries[-1].max_score}"
+              f"{Colors.END}, best {best.score} at {best.commit[:8]}")
+    if graded is not None:
+        print(f"  {graded} distinct state(s) graded" + (f" in {elapsed:.2f}s" if elapsed is not None else ""))
+    print()
+
+
+def run_history(root=".", rev="HEAD", as_json=False):
+    """Grade and print the history of `rev`; returns an exit code."""
+    start = time.perf_counter()
+    try:
+        grader = HistoryGrader(root)
+    except GitError as e:
+        print(f"  {Colors.RED}[X]{Colors.END} {e}\n")
+        return 1
+    try:
+        entries = list(grader.grade(rev))
+    except GitError as e:
+        print(f"  {Colors.RED}[X]{Colors.END} {e}\n")
+        return 1
+    finally:
+        grader.close()
+    if as_json:
+        print(json.dumps([entry._asdict() for entry in entries], indent=2))
+        return 0
+    print_timeline(entries, time.perf_counter() - start, grader.graded)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every commit of a submission's git history")
+    parser.add_argument("root", nargs="?", default=".", help="Submission directory inside a git repository")
+    parser.add_argument("rev", nargs="?", default="HEAD", help="Revision whose history is graded (default: HEAD)")
+    parser.add_argument("--json", action="store_true", help="Print the timeline as JSON")
+    args = parser.parse_args()
+
+    if not args.json:
+        print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  Score History{Colors.END}")
+        print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+    return run_history(args.root, args.rev, args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Shared Grading Queue
+==============================================================
+A work queue that lets graders on several machines share one list of
+submissions. Workers claim jobs with an expiring lease and renew it while
+grading; when a worker dies its lease runs out and another worker takes
+the job. Each result is written once: the first one recorded for a job
+wins and later ones are discarded, so a job graded again after a lease
+expired still has exactly one result.
+
+Two backends, both on storage every node can reach:
+    sqlite:FILE   One SQLite database (rollback journal, so it works on a
+                  shared volume with working file locks).
+    DIRECTORY     Plain files. Jobs, leases and results are created with
+                  O_EXCL or link(), which only one node can win.
+
+Leases use wall-clock time, so node clocks must agree to well within the
+lease length (NTP is enough). Each claim counts as an attempt; a job that
+has used --max-attempts claims is marked failed with its last error.
+
+Usage:
+    python gradequeue.py add sqlite:/shared/queue.db submissions/*
+    python run.py --work sqlite:/shared/queue.db --workers 8   # On each node
+    python gradequeue.py work /shared/queue --exit-when-empty
+    python gradequeue.py status sqlite:/shared/queue.db
+    python gradequeue.py results sqlite:/shared/queue.db --json > results.json
+"""
+
+import os
+import sys
+import json
+import time
+import importlib
+import random
+import signal
+import socket
+import hashlib
+import sqlite3
+import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Enable ANSI colors on Windows
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_LEASE = 60
+DEFAULT_MAX_ATTEMPTS = 5
+POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 5.0
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# token is the attempt number the lease was claimed with
+Lease = namedtuple("Lease", ["job_id", "path", "var_files", "validate", "token"])
+
+
+def job_id(path):
+    """Jobs are keyed by absolute submission path, so adding twice is a no-op."""
+    return hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:20]
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    var_files TEXT NOT NULL,
+    validate INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    added_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, lease_expires);
+"""
+
+
+class SQLiteQueue:
+    """Jobs as rows in one SQLite file; claims run in BEGIN IMMEDIATE."""
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit; transactions are opened explicitly. WAL needs shared
+        # memory between processes, which a network volume doesn't give.
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = DELETE")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def _transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def add(self, paths, var_files=(), validate=False):
+        """Queue submission directories; returns how many were new."""
+        now = time.time()
+        rows = [(job_id(p), os.path.abspath(p), json.dumps(list(var_files)), int(validate), now)
+                for p in paths]
+        with self._lock:
+            db = self._transaction()
+            try:
+                before = db.total_changes
+                db.executemany("INSERT OR IGNORE INTO jobs (id, path, var_files, validate, added_at) "
+                               "VALUES (?, ?, ?, ?, ?)", rows)
+                added = db.total_changes - before
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, worker, count=1, lease=DEFAULT_LEASE):
+        """Lease up to `count` pending or expired jobs to `worker`."""
+        now = time.time()
+        claimed = []
+        with self._lock:
+            db = self._transaction()
+            try:
+                # Jobs whose last claim ran out after the final attempt have failed
+                db.execute("UPDATE jobs SET state = 'failed', finished_at = ?, "
+                           "error = COALESCE(error, 'lease expired (worker stopped or crashed)') "
+                           "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                           (now, now, self.max_attempts))
+                rows = db.execute("SELECT id, path, var_files, validate, attempts FROM jobs "
+                                  "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                                  "ORDER BY attempts, added_at LIMIT ?", (now, count)).fetchall()
+                for jid, path, var_files, validate, attempts in rows:
+                    db.execute("UPDATE jobs SET state = 'leased', attempts = ?, worker = ?, lease_expires = ? "
+                               "WHERE id = ?", (attempts + 1, worker, now + lease, jid))
+                    claimed.append(Lease(jid, path, json.loads(var_files), bool(validate), attempts + 1))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def renew(self, lease, worker, seconds=DEFAULT_LEASE):
+        """Extend a lease; False if the job was re-claimed or finished meanwhile."""
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND state = 'leased' AND attempts = ?",
+                (time.time() + seconds, lease.job_id, lease.token))
+        return cursor.rowcount == 1
+
+    def complete(self, lease, worker, result):
+        """Record a result unless the job already has one; True if recorded."""
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET state = 'done', result = ?, worker = ?, finished_at = ?, error = NULL "
+                "WHERE id = ? AND state IN ('pending', 'leased')",
+                (json.dumps(result), worker, time.time(), lease.job_id))
+        return cursor.rowcount == 1
+
+    def fail(self, lease, worker, error):
+        """Give a job back after an error; it fails for good after max attempts."""
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, finished_at = CASE WHEN attempts >= ? THEN ? END, lease_expires = NULL "
+                "WHERE id = ? AND state = 'leased' AND attempts = ?",
+                (self.max_attempts, error, self.max_attempts, time.time(), lease.job_id, lease.token))
+        return cursor.rowcount == 1
+
+    def status(self):
+        """Job counts by state; leases that ran out count as pending."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT CASE WHEN state = 'leased' AND lease_expires < ? THEN 'pending' ELSE state END, "
+                "COUNT(*) FROM jobs GROUP BY 1", (time.time(),)).fetchall()
+        counts.update(rows)
+        return counts
+
+    def results(self):
+        """Yield one dict per job: path, state, attempts, worker, error, result."""
+        with self._lock:
+            rows = self.db.execute("SELECT path, state, attempts, worker, error, result "
+                                   "FROM jobs ORDER BY path").fetchall()
+        for path, state, attempts, worker, error, result in rows:
+            yield {"path": path, "state": state, "attempts": attempts, "worker": worker,
+                   "error": error, "result": json.loads(result) if result else None}
+
+
+class LeaseFileQueue:
+    """Jobs as files in a shared directory.
+
+    jobs/ID.json      the submission, written once
+    leases/ID.N       attempt N; whoever creates it (O_EXCL) holds the job
+    results/ID.json   the result, linked into place so only one is kept
+    failed/ID.json    written when the last attempt fails
+    """
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        for sub in ("jobs", "leases", "results", "failed", "tmp"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+
+    def close(self):
+        pass
+
+    def _file(self, sub, name):
+        return os.path.join(self.path, sub, name)
+
+    def _publish(self, sub, name, data):
+        """Atomically create sub/name with `data`; False if it already exists."""
+        tmp = self._file("tmp", f"{name}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        try:
+            os.link(tmp, self._file(sub, name))
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp)
+
+    def _read(self, sub, name):
+        try:
+            with open(self._file(sub, name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_lease(self, jid, attempt, default_lease):
+        lease = self._read("leases", f"{jid}.{attempt}")
+        if lease is None:
+            # Just created and not written yet, or unreadable: age it from its mtime
+            try:
+                mtime = os.stat(self._file("leases", f"{jid}.{attempt}")).st_mtime
+            except OSError:
+                return {"expires": 0}
+            return {"expires": mtime + default_lease}
+        return lease
+
+    def _write_lease(self, jid, attempt, data):
+        tmp = self._file("tmp", f"{jid}.{attempt}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._file("leases", f"{jid}.{attempt}"))
+
+    def _superseded(self, lease):
+        return os.path.exists(self._file("leases", f"{lease.job_id}.{lease.token + 1}"))
+
+    def _finished(self):
+        return {name[:-5] for sub in ("results", "failed") for name in os.listdir(os.path.join(self.path, sub))}
+
+    def _attempts(self):
+        attempts = {}
+        for name in os.listdir(os.path.join(self.path, "leases")):
+            jid, _, attempt = name.rpartition(".")
+            if attempt.isdigit():
+                attempts[jid] = max(attempts.get(jid, 0), int(attempt))
+        return attempts
+
+    def add(self, paths, var_files=(), validate=False):
+        added = 0
+        for path in paths:
+            job = {"path": os.path.abspath(path), "var_files": list(var_files),
+                   "validate": bool(validate), "added_at": time.time()}
+            added += self._publish("jobs", f"{job_id(path)}.json", job)
+        return added
+
+    def claim(self, worker, count=1, lease=DEFAULT_LEASE):
+        now = time.time()
+        finished = self._finished()
+        attempts = self._attempts()
+        candidates = [name[:-5] for name in os.listdir(os.path.join(self.path, "jobs"))
+                      if name.endswith(".json") and name[:-5] not in finished]
+        # Fresh jobs first; shuffled so nodes don't all race for the same file
+        random.shuffle(candidates)
+        candidates.sort(key=lambda jid: attempts.get(jid, 0))
+        claimed = []
+        for jid in candidates:
+            if len(claimed) >= count:
+                break
+            attempt = attempts.get(jid, 0)
+            if attempt:
+                current = self._read_lease(jid, attempt, lease)
+                if current.get("expires", 0) >= now and not current.get("released"):
+                    continue
+                if attempt >= self.max_attempts:
+                    self._publish("failed", f"{jid}.json", {
+                        "attempts": attempt, "worker": current.get("worker"), "finished_at": now,
+                        "error": current.get("error") or "lease expired (worker stopped or crashed)"})
+                    continue
+            try:
+                fd = os.open(self._file("leases", f"{jid}.{attempt + 1}"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue  # Another worker got it first
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"worker": worker, "expires": now + lease}, f)
+            job = self._read("jobs", f"{jid}.json")
+            if job is None or os.path.exists(self._file("results", f"{jid}.json")):
+                continue  # Finished between the listing and the claim
+            claimed.append(Lease(jid, job["path"], job["var_files"], job["validate"], attempt + 1))
+        return claimed
+
+    def renew(self, lease, worker, seconds=DEFAULT_LEASE):
+        if self._superseded(lease) or os.path.exists(self._file("results", f"{lease.job_id}.json")):
+            return False
+        self._write_lease(lease.job_id, lease.token, {"worker": worker, "expires": time.time() + seconds})
+        return True
+
+    def complete(self, lease, worker, result):
+        return self._publish("results", f"{lease.job_id}.json",
+                             {"worker": worker, "attempts": lease.token,
+                              "finished_at": time.time(), "result": result})
+
+    def fail(self, lease, worker, error):
+        if self._superseded(lease):
+            return False
+        if lease.token >= self.max_attempts:
+            self._publish("failed", f"{lease.job_id}.json", {
+                "attempts": lease.token, "worker": worker, "finished_at": time.time(), "error": error})
+        self._write_lease(lease.job_id, lease.token,
+                          {"worker": worker, "expires": 0, "released": True, "error": error})
+        return True
+
+    def status(self):
+        now = time.time()
+        results = {name[:-5] for name in os.listdir(os.path.join(self.path, "results"))}
+        failed = {name[:-5] for name in os.listdir(os.path.join(self.path, "failed"))} - results
+        attempts = self._attempts()
+        counts = {"pending": 0, "leased": 0, "done": len(results), "failed": len(failed)}
+        for name in os.listdir(os.path.join(self.path, "jobs")):
+            jid = name[:-5]
+            if jid in results or jid in failed:
+                continue
+            attempt = attempts.get(jid, 0)
+            current = self._read_lease(jid, attempt, DEFAULT_LEASE) if attempt else {"expires": 0}
+            live = current.get("expires", 0) >= now and not current.get("released")
+            counts["leased" if live else "pending"] += 1
+        return counts
+
+    def results(self):
+        attempts = self._attempts()
+        rows = []
+        for name in os.listdir(os.path.join(self.path, "jobs")):
+            jid = name[:-5]
+            job = self._read("jobs", name) or {}
+            done = self._read("results", name)
+            failed = None if done else self._read("failed", name)
+            record = done or failed or {}
+            rows.append({"path": job.get("path"),
+                         "state": "done" if done else "failed" if failed else "pending",
+                         "attempts": record.get("attempts", attempts.get(jid, 0)),
+                         "worker": record.get("worker"), "error": record.get("error"),
+                         "result": record.get("result")})
+        yield from sorted(rows, key=lambda row: row["path"] or "")
+
+
+def open_queue(spec, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """sqlite:FILE (or a .db/.sqlite file) or a directory of lease files."""
+    if spec.startswith("sqlite:"):
+        return SQLiteQueue(spec[len("sqlite:"):], max_attempts)
+    if spec.endswith((".db", ".sqlite")):
+        return SQLiteQueue(spec, max_attempts)
+    return LeaseFileQueue(spec, max_attempts)
+
+
+def _grade(path, var_files, validate):
+    """Grade one submission in a pool worker; returns GradeResult.to_dict()."""
+    import run  # Imported once per worker process, then reused
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"submission not found: {path}")
+    return run.grade(path, var_files, validate=validate).to_dict()
+
+
+def _warm_worker():
+    """Import run.py in a pool worker so the first claimed job does not pay for it."""
+    importlib.import_module("run")
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def work(spec, workers=None, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS,
+         exit_when_empty=False, name=None):
+    """Grade jobs from the queue at `spec` until Ctrl+C, SIGTERM or (optionally) it is empty."""
+    queue = open_queue(spec, max_attempts)
+    workers = workers or os.cpu_count() or 1
+    name = name or default_worker_name()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    for future in [pool.submit(_warm_worker) for _ in range(workers)]:
+        future.result()
+    signal.signal(signal.SIGTERM, _terminate)
+
+    in_flight = {}  # future -> Lease
+    lock = threading.Lock()
+    stopping = threading.Event()
+
+    def heartbeat():
+        while not stopping.wait(lease / 3):
+            with lock:
+                leases = list(in_flight.values())
+            for held in leases:
+                try:
+                    queue.renew(held, name, lease)
+                except (OSError, sqlite3.Error):
+                    pass  # Retried on the next beat; the lease still has time left
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    print(f"  {Colors.GREEN}[OK]{Colors.END} Worker {Colors.BOLD}{name}{Colors.END} grading from {spec}")
+    print(f"      {workers} process(es), {lease}s leases, {max_attempts} attempts per job")
+    print(f"\n  Press Ctrl+C to stop.\n")
+
+    graded = failed = 0
+    poll = POLL_INTERVAL
+    try:
+        while True:
+            free = workers - len(in_flight)
+            claimed = queue.claim(name, free, lease) if free else []
+            with lock:
+                for held in claimed:
+                    in_flight[pool.submit(_grade, held.path, held.var_files, held.validate)] = held
+            if not in_flight:
+                if exit_when_empty:
+                    counts = queue.status()
+                    if not counts["pending"] and not counts["leased"]:
+                        break
+                time.sleep(poll * random.uniform(0.5, 1.5))
+                poll = min(poll * 2, MAX_POLL_INTERVAL)
+                continue
+            poll = POLL_INTERVAL
+            done, _ = wait(list(in_flight), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                with lock:
+                    held = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    queue.fail(held, name, f"{type(e).__name__}: {e}")
+                    print(f"  {Colors.RED}[X]{Colors.END} {held.path}: {e} (attempt {held.token})")
+                    continue
+                graded += 1
+                if queue.complete(held, name, result):
+                    print(f"  {Colors.GREEN}[OK]{Colors.END} {held.path}: {result['score']}/{result['max_score']}")
+                else:
+                    print(f"  {Colors.YELLOW}[!]{Colors.END} {held.path}: already recorded by another worker")
+    except KeyboardInterrupt:
+        print(f"\n  {Colors.YELLOW}Stopping; returning {len(in_flight)} job(s) to the queue.{Colors.END}")
+        with lock:
+            for held in in_flight.values():
+                queue.fail(held, name, "worker stopped before finishing")
+            in_flight.clear()
+    finally:
+        stopping.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        queue.close()
+
+    print(f"\n  Graded {graded}, errors {failed}.\n")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared grading queue for several grading nodes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add_parser = sub.add_parser("add", help="Queue submission directories")
+    add_parser.add_argument("queue", help="sqlite:FILE or a shared directory")
+    add_parser.add_argument("paths", nargs="+", help="Submission directories")
+    add_parser.add_argument("--var-file", action="append", default=[],
+                            help="Extra .tfvars file used to evaluate variables (repeatable)")
+    add_parser.add_argument("--validate", action="store_true", help="Also run terraform validate")
+    work_parser = sub.add_parser("work", help="Grade jobs from the queue")
+    work_parser.add_argument("queue", help="sqlite:FILE or a shared directory")
+    work_parser.add_argument("--workers", type=int, default=None, help="Grading processes (default: CPU count)")
+    work_parser.add_argument("--lease", type=float, default=DEFAULT_LEASE,
+                             help=f"Seconds a claim lasts without a renewal (default: {DEFAULT_LEASE})")
+    work_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                             help=f"Claims per job before it is marked failed (default: {DEFAULT_MAX_ATTEMPTS})")
+    work_parser.add_argument("--exit-when-empty", action="store_true",
+                             help="Stop once no job is pending or leased")
+    work_parser.add_argument("--name", help="Worker name recorded with results (default: HOST:PID)")
+    status_parser = sub.add_parser("status", help="Show job counts")
+    status_parser.add_argument("queue", help="sqlite:FILE or a shared directory")
+    results_parser = sub.add_parser("results", help="List results")
+    results_parser.add_argument("queue", help="sqlite:FILE or a shared directory")
+    results_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "results" and args.json:
+        queue = open_queue(args.queue)
+        json.dump(list(queue.results()), sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Shared Grading Queue{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    if args.command == "work":
+        if (args.workers is not None and args.workers < 1) or args.lease <= 0 or args.max_attempts < 1:
+            parser.error("--workers, --lease and --max-attempts must be positive")
+        return work(args.queue, args.workers, args.lease, args.max_attempts, args.exit_when_empty, args.name)
+
+    queue = open_queue(args.queue)
+    if args.command == "add":
+        missing = [p for p in args.paths if not os.path.isdir(p)]
+        for path in missing:
+            print(f"  {Colors.YELLOW}[!]{Colors.END} Not a directory, skipped: {path}")
+        paths = [p for p in args.paths if p not in missing]
+        added = queue.add(paths, args.var_file, args.validate)
+        print(f"  {Colors.GREEN}[OK]{Colors.END} Queued {added} new submission(s) "
+              f"({len(paths) - added} already queued)\n")
+    elif args.command == "status":
+        counts = queue.status()
+        for state, color in (("pending", Colors.YELLOW), ("leased", Colors.CYAN),
+                             ("done", Colors.GREEN), ("failed", Colors.RED)):
+            print(f"  {color}{state:<8}{Colors.END} {counts[state]:>6}")
+        print()
+    else:
+        for row in queue.results():
+            if row["state"] == "done":
+                result = row["result"]
+                print(f"  {Colors.GREEN}[OK]{Colors.END} {result['score']:>3}/{result['max_score']}  {row['path']}")
+            elif row["state"] == "failed":
+                print(f"  {Colors.RED}[X]{Colors.END} failed   {row['path']}: {row['error']}")
+            else:
+                print(f"  {Colors.YELLOW}[!]{Colors.END} pending  {row['path']}")
+        print()
+    queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
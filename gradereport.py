@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Machine-Readable Reports
+==================================================================
+Writers behind `run.py --format json` and `run.py --format junit`, so CI
+can read the results without parsing colored text.
+
+Results are written as they complete and the stream is flushed after
+each one: a section as soon as it is scored, a --verify target as soon
+as its AWS calls return. A CI log or a pipe sees them straight away
+rather than when the whole run ends. Durations are seconds measured with
+time.perf_counter(), a monotonic clock.
+
+json writes one JSON object per line (JSON Lines), told apart by "type":
+    section        title, points, max_points, seconds, checks [{name, passed, seconds}]
+    validation     valid, message, seconds (or "plan" with resources, terraform_version)
+    result         root, path, use_ecs, score, max_score, complete, seconds
+    verify         target, name, query, status (ok/warn/fail/skip), message, details, seconds
+    verify_result  ok, seconds
+    error          message
+
+junit writes a <testsuite> per section, validation or --verify target
+with a <testcase> per check, and a final "Total Score" suite that fails
+unless the score is 100.
+
+Usage:
+    python run.py --format json | jq -c 'select(.type == "section")'
+    python run.py --format junit > results.xml
+    python run.py --verify --format junit > verify.xml
+"""
+
+import sys
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+FORMATS = ("text", "json", "junit")
+
+
+class JsonLinesReport:
+    """Writes each result as one JSON object per line."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def _write(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    def section(self, section):
+        self._write({"type": "section", "title": section.title, "points": section.points,
+                     "max_points": section.max_points, "seconds": section.seconds,
+                     "checks": [{"name": c.name, "passed": c.passed, "seconds": c.seconds}
+                                for c in section.checks]})
+
+    def result(self, result):
+        data = result.to_dict()
+        if result.plan is not None:
+            self._write({"type": "plan", **data["plan"]})
+        else:
+            self._write({"type": "validation", **data["validation"]})
+        self._write({"type": "result", **{key: data[key] for key in
+                                          ("root", "path", "use_ecs", "score", "max_score", "complete", "seconds")}})
+
+    def verify_target(self, target, checks, timings):
+        for check in checks:
+            self._write({"type": "verify", "target": target, "name": check.name, "query": check.query,
+                         "status": check.status, "message": check.message, "details": check.details,
+                         "seconds": timings.get(check.query)})
+
+    def verify_result(self, ok, seconds):
+        self._write({"type": "verify_result", "ok": ok, "seconds": seconds})
+
+    def error(self, message):
+        self._write({"type": "error", "message": message})
+
+
+def _time(seconds):
+    return "" if seconds is None else f' time="{seconds:.6f}"'
+
+
+class JUnitReport:
+    """Writes JUnit XML, one <testsuite> at a time."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def _write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _suite(self, name, cases, seconds=None, properties=()):
+        """Write a testsuite; `cases` are (name, classname, seconds, outcome, message, output).
+
+        outcome is "pass", "failure" or "skipped".
+        """
+        failures = sum(1 for case in cases if case[3] == "failure")
+        skipped = sum(1 for case in cases if case[3] == "skipped")
+        lines = [f'  <testsuite name={quoteattr(name)} tests="{len(cases)}" failures="{failures}" '
+                 f'errors="0" skipped="{skipped}"{_time(seconds)}>']
+        if properties:
+            lines.append("    <properties>")
+            lines += [f'      <property name={quoteattr(key)} value={quoteattr(str(value))}/>'
+                      for key, value in properties]
+            lines.append("    </properties>")
+        for case_name, classname, case_seconds, outcome, message, output in cases:
+            head = f'    <testcase name={quoteattr(case_name)} classname={quoteattr(classname)}{_time(case_seconds)}'
+            body = []
+            if outcome == "failure":
+                body.append(f'      <failure message={quoteattr(message or case_name)}/>')
+            elif outcome == "skipped":
+                body.append(f'      <skipped message={quoteattr(message or "")}/>')
+            if output:
+                body.append(f'      <system-out>{escape(output)}</system-out>')
+            lines += [head + ">", *body, "    </testcase>"] if body else [head + "/>"]
+        lines.append("  </testsuite>")
+        self._write("\n".join(lines) + "\n")
+
+    def begin(self):
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites name="terraform-3tier">\n')
+
+    def end(self):
+        self._write("</testsuites>\n")
+
+    def section(self, section):
+        cases = [(check.name, section.title, check.seconds, "pass" if check.passed else "failure", None, None)
+                 for check in section.checks]
+        self._suite(section.title, cases, section.seconds,
+                    [("points", section.points), ("max_points", section.max_points)])
+
+    def result(self, result):
+        if result.plan is not None:
+            count, version = result.plan
+            self._suite("Plan", [("planned resources", "Plan", None, "pass", None,
+                                  f"{count} planned resource instance(s) (Terraform {version or 'unknown'})")])
+        else:
+            valid, message = result.validation
+            outcome = {True: "pass", False: "failure"}.get(valid, "skipped")
+            self._suite("Syntax Validation", [("terraform validate", "Syntax Validation", result.validation_seconds,
+                                               outcome, message, message if valid else None)],
+                        result.validation_seconds)
+        score = f"Score {result.score}/{sum(s.max_points for s in result.sections)}"
+        self._suite("Total Score", [("challenge complete", "Total Score", result.seconds,
+                                     "pass" if result.complete else "failure", score, score)],
+                    result.seconds, [("score", result.score), ("path", result.path_name)])
+
+    def verify_target(self, target, checks, timings):
+        name = f"verify {target}" if target else "verify"
+        outcomes = {"ok": "pass", "skip": "skipped"}
+        cases = [(check.name, name, timings.get(check.query), outcomes.get(check.status, "failure"),
+                  check.message, "\n".join([check.message, *check.details]))
+                 for check in checks]
+        self._suite(name, cases, max(timings.values(), default=None))
+
+    def verify_result(self, ok, seconds):
+        pass
+
+    def error(self, message):
+        self._suite("run.py", [("error", "run.py", None, "failure", message, None)])
+
+
+def open_report(fmt, stream=None):
+    """Return the writer for `fmt` ("json" or "junit")."""
+    if fmt == "json":
+        return JsonLinesReport(stream)
+    if fmt == "junit":
+        return JUnitReport(stream)
+    raise ValueError(f"unknown format {fmt!r}")
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Grading Daemon
+========================================================
+A long-running grader behind a local HTTP endpoint (TCP or Unix socket),
+started with `python run.py --serve`. Submissions are scored by a pool of
+worker processes that import run.py once and stay warm, so each
+submission costs a grade() call instead of a Python start-up.
+
+Endpoints:
+    POST /grade     JSON {"paths": [...], "validate": false, "var_files": [...]}
+                    or a .tar/.tar.gz body holding one submission. Results
+                    are streamed back as JSON lines as each one finishes,
+                    followed by a {"done": true, ...} line.
+    GET  /healthz   {"status": "ok"} (503 while shutting down)
+    GET  /stats     Queue depth, capacity and totals, as JSON
+    GET  /metrics   The same in Prometheus text format
+
+The queue is bounded: when a request would push more than --queue jobs
+into the pool it is rejected with 503 and a Retry-After header instead
+of waiting. A request with more paths than --queue gets 413, since it
+could never be admitted, and a malformed JSON body gets 400.
+
+Extracted tarballs get `terraform init -backend=false` before validate,
+using a shared TF_PLUGIN_CACHE_DIR so providers are downloaded once.
+
+Usage:
+    python run.py --serve                          # http://127.0.0.1:8765
+    python run.py --serve unix:/tmp/grader.sock --workers 8 --queue 64
+    curl -s localhost:8765/grade -d '{"paths": ["subs/alice", "subs/bob"]}'
+    curl -s localhost:8765/grade --data-binary @alice.tar.gz -H 'Content-Type: application/gzip'
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import importlib
+import shutil
+import tarfile
+import tempfile
+import threading
+import subprocess
+import signal
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+DEFAULT_QUEUE_PER_WORKER = 4
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+RETRY_AFTER = 1
+PLUGIN_CACHE = os.path.join(os.path.expanduser("~"), ".terraform.d", "plugin-cache")
+
+REGISTRY = Registry()
+JOBS = Counter("grader_jobs_total", "Submissions graded", ["outcome"], registry=REGISTRY)
+REJECTED = Counter("grader_rejected_total", "Requests rejected because the queue was full", registry=REGISTRY)
+QUEUED = Gauge("grader_queue_depth", "Submissions accepted but not finished", registry=REGISTRY)
+JOB_SECONDS = Histogram("grader_job_seconds", "Time from acceptance to result per submission", registry=REGISTRY)
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def _grade_job(root, var_files, validate, init):
+    """Grade one submission in a pool worker; returns GradeResult.to_dict()."""
+    import run  # Imported once per worker process, then reused
+    if init and validate and not os.path.isdir(os.path.join(root, ".terraform")):
+        env = dict(os.environ, TF_PLUGIN_CACHE_DIR=os.environ.get("TF_PLUGIN_CACHE_DIR", PLUGIN_CACHE))
+        try:
+            subprocess.run(["terraform", "init", "-backend=false", "-input=false", "-no-color"],
+                           cwd=root, env=env, capture_output=True, timeout=300)
+        except (OSError, subprocess.TimeoutExpired):
+            pass  # validate reports the problem
+    return run.grade(root, var_files, validate=validate).to_dict()
+
+
+def _warm_worker():
+    """Start a pool worker and load run.py into it before the first job."""
+    importlib.import_module("run")
+
+
+def parse_grade_request(body):
+    """Check a JSON /grade body; returns {"paths", "var_files", "validate"}.
+
+    Raises ValueError when the body is not of the documented shape.
+    """
+    request = json.loads(body or b"{}")
+    if not isinstance(request, dict):
+        raise ValueError('expected a JSON object: {"paths": ["dir", ...]}')
+    paths = request.get("paths") or ([request["path"]] if request.get("path") else [])
+    if not isinstance(paths, list) or not paths or not all(isinstance(p, str) for p in paths):
+        raise ValueError('expected {"paths": ["dir", ...]}')
+    var_files = request.get("var_files") or []
+    if not isinstance(var_files, list) or not all(isinstance(f, str) for f in var_files):
+        raise ValueError('"var_files" must be a list of file names')
+    validate = request.get("validate", True)
+    if not isinstance(validate, bool):
+        raise ValueError('"validate" must be true or false')
+    return {"paths": paths, "var_files": var_files, "validate": validate}
+
+
+def extract_submission(data, dest):
+    """Unpack a .tar/.tar.gz submission into `dest`, refusing unsafe members.
+
+    Returns the directory holding the .tf files (the single top-level
+    directory when the archive has one).
+    """
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+        members = []
+        for member in archive.getmembers():
+            path = os.path.normpath(member.name)
+            if path.startswith(("/", "..")) or os.path.isabs(path) or not (member.isfile() or member.isdir()):
+                raise ValueError(f"unsafe archive member: {member.name}")
+            members.append(member)
+        for member in members:
+            target = os.path.join(dest, os.path.normpath(member.name))
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with archive.extractfile(member) as src, open(target, "wb") as out:
+                shutil.copyfileobj(src, out)
+    entries = os.listdir(dest)
+    if len(entries) == 1 and os.path.isdir(os.path.join(dest, entries[0])):
+        return os.path.join(dest, entries[0])
+    return dest
+
+
+class Grader:
+    """A warm process pool with a bounded number of outstanding jobs."""
+
+    def __init__(self, workers=None, queue=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = queue or self.workers * DEFAULT_QUEUE_PER_WORKER
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.started = time.time()
+        self.draining = False
+        QUEUED.set_function(lambda: self.outstanding)
+        # Start every worker and import run.py before the first request
+        for future in [self.pool.submit(_warm_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def admit(self, count):
+        """Reserve `count` queue slots; False if that would exceed capacity."""
+        with self.lock:
+            if self.draining or self.outstanding + count > self.capacity:
+                return False
+            self.outstanding += count
+            return True
+
+    def release(self):
+        with self.lock:
+            self.outstanding -= 1
+
+    def submit(self, root, var_files=(), validate=True, init=False):
+        """Queue an admitted job; returns a Future of the result dict."""
+        accepted = time.perf_counter()
+        future = self.pool.submit(_grade_job, root, list(var_files), validate, init)
+
+        def done(f):
+            self.release()
+            JOB_SECONDS.observe(time.perf_counter() - accepted)
+            JOBS.inc(outcome="error" if f.cancelled() or f.exception() else "ok")
+        future.add_done_callback(done)
+        return future
+
+    def stats(self):
+        with self.lock:
+            outstanding = self.outstanding
+        return {
+            "status": "draining" if self.draining else "ok",
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "queue_depth": outstanding,
+            "available": max(0, self.capacity - outstanding),
+            "completed": int(JOBS.value(outcome="ok")),
+            "failed": int(JOBS.value(outcome="error")),
+            "rejected": int(REJECTED.value()),
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    def shutdown(self):
+        with self.lock:
+            self.draining = True
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class GradeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    grader = None  # Set by serve()
+
+    def _send_json(self, status, payload, headers=()):
+        body = (json.dumps(payload) + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_line(self, payload):
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            stats = self.grader.stats()
+            self._send_json(200 if stats["status"] == "ok" else 503, {"status": stats["status"]})
+        elif path == "/stats":
+            self._send_json(200, self.grader.stats())
+        elif path == "/metrics":
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/grade":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {"error": f"body larger than {MAX_UPLOAD_BYTES} bytes"})
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+
+        workdir = None
+        try:
+            if content_type in ("application/json", "application/x-www-form-urlencoded", ""):
+                request = parse_grade_request(body)
+                jobs = [(p, os.path.abspath(p), False) for p in request["paths"]]
+            else:
+                workdir = tempfile.mkdtemp(prefix="grade-")
+                request = {}
+                jobs = [("upload", extract_submission(body, workdir), True)]
+        except (ValueError, tarfile.TarError, OSError) as e:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            if len(jobs) > self.grader.capacity:
+                # Could never be admitted, so retrying would not help
+                self._send_json(413, {"error": f"{len(jobs)} submissions exceed the queue capacity "
+                                               f"of {self.grader.capacity}; split the request"})
+                return
+            if not self.grader.admit(len(jobs)):
+                REJECTED.inc()
+                self._send_json(503, {"error": "queue full", **self.grader.stats()},
+                                [("Retry-After", str(RETRY_AFTER))])
+                return
+            self._stream(jobs, request)
+        finally:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def _stream(self, jobs, request):
+        """Queue admitted jobs and write one JSON line per result as it finishes."""
+        started = time.perf_counter()
+        futures = {}
+        missing = []
+        for name, root, init in jobs:
+            if not os.path.isdir(root):
+                self.grader.release()
+                missing.append(name)
+                continue
+            futures[self.grader.submit(root, request.get("var_files", ()),
+                                       request.get("validate", True), init)] = name
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for name in missing:
+                self._write_line({"path": name, "error": "not a directory"})
+            for future in as_completed(futures):
+                try:
+                    self._write_line({"path": futures[future], "result": future.result()})
+                except (BrokenPipeError, ConnectionResetError):
+                    raise
+                except Exception as e:
+                    self._write_line({"path": futures[future], "error": str(e)})
+            self._write_line({"done": True, "count": len(jobs),
+                              "seconds": round(time.perf_counter() - started, 3)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client went away; queued jobs still finish
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)  # BaseHTTPRequestHandler expects (host, port)
+
+
+def make_server(address, handler):
+    """Bind "host:port", ":port" or "unix:/path" and return the server."""
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if os.path.exists(path):
+            os.unlink(path)
+        return ThreadingUnixHTTPServer(path, handler)
+    host, _, port = address.rpartition(":")
+    return ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(address=DEFAULT_ADDRESS, workers=None, queue=None):
+    """Run the grading daemon until Ctrl+C or SIGTERM."""
+    grader = Grader(workers, queue)
+    signal.signal(signal.SIGTERM, _terminate)
+    handler = type("BoundGradeHandler", (GradeHandler,), {"grader": grader})
+    try:
+        server = make_server(address, handler)
+    except (OSError, ValueError) as e:
+        grader.shutdown()
+        print(f"  {Colors.RED}[X]{Colors.END} Cannot listen on {address}: {e}\n")
+        return 1
+
+    print(f"  {Colors.GREEN}[OK]{Colors.END} Grading daemon listening on {address}")
+    print(f"      {grader.workers} worker(s), queue capacity {grader.capacity}")
+    print(f"      POST /grade, GET /healthz, /stats, /metrics")
+    print(f"\n  Press Ctrl+C to stop.\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n  {Colors.YELLOW}Grading daemon stopped.{Colors.END}\n")
+    finally:
+        server.server_close()
+        grader.shutdown()
+        if address.startswith("unix:"):
+            try:
+                os.unlink(address[len("unix:"):])
+            except OSError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve(*sys.argv[1:2]))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Import Profiler
+=========================================================
+Measures how long the entry points take to import, using
+`python -X importtime`, and lists the imports that cost the most.
+
+Each module is imported in a fresh interpreter several times and the
+fastest run is reported, so a cold disk cache or a first bytecode
+compile does not skew the result. Anything only some commands need
+should be imported inside the function that uses it.
+
+Usage:
+    python importprofile.py                    # dashboard and run
+    python importprofile.py dashboard --top 20
+    python importprofile.py run --budget 50    # Exit 1 if import takes over 50 ms
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+DEFAULT_MODULES = ("dashboard", "run")
+DEFAULT_RUNS = 5
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+
+def import_times(module, cwd=None):
+    """Import `module` in a new interpreter; returns [(depth, name, self_us, cumulative_us)].
+
+    The last entry is `module` itself. Raises RuntimeError if the import fails.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Measure with cached bytecode, as users run it
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile(module, runs=DEFAULT_RUNS, cwd=None):
+    """Fastest of `runs` imports: (total_us, [(name, cumulative_us)] of its direct imports)."""
+    best = None
+    for _ in range(runs):
+        entries = import_times(module, cwd)
+        end = next((i for i in range(len(entries) - 1, -1, -1)
+                    if entries[i][0] == 0 and entries[i][1] == module), None)
+        if end is None:
+            raise RuntimeError(f"{module} not in the -X importtime output")
+        # The module's own imports follow the previous top-level entry (site)
+        start = next((i + 1 for i in range(end - 1, -1, -1) if entries[i][0] == 0), 0)
+        total = entries[end][3]
+        if best is None or total < best[0]:
+            best = (total, [(name, cum) for depth, name, _, cum in entries[start:end] if depth == 1])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of the challenge scripts")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES),
+                        help=f"Modules to import (default: {' '.join(DEFAULT_MODULES)})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"Imports per module (default: {DEFAULT_RUNS})")
+    parser.add_argument("--top", type=int, default=10, help="Direct imports to list per module (default: 10)")
+    parser.add_argument("--budget", type=float, metavar="MS", help="Exit 1 if any module takes longer than this")
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be >= 1")
+
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Import Time Profile{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    over = False
+    for module in args.modules:
+        try:
+            total, direct = profile(module, args.runs, here)
+        except RuntimeError as e:
+            print(f"  {Colors.RED}[X]{Colors.END} {module}: {e}\n")
+            over = True
+            continue
+        ms = total / 1000
+        if args.budget is None:
+            mark, budget = "", ""
+        else:
+            mark = f"{Colors.GREEN}[OK]{Colors.END} " if ms <= args.budget else f"{Colors.RED}[X]{Colors.END} "
+            budget = f" (budget {args.budget:g} ms)"
+            over = over or ms > args.budget
+        print(f"  {mark}{Colors.BOLD}{module}{Colors.END}: {ms:.1f} ms{budget}")
+        for name, cumulative in sorted(direct, key=lambda item: -item[1])[:args.top]:
+            print(f"        {cumulative / 1000:7.1f} ms  {name}")
+        print()
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Inventory Index
+===============================================
+An in-memory search index over dashboard resources, behind the
+dashboard's /api/search endpoint.
+
+Each resource is a flat record such as {"kind": "instance", "id": ...,
+"name": ..., "tier": ..., "az": ..., "address": "10.0.11.37",
+"tags": {...}}. Every string field is indexed by its whole value, the
+fields in FIELD_TERMS also as "field:value", and names and tag values
+word by word too; tags are indexed as the key, the value and
+"key:value". Addresses (IPs and CIDR blocks) go into a path-compressed
+binary radix tree per address family, so an IP finds the instance that
+has it and the subnets and VPCs that contain it, and a CIDR block also
+finds everything inside it.
+
+update() takes the full set of records for a new snapshot and only
+re-indexes the ones that were added, changed or removed. The sorted
+vocabulary behind prefix queries is kept up to date by update() too, so a
+search never sorts it.
+
+Query syntax, all terms must match:
+    10.0.11.37           The resource with that IP, then its subnet and VPC
+    10.0.11.0/24         Everything inside the block, and what contains it
+    tier:app az:us-east-1b kind:instance
+    environment:prod     A tag key and value (tag keys are case-insensitive)
+    i-0abc*              Any term starting with "i-0abc"
+
+Usage:
+    index = InventoryIndex()
+    index.update({("vpc", "vpc-1"): {"kind": "vpc", "id": "vpc-1", "address": "10.0.0.0/16"}})
+    total, records = index.search("10.0.11.37", limit=50)
+"""
+
+import re
+import heapq
+import bisect
+import socket
+
+# Fields also indexed as "field:value", to narrow a search (tier:app)
+FIELD_TERMS = ("kind", "tier", "az", "state", "type", "engine", "target")
+# Fields whose values are also indexed word by word
+WORD_FIELDS = ("name",)
+# When more than this share of the vocabulary changes in one update(), it
+# is sorted again instead of taking each term in and out of the sorted list
+RESORT_FRACTION = 1 / 512
+
+_WORDS = re.compile(r"[^\w.]+")
+_EMPTY = frozenset()
+
+
+class _Node:
+    __slots__ = ("network", "length", "children", "items")
+
+    def __init__(self, network, length):
+        self.network = network
+        self.length = length
+        self.children = [None, None]
+        self.items = set()
+
+
+class RadixTree:
+    """A path-compressed binary trie of IP prefixes for one address family.
+
+    Prefixes are (network, length) pairs with `network` an integer whose
+    host bits are zero. Each prefix holds a set of items.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.root = _Node(0, 0)
+
+    def add(self, network, length, item):
+        bits = self.bits
+        node = self.root
+        while node.length < length:
+            bit = (network >> (bits - 1 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                child = node.children[bit] = _Node(network, length)
+            else:
+                common = min(length, child.length, bits - (network ^ child.network).bit_length())
+                if common < child.length:
+                    # Split the edge where the two prefixes diverge
+                    split = _Node(network >> (bits - common) << (bits - common), common)
+                    split.children[(child.network >> (bits - 1 - common)) & 1] = child
+                    child = node.children[bit] = split
+            node = child
+        node.items.add(item)
+
+    def remove(self, network, length, item):
+        path = []
+        node = self.root
+        while node is not None and node.length < length:
+            bit = (network >> (self.bits - 1 - node.length)) & 1
+            path.append((node, bit))
+            node = node.children[bit]
+        if node is None or node.length != length or node.network != network:
+            return
+        node.items.discard(item)
+        # Drop nodes left without items that no longer join two branches
+        while path and not node.items:
+            children = [child for child in node.children if child is not None]
+            if len(children) == 2:
+                break
+            parent, bit = path.pop()
+            parent.children[bit] = children[0] if children else None
+            if children:
+                break
+            node = parent
+
+    def covering(self, network, length):
+        """Items on prefixes that contain (network, length), most specific first."""
+        found = []
+        node = self.root
+        while (node is not None and node.length <= length
+               and (network ^ node.network) >> (self.bits - node.length) == 0):
+            found.append(node)
+            if node.length == length:
+                break
+            node = node.children[(network >> (self.bits - 1 - node.length)) & 1]
+        return [item for node in reversed(found) for item in node.items]
+
+    def within(self, network, length):
+        """Items on (network, length) and every prefix inside it."""
+        node = self.root
+        while node is not None and node.length < length:
+            node = node.children[(network >> (self.bits - 1 - node.length)) & 1]
+        if node is None or (network ^ node.network) >> (self.bits - length):
+            return []
+        items = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            items.extend(node.items)
+            stack.extend(child for child in node.children if child is not None)
+        return items
+
+
+def parse_network(text):
+    """(version, network, prefix length) for an IP or CIDR string, or None.
+
+    Host bits are cleared, so "10.0.11.37/24" is 10.0.11.0/24.
+    """
+    address, _, length = text.partition("/")
+    for version, family, bits in ((4, socket.AF_INET, 32), (6, socket.AF_INET6, 128)):
+        try:
+            network = int.from_bytes(socket.inet_pton(family, address), "big")
+        except OSError:
+            continue
+        if not length:
+            return version, network, bits
+        if not length.isdigit() or int(length) > bits:
+            return None
+        length = int(length)
+        return version, network >> (bits - length) << (bits - length), length
+    return None
+
+
+def record_terms(record):
+    """The lower-cased terms a record is found by."""
+    terms = set()
+    for field, value in record.items():
+        if field == "address" or not isinstance(value, str) or not value:
+            continue
+        value = value.lower()
+        terms.add(value)
+        if field in FIELD_TERMS:
+            terms.add(f"{field}:{value}")
+        if field in WORD_FIELDS:
+            terms.update(word for word in _WORDS.split(value) if word)
+    for key, value in record.get("tags", {}).items():
+        key, value = key.lower(), str(value).lower()
+        terms.update((key, f"{key}:{value}"))
+        if value:
+            terms.add(value)
+            terms.update(word for word in _WORDS.split(value) if word)
+    return terms
+
+
+class InventoryIndex:
+    """Inverted index of resource records by term, plus a radix tree of addresses."""
+
+    def __init__(self):
+        self._numbers = {}    # key -> document number
+        self._records = {}    # document number -> record
+        self._rank = {}       # document number -> sort key for address queries (most specific first)
+        self._terms = {}      # term -> set of document numbers
+        self._networks = {4: RadixTree(32), 6: RadixTree(128)}
+        self._sorted_terms = []      # Every term in order, for prefix queries
+        self._new_terms = set()      # Terms update() added and removed, merged
+        self._dropped_terms = set()  # into _sorted_terms when it returns
+        self._next = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def update(self, records):
+        """Index `records` ({key: record}) in place of the current set.
+
+        Returns (added, changed, removed) counts.
+        """
+        gone = [key for key in self._numbers if key not in records]
+        for key in gone:
+            self._unindex(self._numbers.pop(key))
+        added = changed = 0
+        for key, record in records.items():
+            number = self._numbers.get(key)
+            if number is None:
+                number = self._numbers[key] = self._next
+                self._next += 1
+                added += 1
+            elif self._records[number] == record:
+                continue
+            else:
+                self._unindex(number)
+                changed += 1
+            self._index(number, record)
+        self._merge_vocabulary()
+        return added, changed, len(gone)
+
+    def _merge_vocabulary(self):
+        new, dropped, terms = self._new_terms, self._dropped_terms, self._sorted_terms
+        if len(new) + len(dropped) > len(terms) * RESORT_FRACTION:
+            self._sorted_terms = sorted(self._terms)
+        else:
+            for term in dropped:
+                del terms[bisect.bisect_left(terms, term)]
+            for term in new:
+                bisect.insort(terms, term)
+        new.clear()
+        dropped.clear()
+
+    def _index(self, number, record):
+        self._records[number] = record
+        for term in record_terms(record):
+            postings = self._terms.get(term)
+            if postings is None:
+                postings = self._terms[term] = set()
+                if term in self._dropped_terms:
+                    self._dropped_terms.discard(term)
+                else:
+                    self._new_terms.add(term)
+            postings.add(number)
+        network = parse_network(record.get("address") or "")
+        if network is not None:
+            version, address, length = network
+            self._networks[version].add(address, length, number)
+        self._rank[number] = (-network[2] if network is not None else 0, number)
+
+    def _unindex(self, number):
+        record = self._records.pop(number)
+        del self._rank[number]
+        for term in record_terms(record):
+            postings = self._terms[term]
+            postings.discard(number)
+            if not postings:
+                del self._terms[term]
+                if term in self._new_terms:
+                    self._new_terms.discard(term)
+                else:
+                    self._dropped_terms.add(term)
+        network = parse_network(record.get("address") or "")
+        if network is not None:
+            version, address, length = network
+            self._networks[version].remove(address, length, number)
+
+    def _match(self, token, network):
+        if network is not None:
+            version, address, length = network
+            tree = self._networks[version]
+            return set(tree.covering(address, length)).union(tree.within(address, length))
+        token = token.lower()
+        if not token.endswith("*"):
+            return self._terms.get(token, _EMPTY)
+        prefix, terms = token[:-1], self._sorted_terms
+        matches = set()
+        for i in range(bisect.bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix):
+                break
+            matches |= self._terms[terms[i]]
+        return matches
+
+    def search(self, query, limit=50):
+        """Return (total, records) for resources matching every term of `query`.
+
+        Records are in the order they were indexed; when the query has an
+        IP or CIDR block, the most specific address comes first.
+        """
+        networks = {token: parse_network(token) for token in query.split()}
+        matches = sorted((self._match(token, network) for token, network in networks.items()), key=len)
+        if not matches:
+            return 0, []
+        found = matches[0].intersection(*matches[1:]) if len(matches) > 1 else matches[0]
+        by_address = any(network is not None for network in networks.values())
+        top = heapq.nsmallest(limit, found, key=self._rank.__getitem__ if by_address else None)
+        return len(found), [self._records[number] for number in top]
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Load Test
+=========================================
+Drives HTTP load at the web tier (the ALB, or the web-preview page on
+LocalStack) and reports latency percentiles, errors and throughput.
+
+Requests are sent over a pool of keep-alive connections with asyncio.
+Use --concurrency for a closed loop (N requests always in flight) or
+--rate for an open loop at a fixed request rate. In rate mode latency is
+measured from each request's scheduled start, so a stalled server shows
+up in the percentiles instead of silently lowering the rate.
+
+Usage:
+    python loadtest.py                              # web-preview on :3000
+    python loadtest.py --alb                        # URL from `terraform output alb_url`
+    python loadtest.py http://host/ --rate 200 --duration 60
+    python loadtest.py --concurrency 32 --json results.json
+"""
+
+import os
+import sys
+import ssl
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import urlsplit
+
+# For Windows compatibility
+if sys.platform == 'win32':
+    os.system('color')
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_URL = "http://localhost:3000/"
+PERCENTILES = (50, 90, 99, 99.9)
+USER_AGENT = "terraform-3tier-loadtest/1"
+# Pause after a failed connect in --concurrency mode, doubling up to the maximum
+CONNECT_BACKOFF = 0.01
+MAX_CONNECT_BACKOFF = 1.0
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in microseconds (HdrHistogram-style).
+
+    Values are bucketed by a `bits`-bit mantissa and a power-of-two
+    exponent, so every recorded value is kept to within 1/2**(bits-1)
+    relative error whatever its magnitude, in a small sparse table.
+    """
+
+    def __init__(self, bits=8):
+        self.bits = bits
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, micros):
+        micros = max(int(micros), 0)
+        shift = max(micros.bit_length() - self.bits, 0)
+        key = (shift, micros >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = max(self.max, micros)
+
+    def _buckets(self):
+        """Yield (highest equivalent value, count) in increasing order."""
+        for (shift, mantissa), count in sorted(self.counts.items(), key=lambda kv: kv[0][1] << kv[0][0]):
+            yield min(((mantissa + 1) << shift) - 1, self.max), count
+
+    def percentile(self, pct):
+        if not self.total:
+            return 0
+        rank = max(1, int(round(pct / 100 * self.total + 0.4999)))
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen >= rank:
+                return value
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+    def to_list(self):
+        return [[value, count] for value, count in self._buckets()]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, request_bytes):
+        """Send a request; return (status, body length, keep_alive)."""
+        self.writer.write(request_bytes)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise ConnectionError(f"bad status line {status_line[:40]!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = 0
+        if headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                await self.reader.readexactly(size + 2)
+                length += size
+        elif b"content-length" in headers:
+            length = int(headers[b"content-length"])
+            await self.reader.readexactly(length)
+        elif status not in (204, 304) and status >= 200:
+            length = len(await self.reader.read())
+            return status, length, False
+
+        keep_alive = headers.get(b"connection", b"").lower() != b"close" and parts[0] != b"HTTP/1.0"
+        return status, length, keep_alive
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """At most `size` connections to one host, reused while kept alive."""
+
+    def __init__(self, host, port, use_ssl, size):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def acquire(self):
+        await self.slots.acquire()
+        if self.idle:
+            return self.idle.pop()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.opened += 1
+        return Connection(reader, writer)
+
+    def release(self, conn, reusable):
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn.close()
+        self.slots.release()
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+class LoadTest:
+    def __init__(self, url, duration, concurrency=None, rate=None, connections=None, timeout=10.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an http(s) URL: {url}")
+        self.url = url
+        self.duration = duration
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        use_ssl = parts.scheme == "https"
+        port = parts.port or (443 if use_ssl else 80)
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.request_bytes = (f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+                              f"Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode()
+        pool_size = connections or concurrency or 64
+        self.pool = ConnectionPool(parts.hostname, port, use_ssl, pool_size)
+        self.histogram = LatencyHistogram()
+        self.statuses = {}
+        self.errors = {}
+        self.bytes = 0
+
+    async def _one(self, started):
+        """Send one request; return False if no connection could be made."""
+        conn = None
+        reusable = False
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), self.timeout)
+            status, length, reusable = await asyncio.wait_for(conn.request(self.request_bytes), self.timeout)
+        except asyncio.TimeoutError:
+            self._error("timeout")
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            self._error(type(e).__name__)
+        else:
+            self.histogram.record((time.perf_counter() - started) * 1e6)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes += length
+        finally:
+            if conn is not None:
+                self.pool.release(conn, reusable)
+        return conn is not None
+
+    def _error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def _closed_loop(self, deadline):
+        async def worker():
+            backoff = CONNECT_BACKOFF
+            while time.perf_counter() < deadline:
+                if await self._one(time.perf_counter()):
+                    backoff = CONNECT_BACKOFF
+                    continue
+                # Don't spin on a server that refuses connections
+                await asyncio.sleep(min(backoff, max(deadline - time.perf_counter(), 0)))
+                backoff = min(backoff * 2, MAX_CONNECT_BACKOFF)
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, deadline):
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        tasks = set()
+        n = 0
+        while True:
+            scheduled = start + n * interval
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self._one(scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            n += 1
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration
+        try:
+            if self.rate:
+                await self._open_loop(deadline)
+            else:
+                await self._closed_loop(deadline)
+        finally:
+            self.pool.close()
+        return self.results(time.perf_counter() - start)
+
+    def results(self, elapsed):
+        h = self.histogram
+        completed = h.total
+        failed = sum(self.errors.values()) + sum(c for s, c in self.statuses.items() if s >= 400)
+        return {
+            "url": self.url,
+            "mode": "rate" if self.rate else "concurrency",
+            "rate": self.rate,
+            "concurrency": self.concurrency,
+            "duration_seconds": elapsed,
+            "requests": completed + sum(self.errors.values()),
+            "completed": completed,
+            "errors": dict(self.errors),
+            "status": {str(k): v for k, v in sorted(self.statuses.items())},
+            "failed": failed,
+            "connections_opened": self.pool.opened,
+            "throughput_rps": completed / elapsed if elapsed else 0,
+            "bytes_per_second": self.bytes / elapsed if elapsed else 0,
+            # None when no request completed, rather than a misleading 0 ms
+            "latency_ms": dict(
+                [("min", (h.min or 0) / 1000), ("mean", h.mean() / 1000)]
+                + [(f"p{p:g}", h.percentile(p) / 1000) for p in PERCENTILES]
+                + [("max", h.max / 1000)]) if completed else dict.fromkeys(
+                ["min", "mean"] + [f"p{p:g}" for p in PERCENTILES] + ["max"]),
+            "histogram_us": h.to_list(),
+        }
+
+
+def alb_url():
+    """Return the alb_url Terraform output, or None."""
+    try:
+        result = subprocess.run(["terraform", "output", "-raw", "alb_url"],
+                                capture_output=True, text=True, timeout=30)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    url = result.stdout.strip()
+    return url if result.returncode == 0 and url.startswith("http") else None
+
+
+def print_results(results):
+    lat = results["latency_ms"]
+    print(f"  {Colors.CYAN}Requests:{Colors.END}    {results['completed']} completed in "
+          f"{results['duration_seconds']:.1f}s ({results['throughput_rps']:.1f} req/s, "
+          f"{results['connections_opened']} connection(s))")
+    status = ", ".join(f"{k}: {v}" for k, v in results["status"].items()) or "none"
+    print(f"  {Colors.CYAN}Status:{Colors.END}      {status}")
+    if results["errors"]:
+        errors = ", ".join(f"{k}: {v}" for k, v in sorted(results["errors"].items()))
+        print(f"  {Colors.RED}Errors:{Colors.END}      {errors}")
+    print(f"  {Colors.CYAN}Latency:{Colors.END}")
+    for key in ("min", "mean", "p50", "p90", "p99", "p99.9", "max"):
+        value = f"{'n/a':>10}" if lat[key] is None else f"{lat[key]:10.2f} ms"
+        print(f"      {key:>6}  {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test for the web tier")
+    parser.add_argument("url", nargs="?", help=f"Target URL (default: {DEFAULT_URL})")
+    parser.add_argument("--alb", action="store_true", help="Target the alb_url Terraform output")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", "-c", type=int, help="Requests kept in flight (default: 10)")
+    mode.add_argument("--rate", "-r", type=float, help="Requests per second (open loop)")
+    parser.add_argument("--duration", "-d", type=float, default=30.0, help="Seconds to run (default: 30)")
+    parser.add_argument("--connections", type=int,
+                        help="Keep-alive pool size (default: concurrency, or 64 with --rate)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", metavar="FILE", help="Write results as JSON")
+    args = parser.parse_args()
+
+    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Web Tier Load Test{Colors.END}")
+    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    url = args.url
+    if args.alb:
+        url = alb_url()
+        if url is None:
+            print(f"  {Colors.RED}[X]{Colors.END} No alb_url output (run terraform apply and uncomment it in outputs.tf)\n")
+            return 1
+    url = url or DEFAULT_URL
+    concurrency = None if args.rate else (args.concurrency or 10)
+    if (concurrency is not None and concurrency < 1) or (args.rate is not None and args.rate <= 0):
+        parser.error("--concurrency and --rate must be positive")
+
+    try:
+        test = LoadTest(url, args.duration, concurrency=concurrency, rate=args.rate,
+                        connections=args.connections, timeout=args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+    load = f"{args.rate:g} req/s" if args.rate else f"{concurrency} concurrent"
+    print(f"  Target: {Colors.BOLD}{url}{Colors.END}  ({load}, {args.duration:g}s)\n")
+
+    try:
+        results = asyncio.run(test.run())
+    except KeyboardInterrupt:
+        print(f"\n  {Colors.YELLOW}Interrupted.{Colors.END}\n")
+        return 1
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n  Results written to {args.json}")
+    print()
+    return 0 if results["completed"] and not results["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Plan Index
+====================================================
+Reads `terraform show -json <planfile>` output with a streaming parser and
+builds a small index of the planned resources, so run.py can score a plan
+instead of pattern-matching the .tf sources.
+
+Only the parts of the plan that scoring needs are kept: each resource's
+address, type and name, whether a few attributes are set, and the
+database engine. Attribute values such as user_data scripts are never
+held, so memory grows with the number of resources and not with their
+size. Indexes are cached by the plan's SHA-256, on disk under the user
+cache directory and in memory for the last MEMORY_CACHE_SIZE plans.
+
+Usage:
+    terraform plan -out tfplan
+    python planindex.py tfplan              # Summarize the indexed plan
+    terraform show -json tfplan > plan.json
+    python planindex.py plan.json
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+import codecs
+from collections import OrderedDict
+
+
+def _user_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "terraform-3tier", "plans")
+
+
+CACHE_DIR = _user_cache_dir()
+CACHE_VERSION = 2
+MEMORY_CACHE_SIZE = 4
+
+# Planned attributes the index records. Values of KEPT_VALUES are kept as
+# planned; SET_ATTRIBUTES are recorded as True when set, and the value is
+# dropped while streaming.
+KEPT_VALUES = ("engine",)
+SET_ATTRIBUTES = ("user_data", "user_data_base64", "vpc_security_group_ids", "health_check")
+
+_NO_VALUES = {}  # Shared by every resource with no recorded attributes; never modified
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+class PlanFormatError(Exception):
+    """Raised when a file is not valid `terraform show -json` output."""
+
+
+class JSONStream:
+    """Incremental reader for one large JSON document.
+
+    Containers are walked one member at a time with items()/elements(), and
+    leaves (or small subtrees) are decoded with value(), so only the value
+    currently being read has to fit in memory.
+    """
+
+    def __init__(self, fileobj, chunk_size=1 << 20):
+        self.file = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, at_least=None):
+        """Append more input to the buffer; return False at end of input."""
+        if self.eof:
+            return False
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.file.read(max(self.chunk_size, at_least or 0))
+        if not data:
+            self.eof = True
+            self.buf += self.decoder.decode(b"", final=True)
+            return False
+        self.buf += self.decoder.decode(data) if isinstance(data, bytes) else data
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at end)."""
+        while True:
+            buf, pos = self.buf, self.pos
+            n = len(buf)
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise PlanFormatError(f"expected {char!r} near offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(len(self.buf)):
+                    raise PlanFormatError(f"invalid JSON near offset {self.pos}")
+                continue
+            # A number or literal that ends exactly at the buffer edge may
+            # continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def items(self):
+        """Iterate the keys of the next object.
+
+        The caller must consume each key's value (value(), items(),
+        elements() or skip()) before advancing the iterator.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise PlanFormatError(f"expected object key near offset {self.pos}")
+            key = self.value()
+            self._expect(":")
+            yield key
+            c = self._peek()
+            self.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise PlanFormatError(f"expected ',' or '}}' near offset {self.pos}")
+
+    def elements(self):
+        """Iterate the elements of the next array (same contract as items())."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            c = self._peek()
+            self.pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise PlanFormatError(f"expected ',' or ']' near offset {self.pos}")
+
+    def skip(self):
+        """Consume the next value without keeping it.
+
+        Containers are skipped member by member, so memory is bounded by the
+        largest member rather than the whole container.
+        """
+        c = self._peek()
+        if c == "{":
+            for _ in self.items():
+                self.value()
+        elif c == "[":
+            for _ in self.elements():
+                self.value()
+        else:
+            self.value()
+
+
+class PlanIndex:
+    """Planned resources of a Terraform plan, indexed by address and type."""
+
+    def __init__(self):
+        self.terraform_version = None
+        self.resources = {}          # address -> (type, name, values)
+        self.by_type = {}            # type -> [addresses]
+        self.config_resources = {}   # "type.name" / "data.type.name" -> {"expressions": [keys]}
+        self.variables = {}          # name -> resolved value
+        self.variable_descriptions = {}  # name -> description (or None)
+        self.providers = {}          # provider name -> {"full_name", "version_constraint", "expressions"}
+
+    # -- queries --------------------------------------------------------------
+
+    def instances(self, rtype, name=None):
+        """Return the planned instances of a type (optionally one block).
+
+        Each is a dict with "address", "type", "name" and "values".
+        """
+        out = []
+        for address in self.by_type.get(rtype, ()):
+            _, res_name, values = self.resources[address]
+            if name is None or res_name == name:
+                out.append({"address": address, "type": rtype, "name": res_name, "values": values})
+        return out
+
+    def has(self, rtype, name=None, mode="managed"):
+        """True if the plan (or, for data sources, the config) has the block."""
+        if mode == "data":
+            key = f"data.{rtype}" + (f".{name}" if name else "")
+            return any(a == key or a.startswith(key + ".") for a in self.config_resources)
+        addresses = self.by_type.get(rtype, ())
+        return bool(addresses) if name is None else any(self.resources[a][1] == name for a in addresses)
+
+    def configures(self, rtype, attribute):
+        """True if any block of `rtype` sets `attribute` in its configuration.
+
+        Used for attributes whose planned value is unknown until apply
+        (security group IDs, for example).
+        """
+        for address, res in self.config_resources.items():
+            if address.split(".")[0] == rtype and attribute in res["expressions"]:
+                return True
+        return any(self.resources[address][2].get(attribute) not in (None, [], "")
+                   for address in self.by_type.get(rtype, ()))
+
+    # -- persistence ----------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            "version": CACHE_VERSION,
+            "terraform_version": self.terraform_version,
+            "resources": [[address, *res] for address, res in self.resources.items()],
+            "config_resources": self.config_resources,
+            "variables": self.variables,
+            "variable_descriptions": self.variable_descriptions,
+            "providers": self.providers,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != CACHE_VERSION:
+            raise ValueError("index cache from another version")
+        index = cls()
+        index.terraform_version = data.get("terraform_version")
+        index.config_resources = data.get("config_resources", {})
+        index.variables = data.get("variables", {})
+        index.variable_descriptions = data.get("variable_descriptions", {})
+        index.providers = data.get("providers", {})
+        for address, rtype, name, values in data.get("resources", []):
+            index._add_resource(address, rtype, name, values)
+        return index
+
+    def _add_resource(self, address, rtype, name, values):
+        rtype = sys.intern(rtype)
+        self.resources[address] = (rtype, name, values or _NO_VALUES)
+        self.by_type.setdefault(rtype, []).append(address)
+
+
+def _read_module(stream, index):
+    """Stream a planned_values module: its resources and child_modules."""
+    for key in stream.items():
+        if key == "resources":
+            for _ in stream.elements():
+                res = stream.value()
+                values = res.get("values") or {}
+                kept = {k: values[k] for k in KEPT_VALUES if isinstance(values.get(k), str)}
+                kept.update((k, True) for k in SET_ATTRIBUTES if values.get(k) not in (None, [], ""))
+                index._add_resource(res["address"], res.get("type", ""), res.get("name", ""), kept)
+        elif key == "child_modules":
+            for _ in stream.elements():
+                _read_module(stream, index)
+        else:
+            stream.skip()
+
+
+def _read_config_module(stream, index, prefix=""):
+    """Stream configuration.root_module: resource expressions and variables."""
+    for key in stream.items():
+        if key == "resources":
+            for _ in stream.elements():
+                res = stream.value()
+                address = prefix + res.get("address", "")
+                index.config_resources[address] = {
+                    "expressions": sorted((res.get("expressions") or {}).keys()),
+                }
+        elif key == "variables" and not prefix:
+            for name, var in stream.value().items():
+                index.variable_descriptions[name] = var.get("description")
+        elif key == "module_calls":
+            for call in stream.items():
+                for ckey in stream.items():
+                    if ckey == "module":
+                        _read_config_module(stream, index, f"{prefix}module.{call}.")
+                    else:
+                        stream.skip()
+        else:
+            stream.skip()
+
+
+def build_index(fileobj):
+    """Build a PlanIndex from a file object holding plan JSON."""
+    stream = JSONStream(fileobj)
+    index = PlanIndex()
+    if stream._peek() != "{":
+        raise PlanFormatError("not a JSON plan (expected an object)")
+    for key in stream.items():
+        if key == "terraform_version":
+            index.terraform_version = stream.value()
+        elif key == "variables":
+            index.variables = {k: v.get("value") for k, v in stream.value().items()}
+        elif key == "planned_values":
+            for pkey in stream.items():
+                if pkey == "root_module":
+                    _read_module(stream, index)
+                else:
+                    stream.skip()
+        elif key == "configuration":
+            for ckey in stream.items():
+                if ckey == "provider_config":
+                    for name, provider in stream.value().items():
+                        index.providers[name] = {
+                            "full_name": provider.get("full_name"),
+                            "version_constraint": provider.get("version_constraint"),
+                            "expressions": sorted((provider.get("expressions") or {}).keys()),
+                        }
+                elif ckey == "root_module":
+                    _read_config_module(stream, index)
+                else:
+                    stream.skip()
+        else:
+            stream.skip()
+    if index.terraform_version is None and not index.resources:
+        raise PlanFormatError("not a terraform plan (no terraform_version or planned_values)")
+    return index
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_json(path):
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+    return head.startswith(b"{")
+
+
+_memory_cache = OrderedDict()  # digest -> PlanIndex, least recently used first
+
+
+def _remember(digest, index):
+    _memory_cache[digest] = index
+    _memory_cache.move_to_end(digest)
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return index
+
+
+def load_plan_index(path, cache_dir=CACHE_DIR):
+    """Return the PlanIndex for a plan file, using the cache when possible.
+
+    `path` may be JSON from `terraform show -json` or a binary planfile from
+    `terraform plan -out`, which is converted with `terraform show -json`
+    and streamed straight into the parser.
+    """
+    digest = _file_digest(path)
+    if digest in _memory_cache:
+        _memory_cache.move_to_end(digest)
+        return _memory_cache[digest]
+
+    cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return _remember(digest, PlanIndex.from_dict(json.load(f)))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    if _is_json(path):
+        with open(path, "rb") as f:
+            index = build_index(f)
+    else:
+        try:
+            proc = subprocess.Popen(["terraform", "show", "-json", path],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise PlanFormatError("binary planfile given but terraform is not installed")
+        try:
+            index = build_index(proc.stdout)
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read().decode(errors="replace")
+            proc.stderr.close()
+            if proc.wait() != 0:
+                raise PlanFormatError(stderr.strip() or "terraform show -json failed")
+
+    _remember(digest, index)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index a Terraform plan for scoring")
+    parser.add_argument("plan", help="Planfile or `terraform show -json` output")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the index cache")
+    args = parser.parse_args()
+
+    try:
+        index = load_plan_index(args.plan, cache_dir=None if args.no_cache else CACHE_DIR)
+    except (OSError, PlanFormatError) as e:
+        print(f"  [X] {e}")
+        return 1
+
+    print(f"  Terraform {index.terraform_version or '?'}: {len(index.resources)} planned instance(s)")
+    for rtype in sorted(index.by_type):
+        print(f"    {len(index.by_type[rtype]):>6}  {rtype}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,19 @@ Usage:
     python run.py           # Check progress
     python run.py --verbose # Show detailed output
     python run.py --verify  # Verify deployed resources in LocalStack
+    python run.py --verify --target us-east-1,eu-west-1  # Verify several regions
+    python run.py --var-file prod.tfvars  # Evaluate variables from a .tfvars file
+    python run.py --plan tfplan  # Score a plan (binary or `terraform show -json`)
+    python run.py --trace trace.json  # Record a Chrome trace (open in Perfetto)
+    python run.py --serve             # Grading daemon on 127.0.0.1:8765 (see gradeserver.py)
+    python run.py --work sqlite:/shared/queue.db  # Grade from a shared queue (see gradequeue.py)
+    python run.py --history           # Score every commit of HEAD (see githistory.py)
+    python run.py --format junit > results.xml  # JSON Lines or JUnit XML for CI (see gradereport.py)
+
+As a library (no output, explicit directory, thread-safe):
+    import run
+    result = run.grade("submissions/alice")
+    print(result.score, result.to_dict())
 """
 
 import os
@@ -15,14 +28,43 @@ import re
 import sys
 import glob
 import json
+import time
 import subprocess
 import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tfconfig import TerraformConfig
+from tfsources import SourceTree
+from planindex import load_plan_index, PlanFormatError
+from awstargets import ConcurrencyLimiter, parse_targets
+import tracing
 
 # For Windows compatibility
 if sys.platform == 'win32':
     os.system('color')
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
+LOCALSTACK_ENDPOINT = "http://localhost:4566"
+AWS_LIMITER = ConcurrencyLimiter()  # --max-concurrency / --per-target-concurrency
+
+# (name, AWS CLI command, --query) fetched per target by --verify
+VERIFY_QUERIES = [
+    ('vpcs', ['ec2', 'describe-vpcs'], 'Vpcs[*].{Id:VpcId,Cidr:CidrBlock}'),
+    ('subnets', ['ec2', 'describe-subnets'], 'Subnets[*].{Id:SubnetId,Cidr:CidrBlock,AZ:AvailabilityZone}'),
+    ('security_groups', ['ec2', 'describe-security-groups'],
+     'SecurityGroups[?GroupName!=`default`].{Id:GroupId,Name:GroupName}'),
+    ('load_balancers', ['elbv2', 'describe-load-balancers'],
+     'LoadBalancers[*].{Name:LoadBalancerName,DNS:DNSName,State:State.Code}'),
+    ('target_groups', ['elbv2', 'describe-target-groups'],
+     'TargetGroups[*].{Name:TargetGroupName,Port:Port,Protocol:Protocol}'),
+    ('instances', ['ec2', 'describe-instances', '--filters', 'Name=instance-state-name,Values=running'],
+     'Reservations[*].Instances[*].{Id:InstanceId,Type:InstanceType,IP:PrivateIpAddress}'),
+    ('databases', ['rds', 'describe-db-instances'],
+     'DBInstances[*].{Id:DBInstanceIdentifier,Engine:Engine,Status:DBInstanceStatus}'),
+]
+
 # ANSI colors
 class Colors:
     GREEN = '\033[92m'
@@ -40,15 +82,68 @@ def print_header():
     print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
 
 
-def read_file(filename):
-    """Read a file and return its contents."""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return None
-    except Exception as e:
-        return None
+# Blocks that count toward each section wherever they are declared, on top
+# of the section's own file (see tfsources.block_key for the naming)
+SECTION_BLOCKS = {
+    'main.tf': ('terraform', 'provider'),
+    'vpc.tf': ('aws_vpc', 'aws_internet_gateway', 'aws_subnet', 'aws_eip', 'aws_nat_gateway',
+               'aws_route_table', 'aws_route_table_association', 'aws_route'),
+    'security.tf': ('aws_security_group', 'aws_security_group_rule', 'aws_vpc_security_group_*'),
+    'alb.tf': ('aws_lb', 'aws_lb_*', 'aws_alb', 'aws_alb_*'),
+    'ec2.tf': ('data.aws_ami', 'aws_instance', 'aws_launch_template'),
+    'rds.tf': ('aws_db_subnet_group', 'aws_db_instance', 'aws_db_parameter_group'),
+    'variables.tf': ('variable',),
+    'ecs.tf': ('aws_ecs_*',),
+}
+SOURCE_CACHE_SIZE = 64
+_source_cache = {}
+_source_cache_lock = threading.Lock()
+
+
+def load_sources(root=None):
+    """Discover and index the configuration in `root` (cached until a file changes)."""
+    key = os.path.abspath(root or '.')
+    with _source_cache_lock:
+        tree = _source_cache.get(key)
+    if tree is not None and tree.unchanged():
+        return tree
+    with tracing.span("discover_sources", "io", {"root": key}):
+        tree = SourceTree(key)
+    with _source_cache_lock:
+        _source_cache.pop(key, None)
+        while len(_source_cache) >= SOURCE_CACHE_SIZE:
+            _source_cache.pop(next(iter(_source_cache)))
+        _source_cache[key] = tree
+    return tree
+
+
+@tracing.traced("io", describe=lambda filename, root=None: {"file": filename})
+def read_section(filename, root=None):
+    """Return the text a section is scored on.
+
+    That is `filename` (e.g. vpc.tf) plus the section's blocks from any
+    other file of the configuration, including local modules, so a VPC in
+    network.tf or modules/vpc/ still counts. None if neither exists.
+    """
+    return load_sources(root).section_text(filename, SECTION_BLOCKS[filename])
+
+
+class TimedChecks(list):
+    """A check function's result list that notes when each check was appended.
+
+    grade() turns the gaps between appends into per-check durations.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.times = [time.perf_counter()]
+
+    def append(self, check):
+        super().append(check)
+        self.times.append(time.perf_counter())
+
+    def durations(self):
+        return [end - start for start, end in zip(self.times, self.times[1:])]
 
 
 def check_file_exists(filename):
@@ -56,6 +151,7 @@ def check_file_exists(filename):
     return os.path.isfile(filename)
 
 
+@tracing.traced("parse")
 def strip_comments(content):
     """Remove commented lines from Terraform content.
 
@@ -94,13 +190,14 @@ def check_pattern(content, pattern, flags=0):
     return bool(re.search(pattern, uncommented, flags))
 
 
-def check_provider_config():
+@tracing.traced("checks")
+def check_provider_config(root=None):
     """Check main.tf for provider configuration."""
-    content = read_file('main.tf')
+    content = read_section('main.tf', root)
     if content is None:
         return 0, ["main.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 5
 
@@ -135,13 +232,14 @@ def check_provider_config():
     return points, checks
 
 
-def check_vpc_config():
+@tracing.traced("checks")
+def check_vpc_config(root=None):
     """Check vpc.tf for VPC and networking configuration."""
-    content = read_file('vpc.tf')
+    content = read_section('vpc.tf', root)
     if content is None:
         return 0, ["vpc.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 20
 
@@ -204,13 +302,14 @@ def check_vpc_config():
     return points, checks
 
 
-def check_security_config():
+@tracing.traced("checks")
+def check_security_config(root=None):
     """Check security.tf for security groups."""
-    content = read_file('security.tf')
+    content = read_section('security.tf', root)
     if content is None:
         return 0, ["security.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 10
 
@@ -245,13 +344,14 @@ def check_security_config():
     return points, checks
 
 
-def check_alb_config():
+@tracing.traced("checks")
+def check_alb_config(root=None):
     """Check alb.tf for load balancer configuration."""
-    content = read_file('alb.tf')
+    content = read_section('alb.tf', root)
     if content is None:
         return 0, ["alb.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 20
 
@@ -286,13 +386,14 @@ def check_alb_config():
     return points, checks
 
 
-def check_ec2_config():
+@tracing.traced("checks")
+def check_ec2_config(root=None):
     """Check ec2.tf for EC2 instances."""
-    content = read_file('ec2.tf')
+    content = read_section('ec2.tf', root)
     if content is None:
         return 0, ["ec2.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 25
 
@@ -334,13 +435,14 @@ def check_ec2_config():
     return points, checks
 
 
-def check_rds_config():
+@tracing.traced("checks")
+def check_rds_config(root=None):
     """Check rds.tf for RDS configuration."""
-    content = read_file('rds.tf')
+    content = read_section('rds.tf', root)
     if content is None:
         return 0, ["rds.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 15
 
@@ -375,13 +477,14 @@ def check_rds_config():
     return points, checks
 
 
-def check_variables_config():
+@tracing.traced("checks")
+def check_variables_config(root=None):
     """Check variables.tf for input variables."""
-    content = read_file('variables.tf')
+    content = read_section('variables.tf', root)
     if content is None:
         return 0, ["variables.tf not found"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
     max_points = 5
 
@@ -409,13 +512,14 @@ def check_variables_config():
     return points, checks
 
 
-def check_ecs_config():
+@tracing.traced("checks")
+def check_ecs_config(root=None):
     """Check ecs.tf for ECS configuration (bonus)."""
-    content = read_file('ecs.tf')
+    content = read_section('ecs.tf', root)
     if content is None:
         return 0, ["ecs.tf not found (optional for ECS path)"]
 
-    checks = []
+    checks = TimedChecks()
     points = 0
 
     # Check ECS cluster
@@ -436,15 +540,148 @@ def check_ecs_config():
     return points, checks
 
 
-def aws_cli_query(service_cmd, query=None):
-    """Run an AWS CLI command against LocalStack and return parsed JSON output."""
-    endpoint = "http://localhost:4566"
+# Plan-based equivalents of the check_*_config() functions, used by --plan.
+# Each check is (label, label when failing, points, test(index)). Labels and
+# points match the source checks so both modes report the same way.
+PLAN_CHECKS = {
+    "provider": [
+        ("terraform block", "terraform block", 1, lambda ix: ix.terraform_version is not None),
+        ("required_providers", "required_providers", 1,
+         lambda ix: bool(ix.providers.get("aws", {}).get("full_name"))),
+        ("AWS provider", "AWS provider", 2, lambda ix: "aws" in ix.providers),
+        ("default_tags", "default_tags (optional)", 1,
+         lambda ix: "default_tags" in ix.providers.get("aws", {}).get("expressions", [])),
+    ],
+    "vpc": [
+        ("aws_vpc resource", "aws_vpc resource", 3, lambda ix: ix.has("aws_vpc")),
+        ("aws_internet_gateway", "aws_internet_gateway", 2, lambda ix: ix.has("aws_internet_gateway")),
+        ("public subnets", "public subnets", 3, lambda ix: ix.has("aws_subnet", "public")),
+        ("private app subnets", "private app subnets", 3, lambda ix: ix.has("aws_subnet", "private_app")),
+        ("private database subnets", "private database subnets", 3,
+         lambda ix: ix.has("aws_subnet", "private_db")),
+        ("aws_nat_gateway", "aws_nat_gateway", 3, lambda ix: ix.has("aws_nat_gateway")),
+        ("route tables", "route tables", 2, lambda ix: ix.has("aws_route_table")),
+        ("route table associations", "route table associations", 1,
+         lambda ix: ix.has("aws_route_table_association")),
+    ],
+    "security": [
+        ("ALB security group", "ALB security group", 3, lambda ix: ix.has("aws_security_group", "alb")),
+        ("Web tier security group", "Web tier security group", 2, lambda ix: ix.has("aws_security_group", "web")),
+        ("App tier security group", "App tier security group", 2, lambda ix: ix.has("aws_security_group", "app")),
+        ("Database security group", "Database security group", 3, lambda ix: ix.has("aws_security_group", "db")),
+    ],
+    "alb": [
+        ("aws_lb resource", "aws_lb resource", 6, lambda ix: ix.has("aws_lb", "main")),
+        ("target group", "target group", 5, lambda ix: ix.has("aws_lb_target_group")),
+        ("health check configuration", "health check configuration", 4,
+         lambda ix: ix.configures("aws_lb_target_group", "health_check")),
+        ("ALB listener", "ALB listener", 5, lambda ix: ix.has("aws_lb_listener")),
+    ],
+    "ec2": [
+        ("AMI data source", "AMI data source", 3, lambda ix: ix.has("aws_ami", mode="data")),
+        ("web tier instances", "web tier instances", 8, lambda ix: ix.has("aws_instance", "web")),
+        ("app tier instances", "app tier instances", 8, lambda ix: ix.has("aws_instance", "app")),
+        ("user_data scripts", "user_data scripts", 4,
+         lambda ix: ix.configures("aws_instance", "user_data") or ix.configures("aws_instance", "user_data_base64")),
+        ("security group attachment", "security group attachment", 2,
+         lambda ix: ix.configures("aws_instance", "vpc_security_group_ids")),
+    ],
+    "rds": [
+        ("DB subnet group", "DB subnet group", 4, lambda ix: ix.has("aws_db_subnet_group")),
+        ("RDS instance", "RDS instance", 6, lambda ix: ix.has("aws_db_instance")),
+        ("database engine", "database engine", 2,
+         lambda ix: any(r["values"].get("engine") in ("mysql", "postgres") for r in ix.instances("aws_db_instance"))),
+        ("security group attachment", "security group attachment", 3,
+         lambda ix: ix.configures("aws_db_instance", "vpc_security_group_ids")),
+    ],
+    "ecs": [
+        ("ECS cluster", None, 5, lambda ix: ix.has("aws_ecs_cluster")),
+        ("ECS task definitions", None, 5, lambda ix: ix.has("aws_ecs_task_definition")),
+        ("ECS services", None, 5, lambda ix: ix.has("aws_ecs_service")),
+    ],
+}
+
+
+@tracing.traced("checks", describe=lambda index, section: {"section": section})
+def check_plan_section(index, section):
+    """Score one section against an indexed plan (see PLAN_CHECKS)."""
+    checks = TimedChecks()
+    points = 0
+    for label, fail_label, value, test in PLAN_CHECKS[section]:
+        if test(index):
+            checks.append((label, True))
+            points += value
+        elif fail_label is not None:
+            checks.append((fail_label, False))
+    return points, checks
+
+
+@tracing.traced("checks")
+def check_variables_plan(index):
+    """Score input variables declared in the plan's configuration."""
+    checks = TimedChecks()
+    points = 0
+    var_count = len(index.variable_descriptions)
+
+    if var_count >= 10:
+        checks.append((f"variables defined ({var_count})", True))
+        points += 3
+    elif var_count >= 5:
+        checks.append((f"variables defined ({var_count})", True))
+        points += 2
+    else:
+        checks.append((f"variables defined ({var_count}, need more)", False))
+
+    desc_count = sum(1 for d in index.variable_descriptions.values() if d)
+    if desc_count >= var_count * 0.8:
+        checks.append(("variable descriptions", True))
+        points += 2
+    else:
+        checks.append(("variable descriptions (incomplete)", False))
+        points += 1
+
+    return points, checks
+
+
+@tracing.traced("parse")
+def load_config(var_files=(), root='.'):
+    """Statically evaluate the Terraform configuration in `root`.
+
+    Resolves variable defaults, terraform.tfvars, *.auto.tfvars, TF_VAR_*
+    and any extra var files, so count/for_each expressions such as
+    `var.use_ecs ? 0 : var.web_instance_count` can be expanded without
+    running `terraform plan`.
+    """
+    return TerraformConfig.load(root, var_files)
+
+
+def expected_count(counts, resource_type, fallback):
+    """Return the predicted instance count for a resource type.
+
+    Falls back to the reference design's count when the type is not
+    declared yet or its count depends on values known only after apply.
+    """
+    value = counts.get(resource_type)
+    return fallback if value is None else value
+
+
+@tracing.traced("subprocess", describe=lambda service_cmd, query=None, target=None: {"cmd": " ".join(service_cmd)})
+def aws_cli_query(service_cmd, query=None, target=None):
+    """Run an AWS CLI command against LocalStack and return parsed JSON output.
+
+    `target` (an awstargets.Target) selects the profile and region; the
+    region defaults to us-east-1. Calls wait for a slot in AWS_LIMITER.
+    """
+    region = target.region if target is not None and target.region else 'us-east-1'
     cmd = [
-        'aws', '--endpoint-url', endpoint,
-        '--region', 'us-east-1',
+        'aws', '--endpoint-url', LOCALSTACK_ENDPOINT,
+        '--region', region,
         '--no-cli-pager',
         '--output', 'json',
-    ] + service_cmd
+    ]
+    if target is not None and target.profile:
+        cmd += ['--profile', target.profile]
+    cmd += service_cmd
     if query:
         cmd += ['--query', query]
 
@@ -453,7 +690,8 @@ def aws_cli_query(service_cmd, query=None):
         env.setdefault('AWS_ACCESS_KEY_ID', 'test')
         env.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
         env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=15, env=env)
+        with AWS_LIMITER.slot(target):
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15, env=env)
         if result.returncode == 0 and result.stdout.strip():
             return json.loads(result.stdout)
         return None
@@ -461,93 +699,97 @@ def aws_cli_query(service_cmd, query=None):
         return None
 
 
-def verify_localstack_resources():
-    """Verify deployed resources in LocalStack using AWS CLI."""
-    print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.CYAN}  LocalStack Infrastructure Verification{Colors.END}")
-    print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
-
-    # Check if LocalStack is reachable
+def _timed_query(timings, name, cmd, query, target):
+    started = time.perf_counter()
     try:
-        import urllib.request
-        resp = urllib.request.urlopen('http://localhost:4566/_localstack/health', timeout=5)
-        health = json.loads(resp.read().decode())
-        print(f"  {Colors.GREEN}[OK]{Colors.END} LocalStack is running")
-    except Exception:
-        print(f"  {Colors.RED}[X]{Colors.END} LocalStack is not reachable at localhost:4566")
-        print(f"      Run: docker-compose up -d")
-        return
+        return aws_cli_query(cmd, query, target)
+    finally:
+        timings[name] = time.perf_counter() - started
 
-    # Check AWS CLI availability
-    try:
-        subprocess.run(['aws', '--version'], capture_output=True, timeout=5)
-    except FileNotFoundError:
-        print(f"  {Colors.RED}[X]{Colors.END} AWS CLI not installed (needed for --verify)")
-        print(f"      Install: https://docs.aws.amazon.com/cli/latest/userguide/getting-started-install.html")
-        return
 
-    all_ok = True
+def fetch_verification_data(target=None, timings=None):
+    """Run every VERIFY_QUERIES query for one target concurrently.
+
+    If `timings` is a dict, each query's duration in seconds is stored in
+    it under the query's name.
+    """
+    timings = {} if timings is None else timings
+    with ThreadPoolExecutor(max_workers=len(VERIFY_QUERIES)) as pool:
+        futures = {name: pool.submit(_timed_query, timings, name, cmd, query, target)
+                   for name, cmd, query in VERIFY_QUERIES}
+    return {name: future.result() for name, future in futures.items()}
+
+
+# One --verify check: `query` is the VERIFY_QUERIES entry it is based on,
+# `status` one of "ok", "warn", "fail" or "skip", and `details` extra lines
+VerifyCheck = namedtuple("VerifyCheck", "name query status message details")
+VERIFY_MARKERS = {
+    "ok": f"{Colors.GREEN}[OK]{Colors.END}",
+    "warn": f"{Colors.YELLOW}[!]{Colors.END}",
+    "fail": f"{Colors.RED}[X]{Colors.END}",
+    "skip": f"{Colors.YELLOW}[SKIP]{Colors.END}",
+}
+
+
+def verification_checks(data, expect):
+    """Evaluate one target's fetched resources; returns a list of VerifyCheck."""
+    checks = []
 
     # 1. Check VPCs
-    vpcs = aws_cli_query(['ec2', 'describe-vpcs'], 'Vpcs[*].{Id:VpcId,Cidr:CidrBlock}')
+    vpcs = data['vpcs']
     if vpcs and len(vpcs) > 0:
-        print(f"  {Colors.GREEN}[OK]{Colors.END} VPC created ({len(vpcs)} found)")
-        for v in vpcs:
-            print(f"      - {v.get('Id', 'N/A')} ({v.get('Cidr', 'N/A')})")
+        checks.append(VerifyCheck("VPCs", "vpcs", "ok", f"VPC created ({len(vpcs)} found)",
+                                  [f"- {v.get('Id', 'N/A')} ({v.get('Cidr', 'N/A')})" for v in vpcs]))
     else:
-        print(f"  {Colors.RED}[X]{Colors.END} No VPCs found")
-        all_ok = False
+        checks.append(VerifyCheck("VPCs", "vpcs", "fail", "No VPCs found", []))
 
     # 2. Check Subnets
-    subnets = aws_cli_query(['ec2', 'describe-subnets'], 'Subnets[*].{Id:SubnetId,Cidr:CidrBlock,AZ:AvailabilityZone}')
-    if subnets and len(subnets) >= 6:
-        print(f"  {Colors.GREEN}[OK]{Colors.END} Subnets created ({len(subnets)} found, expected 6)")
+    subnets = data['subnets']
+    if subnets and len(subnets) >= expect['expected_subnets']:
+        checks.append(VerifyCheck("Subnets", "subnets", "ok",
+                                  f"Subnets created ({len(subnets)} found, expected {expect['expected_subnets']})", []))
     elif subnets and len(subnets) > 0:
-        print(f"  {Colors.YELLOW}[!]{Colors.END} Subnets created ({len(subnets)} found, expected 6)")
-        all_ok = False
+        checks.append(VerifyCheck("Subnets", "subnets", "warn",
+                                  f"Subnets created ({len(subnets)} found, expected {expect['expected_subnets']})", []))
     else:
-        print(f"  {Colors.RED}[X]{Colors.END} No subnets found")
-        all_ok = False
+        checks.append(VerifyCheck("Subnets", "subnets", "fail", "No subnets found", []))
 
     # 3. Check Security Groups (excluding default)
-    sgs = aws_cli_query(['ec2', 'describe-security-groups'],
-                        'SecurityGroups[?GroupName!=`default`].{Id:GroupId,Name:GroupName}')
-    if sgs and len(sgs) >= 4:
-        print(f"  {Colors.GREEN}[OK]{Colors.END} Security groups created ({len(sgs)} found)")
-        for sg in sgs:
-            print(f"      - {sg.get('Name', 'N/A')} ({sg.get('Id', 'N/A')})")
+    sgs = data['security_groups']
+    if sgs and len(sgs) >= expect['expected_sgs']:
+        checks.append(VerifyCheck("Security groups", "security_groups", "ok",
+                                  f"Security groups created ({len(sgs)} found)",
+                                  [f"- {sg.get('Name', 'N/A')} ({sg.get('Id', 'N/A')})" for sg in sgs]))
     elif sgs and len(sgs) > 0:
-        print(f"  {Colors.YELLOW}[!]{Colors.END} Security groups ({len(sgs)} found, expected 4: alb, web, app, db)")
-        all_ok = False
+        checks.append(VerifyCheck("Security groups", "security_groups", "warn",
+                                  f"Security groups ({len(sgs)} found, expected {expect['expected_sgs']}: "
+                                  f"{expect['sg_detail']})", []))
     else:
-        print(f"  {Colors.RED}[X]{Colors.END} No security groups found")
-        all_ok = False
+        checks.append(VerifyCheck("Security groups", "security_groups", "fail", "No security groups found", []))
 
     # 4. Check ALB (Pro-only service — gracefully handle 501)
-    albs = aws_cli_query(['elbv2', 'describe-load-balancers'],
-                         'LoadBalancers[*].{Name:LoadBalancerName,DNS:DNSName,State:State.Code}')
+    albs = data['load_balancers']
     if albs and len(albs) > 0:
         alb = albs[0]
-        print(f"  {Colors.GREEN}[OK]{Colors.END} ALB created: {alb.get('Name', 'N/A')}")
-        print(f"      DNS: {alb.get('DNS', 'N/A')}")
-        print(f"      State: {alb.get('State', 'N/A')}")
+        checks.append(VerifyCheck("ALB", "load_balancers", "ok", f"ALB created: {alb.get('Name', 'N/A')}",
+                                  [f"DNS: {alb.get('DNS', 'N/A')}", f"State: {alb.get('State', 'N/A')}"]))
     else:
-        print(f"  {Colors.YELLOW}[SKIP]{Colors.END} ALB — elbv2 is a LocalStack Pro feature (not available in Community)")
-        print(f"      Validate with: python run.py (checks alb.tf code)")
+        checks.append(VerifyCheck("ALB", "load_balancers", "skip",
+                                  "ALB — elbv2 is a LocalStack Pro feature (not available in Community)",
+                                  ["Validate with: python run.py (checks alb.tf code)"]))
 
     # 5. Check Target Groups (Pro-only service)
-    tgs = aws_cli_query(['elbv2', 'describe-target-groups'],
-                        'TargetGroups[*].{Name:TargetGroupName,Port:Port,Protocol:Protocol}')
+    tgs = data['target_groups']
     if tgs and len(tgs) > 0:
         tg = tgs[0]
-        print(f"  {Colors.GREEN}[OK]{Colors.END} Target group created: {tg.get('Name', 'N/A')} (port {tg.get('Port', 'N/A')})")
+        checks.append(VerifyCheck("Target groups", "target_groups", "ok",
+                                  f"Target group created: {tg.get('Name', 'N/A')} (port {tg.get('Port', 'N/A')})", []))
     else:
-        print(f"  {Colors.YELLOW}[SKIP]{Colors.END} Target groups — elbv2 is a LocalStack Pro feature")
+        checks.append(VerifyCheck("Target groups", "target_groups", "skip",
+                                  "Target groups — elbv2 is a LocalStack Pro feature", []))
 
     # 6. Check EC2 instances
-    instances = aws_cli_query(['ec2', 'describe-instances',
-                               '--filters', 'Name=instance-state-name,Values=running'],
-                              'Reservations[*].Instances[*].{Id:InstanceId,Type:InstanceType,IP:PrivateIpAddress}')
+    instances = data['instances']
     # Flatten the nested list
     flat_instances = []
     if instances:
@@ -557,26 +799,133 @@ def verify_localstack_resources():
             elif isinstance(reservation, dict):
                 flat_instances.append(reservation)
 
-    if flat_instances and len(flat_instances) >= 2:
-        print(f"  {Colors.GREEN}[OK]{Colors.END} EC2 instances running ({len(flat_instances)} found)")
-        for inst in flat_instances:
-            print(f"      - {inst.get('Id', 'N/A')} ({inst.get('Type', 'N/A')}, IP: {inst.get('IP', 'N/A')})")
+    if expect['expected_instances'] == 0:
+        checks.append(VerifyCheck("EC2 instances", "instances", "ok",
+                                  f"No EC2 instances expected ({len(flat_instances)} found, compute runs on ECS)", []))
+    elif flat_instances and len(flat_instances) >= expect['expected_instances']:
+        checks.append(VerifyCheck("EC2 instances", "instances", "ok",
+                                  f"EC2 instances running ({len(flat_instances)} found)",
+                                  [f"- {inst.get('Id', 'N/A')} ({inst.get('Type', 'N/A')}, IP: {inst.get('IP', 'N/A')})"
+                                   for inst in flat_instances]))
     elif flat_instances:
-        print(f"  {Colors.YELLOW}[!]{Colors.END} EC2 instances ({len(flat_instances)} found, expected 4: 2 web + 2 app)")
-        all_ok = False
+        checks.append(VerifyCheck("EC2 instances", "instances", "warn",
+                                  f"EC2 instances ({len(flat_instances)} found, expected {expect['expected_instances']}: "
+                                  f"{expect['instance_detail']})", []))
     else:
-        print(f"  {Colors.RED}[X]{Colors.END} No running EC2 instances found")
-        all_ok = False
+        checks.append(VerifyCheck("EC2 instances", "instances", "fail", "No running EC2 instances found", []))
 
     # 7. Check RDS (Pro-only service — gracefully handle 501)
-    dbs = aws_cli_query(['rds', 'describe-db-instances'],
-                        'DBInstances[*].{Id:DBInstanceIdentifier,Engine:Engine,Status:DBInstanceStatus}')
+    dbs = data['databases']
     if dbs and len(dbs) > 0:
         db = dbs[0]
-        print(f"  {Colors.GREEN}[OK]{Colors.END} RDS instance created: {db.get('Id', 'N/A')} ({db.get('Engine', 'N/A')})")
+        checks.append(VerifyCheck("RDS", "databases", "ok",
+                                  f"RDS instance created: {db.get('Id', 'N/A')} ({db.get('Engine', 'N/A')})", []))
+    else:
+        checks.append(VerifyCheck("RDS", "databases", "skip",
+                                  "RDS — rds is a LocalStack Pro feature (not available in Community)",
+                                  ["Validate with: python run.py (checks rds.tf code)"]))
+
+    return checks
+
+
+def verification_passed(checks):
+    """True if no check failed or found fewer resources than expected."""
+    return all(check.status in ("ok", "skip") for check in checks)
+
+
+def report_verification(data, expect):
+    """Print the checks for one target's fetched resources; return True if all passed."""
+    checks = verification_checks(data, expect)
+    for check in checks:
+        print(f"  {VERIFY_MARKERS[check.status]} {check.message}")
+        for line in check.details:
+            print(f"      {line}")
+    return verification_passed(checks)
+
+
+@tracing.traced("verify")
+def verify_localstack_resources(config=None, targets=None, report=None):
+    """Verify deployed resources in LocalStack using AWS CLI.
+
+    Expected counts come from the Terraform configuration (see
+    load_config()), so changing web_instance_count or use_ecs changes
+    what --verify looks for. With several `targets` (profile/region),
+    all of them are queried concurrently and each report is printed as
+    soon as that target finishes. With a gradereport writer as `report`,
+    results go to it instead of being printed.
+    """
+    if config is None:
+        config = load_config()
+    counts = config.expected_counts()
+    by_name = config.expected_counts(by='name')
+    sg_names = [name.split('.', 1)[1] for name in by_name if name.startswith('aws_security_group.')]
+    instance_parts = [f"{n} {name.split('.', 1)[1]}" for name, n in by_name.items()
+                      if name.startswith('aws_instance.') and n is not None]
+    expect = {
+        'expected_subnets': expected_count(counts, 'aws_subnet', 6),
+        'expected_sgs': expected_count(counts, 'aws_security_group', 4),
+        'expected_instances': expected_count(counts, 'aws_instance', 4),
+        'sg_detail': ", ".join(sg_names) if sg_names else "alb, web, app, db",
+        'instance_detail': " + ".join(instance_parts) if instance_parts else "2 web + 2 app",
+    }
+
+    if report is None:
+        print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  LocalStack Infrastructure Verification{Colors.END}")
+        print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
+
+    # Check if LocalStack is reachable
+    try:
+        import urllib.request
+        resp = urllib.request.urlopen(f'{LOCALSTACK_ENDPOINT}/_localstack/health', timeout=5)
+        health = json.loads(resp.read().decode())
+        if report is None:
+            print(f"  {Colors.GREEN}[OK]{Colors.END} LocalStack is running")
+    except Exception:
+        if report is not None:
+            report.error(f"LocalStack is not reachable at {LOCALSTACK_ENDPOINT}")
+            return
+        print(f"  {Colors.RED}[X]{Colors.END} LocalStack is not reachable at {LOCALSTACK_ENDPOINT}")
+        print(f"      Run: docker-compose up -d")
+        return
+
+    # Check AWS CLI availability
+    try:
+        subprocess.run(['aws', '--version'], capture_output=True, timeout=5)
+    except FileNotFoundError:
+        if report is not None:
+            report.error("AWS CLI not installed (needed for --verify)")
+            return
+        print(f"  {Colors.RED}[X]{Colors.END} AWS CLI not installed (needed for --verify)")
+        print(f"      Install: https://docs.aws.amazon.com/cli/latest/userguide/getting-started-install.html")
+        return
+
+    def fetch(target):
+        timings = {}
+        return fetch_verification_data(target, timings), timings
+
+    def report_target(target, data, timings):
+        if report is not None:
+            checks = verification_checks(data, expect)
+            report.verify_target(target.key if target is not None else None, checks, timings)
+            return verification_passed(checks)
+        if target is not None:
+            print(f"\n  {Colors.BOLD}{target.key}{Colors.END}")
+        return report_verification(data, expect)
+
+    started = time.perf_counter()
+    all_ok = True
+    if not targets:
+        all_ok = report_target(None, *fetch(None))
     else:
-        print(f"  {Colors.YELLOW}[SKIP]{Colors.END} RDS — rds is a LocalStack Pro feature (not available in Community)")
-        print(f"      Validate with: python run.py (checks rds.tf code)")
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            futures = {pool.submit(fetch, target): target for target in targets}
+            for future in as_completed(futures):
+                all_ok = report_target(futures[future], *future.result()) and all_ok
+
+    if report is not None:
+        report.verify_result(all_ok, time.perf_counter() - started)
+        return
 
     # Summary
     print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
@@ -591,14 +940,16 @@ def verify_localstack_resources():
     print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
 
 
-def run_terraform_validate():
-    """Run terraform validate to check syntax."""
+@tracing.traced("subprocess", name="terraform validate")
+def run_terraform_validate(root=None):
+    """Run terraform validate in `root` (default the cwd) to check syntax."""
     try:
         result = subprocess.run(
             ['terraform', 'validate', '-json'],
             capture_output=True,
             text=True,
-            timeout=60
+            timeout=60,
+            cwd=root
         )
         if result.returncode == 0:
             return True, "Terraform configuration is valid"
@@ -627,77 +978,176 @@ def print_section(title, points, max_points, checks, verbose=False):
     print(f"  {status} {title} ({points}/{max_points} points)")
 
     if verbose:
-        for check_name, passed in checks:
+        for check_name, passed, *_ in checks:
             if passed:
                 print(f"      {Colors.GREEN}[OK]{Colors.END} {check_name}")
             else:
                 print(f"      {Colors.RED}[X]{Colors.END} {check_name}")
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Check your Terraform 3-Tier challenge progress')
-    parser.add_argument('--verbose', '-v', action='store_true', help='Show detailed output')
-    parser.add_argument('--verify', action='store_true',
-                        help='Verify deployed resources in LocalStack via AWS CLI')
-    args = parser.parse_args()
+MAX_SCORE = 100
 
-    print_header()
+# `seconds` are time.perf_counter() (monotonic) durations, None when not measured
+CheckResult = namedtuple("CheckResult", "name passed seconds", defaults=(None,))
+SectionResult = namedtuple("SectionResult", "title points max_points checks seconds", defaults=(None,))
 
-    # If --verify flag, run infrastructure verification and exit
-    if args.verify:
-        verify_localstack_resources()
-        return 0
 
-    # Determine which path the user is taking
-    ec2_content = read_file('ec2.tf')
-    ecs_content = read_file('ecs.tf')
+class GradeResult(namedtuple("GradeResult", "root path_name use_ecs sections validation plan "
+                                            "validation_seconds seconds", defaults=(None, None))):
+    """Outcome of grade().
 
-    use_ecs = False
-    if ecs_content and check_pattern(ecs_content, r'resource\s+"aws_ecs_cluster"'):
-        # Check if use_ecs is set to true
-        vars_content = read_file('variables.tf')
-        if vars_content and check_pattern(vars_content, r'default\s*=\s*true', re.IGNORECASE):
-            use_ecs = True
+    `sections` is a list of SectionResult, each with CheckResult checks.
+    `validation` is (valid, message) from terraform validate, where valid
+    is True, False or None (terraform missing or validation skipped); it
+    is None when a plan was scored. `plan` is (resource count, Terraform
+    version) for a plan and None for .tf sources. `validation_seconds`
+    and `seconds` time terraform validate and the whole grade.
+    """
 
-    path_name = "ECS (Containerized)" if use_ecs else "EC2 (Traditional)"
-    print(f"  {Colors.CYAN}Path:{Colors.END} {path_name}\n")
-
-    total_points = 0
-    max_total = 100
-
-    # Check each section
-    sections = [
-        ("Provider Config", check_provider_config, 5),
-        ("VPC & Networking", check_vpc_config, 20),
-        ("Security Groups", check_security_config, 10),
-        ("Application Load Balancer", check_alb_config, 20),
-        ("EC2 Instances" if not use_ecs else "ECS Configuration", check_ec2_config if not use_ecs else check_ecs_config, 25),
-        ("RDS Database", check_rds_config, 15),
-        ("Variables", check_variables_config, 5),
+    __slots__ = ()
+
+    @property
+    def score(self):
+        return sum(section.points for section in self.sections)
+
+    @property
+    def complete(self):
+        return self.score == MAX_SCORE
+
+    def to_dict(self):
+        """JSON-serialisable form of the result."""
+        return {
+            "root": self.root,
+            "path": self.path_name,
+            "use_ecs": self.use_ecs,
+            "score": self.score,
+            "max_score": MAX_SCORE,
+            "complete": self.complete,
+            "sections": [
+                {"title": s.title, "points": s.points, "max_points": s.max_points, "seconds": s.seconds,
+                 "checks": [{"name": c.name, "passed": c.passed, "seconds": c.seconds} for c in s.checks]}
+                for s in self.sections
+            ],
+            "validation": (None if self.validation is None else
+                           {"valid": self.validation[0], "message": self.validation[1],
+                            "seconds": self.validation_seconds}),
+            "plan": (None if self.plan is None else
+                     {"resources": self.plan[0], "terraform_version": self.plan[1]}),
+            "seconds": self.seconds,
+        }
+
+
+
+def _source_sections(root, use_ecs):
+    return [
+        ("Provider Config", lambda: check_provider_config(root), 5),
+        ("VPC & Networking", lambda: check_vpc_config(root), 20),
+        ("Security Groups", lambda: check_security_config(root), 10),
+        ("Application Load Balancer", lambda: check_alb_config(root), 20),
+        ("EC2 Instances" if not use_ecs else "ECS Configuration",
+         lambda: check_ecs_config(root) if use_ecs else check_ec2_config(root), 25),
+        ("RDS Database", lambda: check_rds_config(root), 15),
+        ("Variables", lambda: check_variables_config(root), 5),
     ]
 
-    for title, check_func, max_points in sections:
+
+def _plan_sections(index, use_ecs):
+    return [
+        ("Provider Config", lambda: check_plan_section(index, "provider"), 5),
+        ("VPC & Networking", lambda: check_plan_section(index, "vpc"), 20),
+        ("Security Groups", lambda: check_plan_section(index, "security"), 10),
+        ("Application Load Balancer", lambda: check_plan_section(index, "alb"), 20),
+        ("EC2 Instances" if not use_ecs else "ECS Configuration",
+         lambda: check_plan_section(index, "ecs" if use_ecs else "ec2"), 25),
+        ("RDS Database", lambda: check_plan_section(index, "rds"), 15),
+        ("Variables", lambda: check_variables_plan(index), 5),
+    ]
+
+
+def grade(root='.', var_files=(), plan=None, validate=True, on_section=None):
+    """Score the challenge in `root` and return a GradeResult.
+
+    Nothing is printed and the working directory is not used, so one
+    process can grade many submissions, from several threads at once.
+    `plan` scores a planfile or `terraform show -json` output instead of
+    the .tf sources (OSError or PlanFormatError if it cannot be read).
+    With validate=False, `terraform validate` is skipped. `on_section` is
+    called with each SectionResult as soon as it is scored.
+    """
+    started = time.perf_counter()
+    index = None
+    if plan:
+        with tracing.span("load_plan_index", "parse", {"plan": plan}):
+            index = load_plan_index(plan)
+
+    # Determine which path the user is taking
+    use_ecs = False
+    if index is not None:
+        use_ecs = index.variables.get('use_ecs') is True and index.has('aws_ecs_cluster')
+    else:
+        if load_sources(root).has('resource', 'aws_ecs_cluster'):
+            # Check if var.use_ecs resolves to true (default, tfvars or TF_VAR_use_ecs)
+            use_ecs = load_config(var_files, root).variable('use_ecs', False) is True
+
+    sections = []
+    for title, check_func, max_points in (_plan_sections(index, use_ecs) if index is not None
+                                          else _source_sections(root, use_ecs)):
+        section_started = time.perf_counter()
         points, checks = check_func()
-        # Cap points at max_points
-        points = min(points, max_points)
-        total_points += points
-        print_section(title, points, max_points, checks, args.verbose)
+        seconds = time.perf_counter() - section_started
+        durations = checks.durations() if isinstance(checks, TimedChecks) else [None] * len(checks)
+        # A missing file is reported as a bare message
+        checks = [CheckResult(*c, duration) if isinstance(c, tuple) else CheckResult(c, False, duration)
+                  for c, duration in zip(checks, durations)]
+        section = SectionResult(title, min(points, max_points), max_points, checks, seconds)
+        sections.append(section)
+        if on_section is not None:
+            on_section(section)
+
+    validation = plan_info = validation_seconds = None
+    if index is not None:
+        # A plan can only be produced from a valid configuration
+        plan_info = (len(index.resources), index.terraform_version)
+    elif validate:
+        validate_started = time.perf_counter()
+        validation = run_terraform_validate(root)
+        validation_seconds = time.perf_counter() - validate_started
+    else:
+        validation = (None, "Validation skipped")
+
+    path_name = "ECS (Containerized)" if use_ecs else "EC2 (Traditional)"
+    return GradeResult(root, path_name, use_ecs, sections, validation, plan_info,
+                       validation_seconds, time.perf_counter() - started)
+
+
+def render_result(result, verbose=False):
+    """Print a GradeResult the way the CLI always has."""
+    print(f"  {Colors.CYAN}Path:{Colors.END} {result.path_name}\n")
 
-    # Run terraform validate
-    print(f"\n  {Colors.CYAN}Syntax Validation:{Colors.END}")
-    valid, message = run_terraform_validate()
-    if valid is True:
-        print(f"      {Colors.GREEN}[OK]{Colors.END} {message}")
-    elif valid is False:
-        print(f"      {Colors.RED}[X]{Colors.END} {message}")
+    for section in result.sections:
+        print_section(section.title, section.points, section.max_points, section.checks, verbose)
+
+    if result.plan is not None:
+        count, version = result.plan
+        print(f"\n  {Colors.CYAN}Plan:{Colors.END}")
+        print(f"      {Colors.GREEN}[OK]{Colors.END} {count} planned resource instance(s) "
+              f"(Terraform {version or 'unknown'})")
     else:
-        print(f"      {Colors.YELLOW}[?]{Colors.END} {message}")
+        print(f"\n  {Colors.CYAN}Syntax Validation:{Colors.END}")
+        valid, message = result.validation
+        if valid is True:
+            print(f"      {Colors.GREEN}[OK]{Colors.END} {message}")
+        elif valid is False:
+            print(f"      {Colors.RED}[X]{Colors.END} {message}")
+        else:
+            print(f"      {Colors.YELLOW}[?]{Colors.END} {message}")
 
     # Summary
+    total_points = result.score
     print(f"\n{Colors.CYAN}{'='*60}{Colors.END}")
-    print(f"  {Colors.BOLD}Total Score: {total_points}/{max_total}{Colors.END}")
+    print(f"  {Colors.BOLD}Total Score: {total_points}/{MAX_SCORE}{Colors.END}")
 
-    if total_points == max_total:
+    if total_points == MAX_SCORE:
         print(f"  {Colors.GREEN}{Colors.BOLD}CHALLENGE COMPLETE!{Colors.END}")
     elif total_points >= 80:
         print(f"  {Colors.YELLOW}Almost there! Check the failing sections above.{Colors.END}")
@@ -708,8 +1158,116 @@ def main():
 
     print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
 
+
+def _run_report(args, targets, report):
+    """Grade or --verify, streaming results to a gradereport writer."""
+    try:
+        report.begin()
+        if args.verify:
+            verify_localstack_resources(load_config(args.var_file), targets, report)
+            code = 0
+        else:
+            try:
+                result = grade('.', args.var_file, args.plan, on_section=report.section)
+            except BrokenPipeError:
+                raise
+            except (OSError, PlanFormatError) as e:
+                report.error(f"Could not read plan {args.plan}: {e}")
+                code = 1
+            else:
+                report.result(result)
+                code = 0 if result.complete else 1
+        report.end()
+        return code
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) went away; keep the exit-time flush quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check your Terraform 3-Tier challenge progress')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show detailed output')
+    parser.add_argument('--verify', action='store_true',
+                        help='Verify deployed resources in LocalStack via AWS CLI')
+    parser.add_argument('--var-file', action='append', default=[],
+                        help='Extra .tfvars file used to evaluate variables (repeatable)')
+    parser.add_argument('--plan', metavar='PLANFILE',
+                        help='Score a terraform plan (planfile or `terraform show -json` output) '
+                             'instead of the .tf sources')
+    parser.add_argument('--trace', metavar='OUT.json',
+                        help='Record a Chrome trace-event file of this run (open in Perfetto)')
+    parser.add_argument('--target', action='append', default=[], metavar='PROFILE@REGION',
+                        help='With --verify, check this profile/region; repeat or comma-separate for several')
+    parser.add_argument('--max-concurrency', type=int, default=16,
+                        help='AWS CLI calls in flight across all targets (default: 16)')
+    parser.add_argument('--per-target-concurrency', type=int, default=8,
+                        help='AWS CLI calls in flight per target (default: 8)')
+    parser.add_argument('--serve', nargs='?', const='127.0.0.1:8765', metavar='ADDRESS',
+                        help='Run the grading daemon on HOST:PORT or unix:/path (default: 127.0.0.1:8765)')
+    parser.add_argument('--history', nargs='?', const='HEAD', metavar='REV',
+                        help='Score every commit in the git history of REV (default: HEAD) without checkouts')
+    parser.add_argument('--work', metavar='QUEUE',
+                        help='Grade submissions from a shared queue (sqlite:FILE or a directory)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='With --serve or --work, grading worker processes (default: CPU count)')
+    parser.add_argument('--queue', type=int, default=None,
+                        help='With --serve, most submissions queued before rejecting (default: 4 per worker)')
+    parser.add_argument('--format', choices=('text', 'json', 'junit'), default='text',
+                        help='Output format: colored text, JSON Lines or JUnit XML, '
+                             'written as results complete (default: text)')
+    args = parser.parse_args()
+    if args.format != 'text' and (args.serve or args.history or args.work):
+        parser.error('--format applies to grading and --verify only')
+
+    try:
+        targets = parse_targets(args.target)
+    except ValueError as e:
+        parser.error(f'--target: {e}')
+    if args.max_concurrency < 1 or args.per_target_concurrency < 1:
+        parser.error('concurrency limits must be >= 1')
+    AWS_LIMITER.configure(args.max_concurrency, args.per_target_concurrency)
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    if args.format != 'text':
+        import gradereport
+        return _run_report(args, targets, gradereport.open_report(args.format))
+
+    print_header()
+
+    if args.serve:
+        if (args.workers is not None and args.workers < 1) or (args.queue is not None and args.queue < 1):
+            parser.error('--workers and --queue must be >= 1')
+        import gradeserver
+        return gradeserver.serve(args.serve, args.workers, args.queue)
+
+    if args.history:
+        import githistory
+        return githistory.run_history('.', args.history)
+
+    if args.work:
+        if args.workers is not None and args.workers < 1:
+            parser.error('--workers must be >= 1')
+        import gradequeue
+        return gradequeue.work(args.work, args.workers)
+
+    # If --verify flag, run infrastructure verification and exit
+    if args.verify:
+        verify_localstack_resources(load_config(args.var_file), targets)
+        return 0
+
+    try:
+        result = grade('.', args.var_file, args.plan)
+    except (OSError, PlanFormatError) as e:
+        print(f"  {Colors.RED}[X]{Colors.END} Could not read plan {args.plan}: {e}\n")
+        return 1
+
+    render_result(result, args.verbose)
+
     # Return exit code based on completion
-    return 0 if total_points == max_total else 1
+    return 0 if result.complete else 1
 
 
 if __name__ == "__main__":
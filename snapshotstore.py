@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Snapshot Store
+==============================================
+Persists dashboard inventory snapshots to SQLite so the dashboard can
+render the last known state as soon as it starts and show how the tiers
+changed over time.
+
+A snapshot is split into resources (list items with an "id" or "name",
+such as one EC2 instance or one target group, plus one entry per instance
+in the metrics map) and a layout that records where each resource goes.
+Each stored snapshot only holds the resources that were added, changed or
+removed since the previous one. Every KEYFRAME_INTERVAL snapshots a full
+copy is written, so loading any snapshot replays a bounded number of
+deltas. Rows are indexed by resource ID and by collection time.
+
+Retention drops snapshots older than a maximum age or beyond a maximum
+count. The oldest kept snapshot is rewritten as a full copy first, so
+everything that remains can still be loaded.
+
+Usage:
+    store = SnapshotStore("dashboard-snapshots.db")
+    store.save(snapshot, summary={"web": 2, "app": 2})
+    snapshot = store.latest()
+    for row in store.history(limit=100):
+        print(row["collected_at"], row["summary"], row["changed"])
+    store.compact(max_age=7 * 86400, max_snapshots=10000)
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+KEYFRAME_INTERVAL = 50
+# Top-level snapshot sections whose dict values are one resource per key
+KEYED_SECTIONS = ("metrics",)
+# Per-collection fields kept on the snapshot row instead of as resources
+ROW_FIELDS = ("collected_at", "timings")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    collected_at REAL NOT NULL,
+    keyframe INTEGER NOT NULL,
+    layout TEXT,
+    timings TEXT,
+    summary TEXT NOT NULL,
+    added INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_collected_at ON snapshots(collected_at);
+CREATE TABLE IF NOT EXISTS resources (
+    resource_id TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    body TEXT,
+    PRIMARY KEY (resource_id, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resources_snapshot ON resources(snapshot_id);
+"""
+
+
+def _ref(value):
+    return isinstance(value, dict) and len(value) == 1 and "$r" in value
+
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def split_snapshot(snapshot):
+    """Split a snapshot into (layout, {resource_id: json body}).
+
+    Keyed sections and per-collection fields nested deeper (as in a merged
+    multi-target snapshot) are stored as resources too, so the layout
+    only changes when resources come and go.
+    """
+    resources = {}
+
+    def walk(value, path):
+        if isinstance(value, list):
+            out = []
+            for item in value:
+                key = item.get("id") or item.get("name") if isinstance(item, dict) else None
+                if isinstance(key, str) and key:
+                    rid = f"{path}/{key}"
+                    while rid in resources:  # Duplicate names keep their own rows
+                        rid += "'"
+                    resources[rid] = _encode(item)
+                    out.append({"$r": rid})
+                else:
+                    out.append(walk(item, path))
+            return out
+        if isinstance(value, dict):
+            return {k: field(v, f"{path}.{k}", k) for k, v in value.items()}
+        return value
+
+    def field(value, path, name):
+        if name in KEYED_SECTIONS and isinstance(value, dict):
+            for key, item in value.items():
+                resources[f"{path}/{key}"] = _encode(item)
+            return {"$keyed": sorted(value), "$at": path}
+        if name in ROW_FIELDS:
+            resources[path] = _encode(value)
+            return {"$r": path}
+        return walk(value, path)
+
+    layout = {section: field(value, section, section) for section, value in snapshot.items()
+              if section not in ROW_FIELDS}
+    return layout, resources
+
+
+def join_snapshot(layout, resources):
+    """Rebuild a snapshot from its layout and {resource_id: json body}."""
+    def walk(value):
+        if _ref(value):
+            return json.loads(resources[value["$r"]])
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        if isinstance(value, dict):
+            if "$keyed" in value:
+                return {key: json.loads(resources[f"{value['$at']}/{key}"]) for key in value["$keyed"]}
+            return {k: walk(v) for k, v in value.items()}
+        return value
+
+    return {section: walk(value) for section, value in layout.items()}
+
+
+def _inventory_count(resource_ids):
+    skipped = KEYED_SECTIONS + ROW_FIELDS
+    return sum(1 for rid in resource_ids if rid.split("/", 1)[0].rsplit(".", 1)[-1] not in skipped)
+
+
+class SnapshotStore:
+    """Delta-encoded dashboard snapshots in one SQLite file.
+
+    Safe to share between threads; several processes may read while one
+    writes (WAL mode).
+    """
+
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Only applies to a new file
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        # Writer state: resources and layout of the last saved snapshot
+        self._last_id = None
+        self._last_resources = None
+        self._last_layout = None
+        self._since_keyframe = 0
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def _load_writer_state(self):
+        row = self.db.execute("SELECT MAX(id) FROM snapshots").fetchone()
+        self._last_id = row[0]
+        if self._last_id is None:
+            self._last_resources, self._last_layout = {}, None
+            return
+        self._last_layout, self._last_resources = self._state_at(self._last_id)
+        keyframe = self.db.execute("SELECT MAX(id) FROM snapshots WHERE keyframe = 1").fetchone()[0]
+        self._since_keyframe = self.db.execute(
+            "SELECT COUNT(*) FROM snapshots WHERE id > ?", (keyframe or 0,)).fetchone()[0]
+
+    def _state_at(self, snapshot_id):
+        """Return (layout, resources) as of `snapshot_id` by replaying deltas."""
+        keyframe = self.db.execute(
+            "SELECT MAX(id) FROM snapshots WHERE keyframe = 1 AND id <= ?", (snapshot_id,)).fetchone()[0]
+        layout = self.db.execute(
+            "SELECT layout FROM snapshots WHERE layout IS NOT NULL AND id <= ? ORDER BY id DESC LIMIT 1",
+            (snapshot_id,)).fetchone()
+        resources = {}
+        rows = self.db.execute(
+            "SELECT resource_id, body FROM resources WHERE snapshot_id BETWEEN ? AND ? ORDER BY snapshot_id",
+            (keyframe or 0, snapshot_id))
+        for rid, body in rows:
+            if body is None:
+                resources.pop(rid, None)
+            else:
+                resources[rid] = body
+        return json.loads(layout[0]) if layout else {}, resources
+
+    def save(self, snapshot, summary=None):
+        """Store `snapshot` as a delta against the previous one; return its id."""
+        layout, resources = split_snapshot(snapshot)
+        with self._lock, self.db:
+            if self._last_resources is None:
+                self._load_writer_state()
+            previous = self._last_resources
+            keyframe = self._last_id is None or self._since_keyframe + 1 >= self.keyframe_interval
+            # Metrics churn on every collection, so the counts cover inventory only
+            added = [rid for rid in resources if rid not in previous]
+            changed = [rid for rid in resources if rid in previous and previous[rid] != resources[rid]]
+            removed = [rid for rid in previous if rid not in resources]
+            layout_json = json.dumps(layout, separators=(",", ":"))
+            cursor = self.db.execute(
+                "INSERT INTO snapshots (collected_at, keyframe, layout, timings, summary, added, changed, removed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (snapshot.get("collected_at") or time.time(), int(keyframe),
+                 layout_json if keyframe or layout_json != self._last_layout_json() else None,
+                 json.dumps(snapshot.get("timings", [])), json.dumps(summary or {}),
+                 _inventory_count(added), _inventory_count(changed), _inventory_count(removed)))
+            snapshot_id = cursor.lastrowid
+            if keyframe:
+                rows = [(rid, snapshot_id, body) for rid, body in resources.items()]
+            else:
+                rows = [(rid, snapshot_id, resources[rid]) for rid in added + changed]
+                rows += [(rid, snapshot_id, None) for rid in removed]
+            self.db.executemany("INSERT INTO resources (resource_id, snapshot_id, body) VALUES (?, ?, ?)", rows)
+            self._last_id = snapshot_id
+            self._last_resources = resources
+            self._last_layout = layout
+            self._since_keyframe = 0 if keyframe else self._since_keyframe + 1
+        return snapshot_id
+
+    def _last_layout_json(self):
+        if self._last_layout is None:
+            return None
+        return json.dumps(self._last_layout, separators=(",", ":"))
+
+    def load(self, snapshot_id):
+        """Return the snapshot stored as `snapshot_id`, or None."""
+        with self._lock:
+            row = self.db.execute("SELECT collected_at, timings FROM snapshots WHERE id = ?",
+                                  (snapshot_id,)).fetchone()
+            if row is None:
+                return None
+            layout, resources = self._state_at(snapshot_id)
+        snapshot = join_snapshot(layout, resources)
+        snapshot["collected_at"] = row[0]
+        snapshot["timings"] = json.loads(row[1] or "[]")
+        return snapshot
+
+    def latest(self):
+        """Return the most recent snapshot, or None for an empty store."""
+        with self._lock:
+            row = self.db.execute("SELECT MAX(id) FROM snapshots").fetchone()
+        return self.load(row[0]) if row[0] is not None else None
+
+    def history(self, limit=200, since=None):
+        """Return the newest `limit` snapshot rows (oldest first), without resources.
+
+        Each row has id, collected_at, summary, and added/changed/removed
+        counts of inventory resources (not metrics) against the snapshot
+        before it.
+        """
+        query = "SELECT id, collected_at, keyframe, summary, added, changed, removed FROM snapshots"
+        params = []
+        if since is not None:
+            query += " WHERE collected_at >= ?"
+            params.append(since)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.db.execute(query, params).fetchall()
+        return [{"id": r[0], "collected_at": r[1], "keyframe": bool(r[2]), "summary": json.loads(r[3]),
+                 "added": r[4], "changed": r[5], "removed": r[6]} for r in reversed(rows)]
+
+    def changes(self, snapshot_id):
+        """Return the resource IDs a snapshot changed, as {"added"/"changed"/"removed": [...]}."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT r.resource_id, r.body IS NULL, "
+                "(SELECT p.body IS NOT NULL FROM resources p WHERE p.resource_id = r.resource_id "
+                "AND p.snapshot_id < r.snapshot_id ORDER BY p.snapshot_id DESC LIMIT 1) "
+                "FROM resources r JOIN snapshots s ON s.id = r.snapshot_id "
+                "WHERE r.snapshot_id = ? AND s.keyframe = 0", (snapshot_id,)).fetchall()
+        result = {"added": [], "changed": [], "removed": []}
+        for rid, removed, existed in rows:
+            result["removed" if removed else "changed" if existed else "added"].append(rid)
+        return result
+
+    def resource_history(self, resource_id, limit=100):
+        """Return [(collected_at, value or None)] for every recorded change to one resource."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT s.collected_at, r.body FROM resources r JOIN snapshots s ON s.id = r.snapshot_id "
+                "WHERE r.resource_id = ? ORDER BY r.snapshot_id DESC LIMIT ?", (resource_id, limit)).fetchall()
+        history, last = [], object()
+        for collected_at, body in reversed(rows):
+            if body != last:  # Keyframes repeat unchanged resources
+                history.append((collected_at, json.loads(body) if body is not None else None))
+            last = body
+        return history
+
+    def compact(self, max_age=None, max_snapshots=None):
+        """Drop snapshots older than `max_age` seconds or beyond the newest `max_snapshots`.
+
+        Returns the number of snapshots removed.
+        """
+        with self._lock:
+            cutoff = None
+            if max_age is not None:
+                row = self.db.execute("SELECT MIN(id) FROM snapshots WHERE collected_at >= ?",
+                                      (time.time() - max_age,)).fetchone()
+                cutoff = row[0]
+                if cutoff is None:  # Everything is older; keep the latest one
+                    cutoff = self.db.execute("SELECT MAX(id) FROM snapshots").fetchone()[0]
+            if max_snapshots:
+                row = self.db.execute("SELECT id FROM snapshots ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                      (max_snapshots - 1,)).fetchone()
+                if row is not None:
+                    cutoff = max(cutoff or 0, row[0])
+            if cutoff is None:
+                return 0
+            oldest = self.db.execute("SELECT MIN(id) FROM snapshots").fetchone()[0]
+            if oldest is None or oldest >= cutoff:
+                return 0
+            with self.db:
+                # Rewrite the oldest kept snapshot as a full copy before
+                # dropping the deltas it depends on
+                keyframe = self.db.execute("SELECT keyframe FROM snapshots WHERE id = ?", (cutoff,)).fetchone()[0]
+                if not keyframe:
+                    layout, resources = self._state_at(cutoff)
+                    self.db.execute("DELETE FROM resources WHERE snapshot_id = ?", (cutoff,))
+                    self.db.executemany("INSERT INTO resources (resource_id, snapshot_id, body) VALUES (?, ?, ?)",
+                                        [(rid, cutoff, body) for rid, body in resources.items()])
+                    self.db.execute("UPDATE snapshots SET keyframe = 1, layout = ? WHERE id = ?",
+                                    (json.dumps(layout, separators=(",", ":")), cutoff))
+                self.db.execute("DELETE FROM resources WHERE snapshot_id < ?", (cutoff,))
+                removed = self.db.execute("DELETE FROM snapshots WHERE id < ?", (cutoff,)).rowcount
+            self.db.execute("PRAGMA incremental_vacuum")
+            return removed
@@ -0,0 +1,1263 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Static Configuration Reader
+=====================================================================
+A small HCL reader and expression evaluator used by run.py.
+
+It understands enough of the Terraform language to answer "what would
+`terraform plan` create?" without running Terraform: variable defaults,
+terraform.tfvars / *.auto.tfvars / TF_VAR_* overrides, locals, `count`
+and `for_each`, conditionals, and the handful of functions the challenge
+files use (length, cidrsubnet, ...). Anything that depends on a real
+provider (resource attributes, data sources) evaluates to UNKNOWN.
+
+Usage:
+    python tfconfig.py                  # Print the expected resource set
+    python tfconfig.py --var-file x.tfvars
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import ipaddress
+import argparse
+from collections import namedtuple
+
+
+class HCLSyntaxError(Exception):
+    """Raised when a .tf file cannot be parsed."""
+
+
+class _UnknownType:
+    """Placeholder for values only known after apply."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __repr__(self):
+        return "UNKNOWN"
+
+    def __bool__(self):
+        return False
+
+
+UNKNOWN = _UnknownType()
+
+# A parsed block: `resource "aws_vpc" "main" { ... }`
+#   kind       - block type ("resource", "variable", "health_check", ...)
+#   labels     - tuple of block labels
+#   attributes - dict of attribute name -> expression AST
+#   blocks     - list of nested Block
+#   filename   - file the block was read from
+#   line       - 1-based line of the block header
+Block = namedtuple("Block", "kind labels attributes blocks filename line")
+
+# One expanded resource instance, e.g. aws_subnet.public[1]
+ResourceInstance = namedtuple("ResourceInstance", "address type name key mode block")
+
+
+# =============================================================================
+# Lexer
+# =============================================================================
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>[ \t\r]+)
+  | (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<nl>\n)
+  | (?P<heredoc><<(?P<indent>-?)(?P<marker>[A-Za-z_][A-Za-z0-9_-]*)[ \t]*\r?\n)
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_-]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||=>|\.\.\.|[{}\[\]().,=?:!<>+\-*/%])
+  | (?P<quote>")
+""", re.S | re.X)
+
+
+def _scan_quoted(text, pos):
+    """Return the index just past the closing quote of a string at `pos`.
+
+    `pos` points at the opening quote. Interpolations (`${ ... }`) may
+    themselves contain quoted strings, so braces and quotes are tracked.
+    """
+    i = pos + 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '"':
+            return i + 1
+        if c == '\n':
+            break
+        if c in '$%' and text.startswith(c + '{', i + 1):
+            i += 3
+            continue
+        if c in '$%' and text.startswith('{', i + 1):
+            i = _scan_interpolation(text, i + 2)
+            continue
+        i += 1
+    raise HCLSyntaxError(f"unterminated string at offset {pos}")
+
+
+def _scan_interpolation(text, pos):
+    """Return the index just past the `}` closing an interpolation body."""
+    depth = 1
+    i = pos
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '"':
+            i = _scan_quoted(text, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise HCLSyntaxError(f"unterminated interpolation at offset {pos}")
+
+
+def tokenize(text):
+    """Split HCL source into (kind, value, offset) tokens.
+
+    Comments and horizontal whitespace are dropped; newlines are kept
+    because they terminate attributes. Strings and heredocs are returned
+    as ("string", raw_template, offset) with escapes still in place.
+    """
+    tokens = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise HCLSyntaxError(f"unexpected character {text[pos]!r} at offset {pos}")
+        kind = m.lastgroup
+        if kind in ("ws", "comment"):
+            pos = m.end()
+            continue
+        if kind == "quote":
+            end = _scan_quoted(text, pos)
+            tokens.append(("string", text[pos + 1:end - 1], pos))
+            pos = end
+            continue
+        if kind == "heredoc":
+            indent, marker = m.group("indent") == "-", m.group("marker")
+            body_start = m.end()
+            end_re = re.compile(r"^[ \t]*" + re.escape(marker) + r"[ \t]*\r?$", re.M)
+            end_m = end_re.search(text, body_start)
+            if not end_m:
+                raise HCLSyntaxError(f"unterminated heredoc {marker} at offset {pos}")
+            body = text[body_start:end_m.start()]
+            if indent:
+                body = _dedent(body)
+            tokens.append(("heredoc", body, pos))
+            pos = end_m.end()
+            continue
+        tokens.append((kind, m.group(kind), pos))
+        pos = m.end()
+    tokens.append(("eof", None, n))
+    return tokens
+
+
+def _dedent(body):
+    lines = body.split("\n")
+    widths = [len(l) - len(l.lstrip(" \t")) for l in lines if l.strip()]
+    cut = min(widths) if widths else 0
+    return "\n".join(l[cut:] for l in lines)
+
+
+# =============================================================================
+# Parser
+# =============================================================================
+#
+# Expressions are parsed into tuples:
+#   ("lit", value)                 ("tmpl", [parts])
+#   ("ref", name)                  ("attr", expr, name)
+#   ("index", expr, key_expr)      ("splat", expr, [traversal ops])
+#   ("call", name, [args], expand) ("tuple", [items])
+#   ("object", [(key, value)])     ("cond", test, true, false)
+#   ("binop", op, left, right)     ("unop", op, expr)
+#   ("for", kind, key_var, val_var, coll, key_expr, val_expr, cond, group)
+
+_BINARY_PRECEDENCE = [
+    ("||",),
+    ("&&",),
+    ("==", "!="),
+    ("<", ">", "<=", ">="),
+    ("+", "-"),
+    ("*", "/", "%"),
+]
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+class _Parser:
+    def __init__(self, tokens, filename=""):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+        self.filename = filename
+
+    # -- token helpers --------------------------------------------------------
+
+    def _skip_newlines(self):
+        while self.tokens[self.pos][0] == "nl":
+            self.pos += 1
+
+    def peek(self, offset=0):
+        if self.depth:
+            self._skip_newlines()
+        return self.tokens[self.pos + offset] if self.pos + offset < len(self.tokens) else self.tokens[-1]
+
+    def next(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def at(self, kind, value=None):
+        tok = self.peek()
+        return tok[0] == kind and (value is None or tok[1] == value)
+
+    def accept(self, kind, value=None):
+        if self.at(kind, value):
+            return self.next()
+        return None
+
+    def expect(self, kind, value=None):
+        tok = self.next()
+        if tok[0] != kind or (value is not None and tok[1] != value):
+            want = value or kind
+            raise HCLSyntaxError(f"{self.filename}: expected {want!r}, got {tok[1]!r} at offset {tok[2]}")
+        return tok
+
+    # -- bodies ---------------------------------------------------------------
+
+    def parse_body(self, line_of, closing=False):
+        """Parse attributes and blocks until EOF (or `}` when `closing`)."""
+        saved, self.depth = self.depth, 0
+        attributes = {}
+        blocks = []
+        while True:
+            self._skip_newlines()
+            tok = self.peek()
+            if tok[0] == "eof":
+                if closing:
+                    raise HCLSyntaxError(f"{self.filename}: missing closing brace")
+                break
+            if closing and tok == ("op", "}", tok[2]):
+                break
+            name = self.expect("ident")
+            if self.accept("op", "="):
+                attributes[name[1]] = self.parse_expression()
+                if not (self.at("nl") or self.at("eof") or self.at("op", "}")):
+                    tok = self.peek()
+                    raise HCLSyntaxError(f"{self.filename}: unexpected {tok[1]!r} at offset {tok[2]}")
+                continue
+            labels = []
+            while self.at("string") or self.at("ident"):
+                labels.append(self.next()[1])
+            self.expect("op", "{")
+            inner_attrs, inner_blocks = self.parse_body(line_of, closing=True)
+            self.expect("op", "}")
+            blocks.append(Block(name[1], tuple(labels), inner_attrs, inner_blocks,
+                                self.filename, line_of(name[2])))
+        self.depth = saved
+        return attributes, blocks
+
+    # -- expressions ----------------------------------------------------------
+
+    def parse_expression(self):
+        cond = self._parse_binary(0)
+        if self.accept("op", "?"):
+            self.depth += 1
+            true_expr = self.parse_expression()
+            self.expect("op", ":")
+            self.depth -= 1
+            false_expr = self.parse_expression()
+            return ("cond", cond, true_expr, false_expr)
+        return cond
+
+    def _parse_binary(self, level):
+        if level == len(_BINARY_PRECEDENCE):
+            return self._parse_unary()
+        left = self._parse_binary(level + 1)
+        while True:
+            tok = self.peek()
+            if tok[0] == "op" and tok[1] in _BINARY_PRECEDENCE[level]:
+                self.next()
+                right = self._parse_binary(level + 1)
+                left = ("binop", tok[1], left, right)
+            else:
+                return left
+
+    def _parse_unary(self):
+        tok = self.peek()
+        if tok[0] == "op" and tok[1] in ("!", "-"):
+            self.next()
+            return ("unop", tok[1], self._parse_unary())
+        return self._parse_postfix(self._parse_primary())
+
+    def _parse_traversal_step(self, expr):
+        """Parse one `.name`, `.0` or `[key]` step; return None if absent."""
+        tok = self.tokens[self.pos]
+        if tok == ("op", ".", tok[2]):
+            after = self.tokens[self.pos + 1]
+            if after[0] == "ident":
+                self.pos += 2
+                return ("attr", expr, after[1])
+            if after[0] == "number":
+                self.pos += 2
+                return ("index", expr, ("lit", int(float(after[1]))))
+            return None
+        if tok == ("op", "[", tok[2]) and self.tokens[self.pos + 1][1] != "*":
+            self.pos += 1
+            self.depth += 1
+            key = self.parse_expression()
+            self.expect("op", "]")
+            self.depth -= 1
+            return ("index", expr, key)
+        return None
+
+    def _parse_postfix(self, expr):
+        while True:
+            tok = self.tokens[self.pos]
+            if tok[0] != "op":
+                return expr
+            if tok[1] == "[" and self.tokens[self.pos + 1][1] == "*":
+                self.pos += 2
+                self.expect("op", "]")
+                expr = ("splat", expr, self._parse_splat_ops())
+                continue
+            if tok[1] == "." and self.tokens[self.pos + 1][1] == "*":
+                self.pos += 2
+                expr = ("splat", expr, self._parse_splat_ops(attrs_only=True))
+                continue
+            step = self._parse_traversal_step(expr)
+            if step is None:
+                return expr
+            expr = step
+
+    def _parse_splat_ops(self, attrs_only=False):
+        """Collect traversal steps applied to every element of a splat."""
+        ops = []
+        placeholder = ("ref", "__splat__")
+        while True:
+            tok = self.tokens[self.pos]
+            if attrs_only and tok[1] == "[":
+                break
+            step = self._parse_traversal_step(placeholder)
+            if step is None:
+                break
+            ops.append(step[0:1] + step[2:])
+        return ops
+
+    def _parse_primary(self):
+        tok = self.next()
+        kind, value = tok[0], tok[1]
+        if kind == "number":
+            return ("lit", float(value) if any(c in value for c in ".eE") else int(value))
+        if kind == "string":
+            return _parse_template(value, self.filename)
+        if kind == "heredoc":
+            return _parse_template(value, self.filename, heredoc=True)
+        if kind == "ident":
+            if value == "true":
+                return ("lit", True)
+            if value == "false":
+                return ("lit", False)
+            if value == "null":
+                return ("lit", None)
+            if self.tokens[self.pos][:2] == ("op", "("):
+                return self._parse_call(value)
+            return ("ref", value)
+        if kind == "op" and value == "(":
+            self.depth += 1
+            expr = self.parse_expression()
+            self.expect("op", ")")
+            self.depth -= 1
+            return expr
+        if kind == "op" and value == "[":
+            return self._parse_tuple()
+        if kind == "op" and value == "{":
+            return self._parse_object()
+        raise HCLSyntaxError(f"{self.filename}: unexpected {value!r} at offset {tok[2]}")
+
+    def _parse_call(self, name):
+        self.expect("op", "(")
+        self.depth += 1
+        args = []
+        expand = False
+        while not self.at("op", ")"):
+            args.append(self.parse_expression())
+            if self.accept("op", "..."):
+                expand = True
+            if not self.accept("op", ","):
+                break
+        self.expect("op", ")")
+        self.depth -= 1
+        return ("call", name, args, expand)
+
+    def _parse_tuple(self):
+        self.depth += 1
+        if self.at("ident", "for"):
+            expr = self._parse_for("tuple")
+            self.expect("op", "]")
+            self.depth -= 1
+            return expr
+        items = []
+        while not self.at("op", "]"):
+            items.append(self.parse_expression())
+            if not self.accept("op", ","):
+                break
+        self.expect("op", "]")
+        self.depth -= 1
+        return ("tuple", items)
+
+    def _parse_object(self):
+        self.depth += 1
+        if self.at("ident", "for"):
+            expr = self._parse_for("object")
+            self.expect("op", "}")
+            self.depth -= 1
+            return expr
+        items = []
+        while not self.at("op", "}"):
+            tok = self.peek()
+            if tok[0] == "ident" and self.peek(1)[1] in ("=", ":"):
+                self.next()
+                key = ("lit", tok[1])
+            else:
+                key = self.parse_expression()
+            if not self.accept("op", "="):
+                self.expect("op", ":")
+            items.append((key, self.parse_expression()))
+            self.accept("op", ",")
+        self.expect("op", "}")
+        self.depth -= 1
+        return ("object", items)
+
+    def _parse_for(self, kind):
+        self.expect("ident", "for")
+        first = self.expect("ident")[1]
+        second = None
+        if self.accept("op", ","):
+            second = self.expect("ident")[1]
+        self.expect("ident", "in")
+        collection = self.parse_expression()
+        self.expect("op", ":")
+        key_var, val_var = (first, second) if second else (None, first)
+        key_expr = None
+        if kind == "object":
+            key_expr = self.parse_expression()
+            self.expect("op", "=>")
+        val_expr = self.parse_expression()
+        group = bool(self.accept("op", "..."))
+        cond = None
+        if self.accept("ident", "if"):
+            cond = self.parse_expression()
+        return ("for", kind, key_var, val_var, collection, key_expr, val_expr, cond, group)
+
+
+def _parse_template(raw, filename="", heredoc=False):
+    """Parse a quoted string or heredoc body into a ("tmpl", parts) node."""
+    parts = []
+    buf = []
+    i = 0
+    n = len(raw)
+    while i < n:
+        c = raw[i]
+        if c == "\\" and not heredoc and i + 1 < n:
+            nxt = raw[i + 1]
+            if nxt == "u" and i + 5 < n:
+                buf.append(chr(int(raw[i + 2:i + 6], 16)))
+                i += 6
+            else:
+                buf.append(_ESCAPES.get(nxt, nxt))
+                i += 2
+            continue
+        if c in "$%" and raw.startswith(c + c + "{", i):
+            buf.append(c + "{")
+            i += 3
+            continue
+        if c in "$%" and raw.startswith("{", i + 1):
+            end = _scan_interpolation(raw, i + 2)
+            if buf:
+                parts.append("".join(buf))
+                buf = []
+            inner = raw[i + 2:end - 1].strip().strip("~").strip()
+            if c == "%":
+                parts.append(("directive", inner))
+            else:
+                sub = _Parser(tokenize(inner), filename)
+                sub.depth = 1
+                parts.append(sub.parse_expression())
+            i = end
+            continue
+        buf.append(c)
+        i += 1
+    if buf:
+        parts.append("".join(buf))
+    if all(isinstance(p, str) for p in parts):
+        return ("lit", "".join(parts))
+    return ("tmpl", parts)
+
+
+def parse_hcl(text, filename=""):
+    """Parse HCL source and return (attributes, blocks) for its top level."""
+    starts = [0] + [m.end() for m in re.finditer(r"\n", text)]
+
+    def line_of(offset):
+        lo, hi = 0, len(starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if starts[mid] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo + 1
+
+    parser = _Parser(tokenize(text), filename)
+    return parser.parse_body(line_of)
+
+
+def parse_expression(text):
+    """Parse a standalone expression, e.g. 'var.use_ecs ? 0 : 2'."""
+    parser = _Parser(tokenize(text))
+    parser.depth = 1
+    expr = parser.parse_expression()
+    parser.expect("eof")
+    return expr
+
+
+# =============================================================================
+# Evaluation
+# =============================================================================
+
+def _cidrsubnet(prefix, newbits, netnum):
+    net = ipaddress.ip_network(prefix, strict=False)
+    new_prefix = net.prefixlen + int(newbits)
+    if new_prefix > net.max_prefixlen:
+        raise ValueError(f"insufficient address space to extend {prefix} by {newbits} bits")
+    size = 1 << (net.max_prefixlen - new_prefix)
+    base = int(net.network_address) + int(netnum) * size
+    sub = ipaddress.ip_network((base, new_prefix))
+    if not sub.subnet_of(net):
+        raise ValueError(f"netnum {netnum} does not fit in {newbits} bits of {prefix}")
+    return str(sub)
+
+
+def _cidrhost(prefix, hostnum):
+    net = ipaddress.ip_network(prefix, strict=False)
+    hostnum = int(hostnum)
+    base = net.broadcast_address if hostnum < 0 else net.network_address
+    return str(base + hostnum + (1 if hostnum < 0 else 0))
+
+
+def _tostring(v):
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _lookup(m, key, *default):
+    if key in m:
+        return m[key]
+    if default:
+        return default[0]
+    raise KeyError(key)
+
+
+def _merge(*maps):
+    out = {}
+    for m in maps:
+        out.update(m or {})
+    return out
+
+
+FUNCTIONS = {
+    "length": lambda v: len(v),
+    "cidrsubnet": _cidrsubnet,
+    "cidrhost": _cidrhost,
+    "cidrnetmask": lambda p: str(ipaddress.ip_network(p, strict=False).netmask),
+    "min": lambda *a: min(a),
+    "max": lambda *a: max(a),
+    "abs": abs,
+    "ceil": lambda v: -(-v // 1) if isinstance(v, int) else int(-(-v // 1)),
+    "floor": lambda v: int(v // 1),
+    "concat": lambda *ls: [x for l in ls for x in l],
+    "element": lambda l, i: l[int(i) % len(l)],
+    "lookup": _lookup,
+    "merge": _merge,
+    "keys": lambda m: sorted(m),
+    "values": lambda m: [m[k] for k in sorted(m)],
+    "contains": lambda l, v: v in l,
+    "coalesce": lambda *a: next(x for x in a if x not in (None, "")),
+    "compact": lambda l: [x for x in l if x not in (None, "")],
+    "distinct": lambda l: list(dict.fromkeys(l)),
+    "flatten": lambda l: [y for x in l for y in (x if isinstance(x, list) else [x])],
+    "range": lambda *a: list(range(*(int(x) for x in a))),
+    "slice": lambda l, a, b: l[int(a):int(b)],
+    "join": lambda sep, l: sep.join(_tostring(x) for x in l),
+    "split": lambda sep, s: s.split(sep),
+    "format": lambda fmt, *a: re.sub(r"%[sdv]", "{}", fmt).format(*(_tostring(x) for x in a)),
+    "upper": lambda s: s.upper(),
+    "lower": lambda s: s.lower(),
+    "title": lambda s: s.title(),
+    "trimspace": lambda s: s.strip(),
+    "replace": lambda s, a, b: s.replace(a, b),
+    "substr": lambda s, o, l: s[int(o):] if int(l) < 0 else s[int(o):int(o) + int(l)],
+    "tostring": _tostring,
+    "tonumber": lambda v: v if isinstance(v, (int, float)) else (float(v) if "." in str(v) else int(v)),
+    "tobool": lambda v: v if isinstance(v, bool) else str(v) == "true",
+    "tolist": list,
+    "toset": lambda l: sorted(set(l), key=str),
+    "tomap": dict,
+    "zipmap": lambda ks, vs: dict(zip(ks, vs)),
+    "jsonencode": lambda v: json.dumps(v, separators=(",", ":")),
+    "try": None,   # handled specially (lazy arguments)
+    "can": None,   # handled specially (lazy arguments)
+}
+
+
+class EvaluationError(Exception):
+    """Raised when an expression refers to something that cannot exist."""
+
+
+class Scope:
+    """Names visible to an expression: var, local, count, each, for vars."""
+
+    def __init__(self, config, count_index=None, each=None, bindings=None):
+        self.config = config
+        self.count_index = count_index
+        self.each = each
+        self.bindings = bindings or {}
+
+    def child(self, **bindings):
+        merged = dict(self.bindings)
+        merged.update(bindings)
+        return Scope(self.config, self.count_index, self.each, merged)
+
+
+def _has_unknown(value):
+    if value is UNKNOWN:
+        return True
+    if isinstance(value, list):
+        return any(_has_unknown(v) for v in value)
+    if isinstance(value, dict):
+        return any(_has_unknown(v) for v in value.values())
+    return False
+
+
+def _traverse(value, op, scope):
+    """Apply an ("attr", name) or ("index", key) step to a value."""
+    if value is UNKNOWN:
+        return UNKNOWN
+    if op[0] == "attr":
+        if isinstance(value, dict):
+            if op[1] not in value:
+                raise EvaluationError(f"no attribute {op[1]!r}")
+            return value[op[1]]
+        raise EvaluationError(f"cannot read attribute {op[1]!r} of {type(value).__name__}")
+    key = evaluate(op[1], scope)
+    if key is UNKNOWN:
+        return UNKNOWN
+    if isinstance(value, dict):
+        if key not in value:
+            raise EvaluationError(f"no key {key!r}")
+        return value[key]
+    if isinstance(value, list):
+        return value[int(key)]
+    raise EvaluationError(f"cannot index {type(value).__name__}")
+
+
+def _resolve_ref(name, scope):
+    if name in scope.bindings:
+        return scope.bindings[name]
+    if name == "var":
+        return scope.config.variables
+    if name == "local":
+        return scope.config.locals
+    if name == "count":
+        if scope.count_index is None:
+            raise EvaluationError("count.index used outside a counted resource")
+        return {"index": scope.count_index}
+    if name == "each":
+        if scope.each is None:
+            raise EvaluationError("each used outside a for_each resource")
+        return {"key": scope.each[0], "value": scope.each[1]}
+    if name == "path":
+        root = scope.config.root
+        return {"module": root, "root": root, "cwd": os.getcwd()}
+    if name == "terraform":
+        return {"workspace": os.environ.get("TF_WORKSPACE", "default")}
+    # Resource, data source and module attributes are only known after apply.
+    return UNKNOWN
+
+
+def _binop(op, a, b):
+    if op == "&&":
+        return bool(a) and bool(b)
+    if op == "||":
+        return bool(a) or bool(b)
+    if op == "==":
+        return a == b
+    if op == "!=":
+        return a != b
+    if op == "<":
+        return a < b
+    if op == ">":
+        return a > b
+    if op == "<=":
+        return a <= b
+    if op == ">=":
+        return a >= b
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if op == "%":
+        return a % b
+    if op == "/":
+        q = a / b
+        return int(q) if isinstance(a, int) and isinstance(b, int) and a % b == 0 else q
+    raise EvaluationError(f"unknown operator {op}")
+
+
+def evaluate(node, scope):
+    """Evaluate an expression AST within `scope`.
+
+    Returns UNKNOWN for anything that depends on a provider, and raises
+    EvaluationError for expressions Terraform would reject.
+    """
+    kind = node[0]
+    if kind == "lit":
+        return node[1]
+    if kind == "tmpl":
+        out = []
+        for part in node[1]:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            if part[0] == "directive":
+                return UNKNOWN
+            value = evaluate(part, scope)
+            if _has_unknown(value):
+                return UNKNOWN
+            out.append(_tostring(value))
+        return "".join(out)
+    if kind == "ref":
+        return _resolve_ref(node[1], scope)
+    if kind in ("attr", "index"):
+        return _traverse(evaluate(node[1], scope), (kind,) + node[2:], scope)
+    if kind == "splat":
+        base = evaluate(node[1], scope)
+        if base is UNKNOWN:
+            return UNKNOWN
+        if base is None:
+            return []
+        items = base if isinstance(base, list) else [base]
+        out = []
+        for item in items:
+            for op in node[2]:
+                item = _traverse(item, op, scope)
+            out.append(item)
+        return out
+    if kind == "cond":
+        test = evaluate(node[1], scope)
+        if test is UNKNOWN:
+            return UNKNOWN
+        return evaluate(node[2] if test else node[3], scope)
+    if kind == "binop":
+        left = evaluate(node[2], scope)
+        # Terraform does not short-circuit, but an unknown operand on the
+        # non-deciding side of && / || cannot change the result.
+        if node[1] == "&&" and left is False:
+            return False
+        if node[1] == "||" and left is True:
+            return True
+        right = evaluate(node[3], scope)
+        if left is UNKNOWN or right is UNKNOWN:
+            return UNKNOWN
+        try:
+            return _binop(node[1], left, right)
+        except (TypeError, ZeroDivisionError) as e:
+            raise EvaluationError(str(e))
+    if kind == "unop":
+        value = evaluate(node[2], scope)
+        if value is UNKNOWN:
+            return UNKNOWN
+        return (not value) if node[1] == "!" else -value
+    if kind == "tuple":
+        return [evaluate(item, scope) for item in node[1]]
+    if kind == "object":
+        out = {}
+        for key, value in node[1]:
+            k = evaluate(key, scope)
+            if k is UNKNOWN:
+                return UNKNOWN
+            out[_tostring(k)] = evaluate(value, scope)
+        return out
+    if kind == "call":
+        return _call(node, scope)
+    if kind == "for":
+        return _for(node, scope)
+    raise EvaluationError(f"cannot evaluate {kind}")
+
+
+def _call(node, scope):
+    name, arg_nodes, expand = node[1], node[2], node[3]
+    if name == "try":
+        for arg in arg_nodes:
+            try:
+                return evaluate(arg, scope)
+            except (EvaluationError, KeyError, IndexError, TypeError, ValueError):
+                continue
+        raise EvaluationError("no try() argument could be evaluated")
+    if name == "can":
+        try:
+            evaluate(arg_nodes[0], scope)
+            return True
+        except (EvaluationError, KeyError, IndexError, TypeError, ValueError):
+            return False
+    func = FUNCTIONS.get(name)
+    if func is None:
+        return UNKNOWN
+    args = [evaluate(a, scope) for a in arg_nodes]
+    if expand and args:
+        last = args.pop()
+        if last is UNKNOWN:
+            return UNKNOWN
+        args.extend(last)
+    if any(_has_unknown(a) for a in args):
+        return UNKNOWN
+    try:
+        return func(*args)
+    except (KeyError, IndexError, TypeError, ValueError, StopIteration) as e:
+        raise EvaluationError(f"{name}(): {e}")
+
+
+def _for(node, scope):
+    _, kind, key_var, val_var, coll_node, key_node, val_node, cond_node, group = node
+    collection = evaluate(coll_node, scope)
+    if collection is UNKNOWN:
+        return UNKNOWN
+    if isinstance(collection, dict):
+        pairs = list(collection.items())
+    else:
+        pairs = list(enumerate(collection))
+    result = {} if kind == "object" else []
+    for k, v in pairs:
+        bindings = {val_var: v}
+        if key_var:
+            bindings[key_var] = k
+        inner = scope.child(**bindings)
+        if cond_node is not None:
+            keep = evaluate(cond_node, inner)
+            if keep is UNKNOWN:
+                return UNKNOWN
+            if not keep:
+                continue
+        value = evaluate(val_node, inner)
+        if kind == "tuple":
+            result.append(value)
+            continue
+        out_key = evaluate(key_node, inner)
+        if out_key is UNKNOWN:
+            return UNKNOWN
+        out_key = _tostring(out_key)
+        if group:
+            result.setdefault(out_key, []).append(value)
+        else:
+            result[out_key] = value
+    return result
+
+
+# =============================================================================
+# References
+# =============================================================================
+
+def expression_references(node):
+    """Return the attribute paths an expression refers to.
+
+    `aws_subnet.public[0].id` yields ["aws_subnet", "public", "id"];
+    index keys are skipped in the path but searched for references too.
+    """
+    found = []
+    _collect_references(node, found)
+    return found
+
+
+def _collect_references(node, found):
+    if not isinstance(node, tuple) or not node:
+        return
+    kind = node[0]
+    if kind in ("attr", "index", "splat", "ref"):
+        names = []
+        inner = node
+        while inner[0] in ("attr", "index", "splat"):
+            if inner[0] == "attr":
+                names.append(inner[2])
+            elif inner[0] == "index":
+                _collect_references(inner[2], found)
+            else:
+                for op in inner[2]:
+                    if op[0] == "attr":
+                        names.insert(0, op[1])
+                    else:
+                        _collect_references(op[1], found)
+            inner = inner[1]
+        if inner[0] == "ref":
+            found.append([inner[1]] + names[::-1])
+        else:
+            _collect_references(inner, found)
+        return
+    if kind == "tmpl":
+        for part in node[1]:
+            if isinstance(part, tuple) and part[0] != "directive":
+                _collect_references(part, found)
+        return
+    for child in node[1:]:
+        if isinstance(child, tuple):
+            _collect_references(child, found)
+        elif isinstance(child, list):
+            for item in child:
+                if isinstance(item, tuple) and len(item) == 2 and not isinstance(item[0], str):
+                    _collect_references(item[0], found)
+                    _collect_references(item[1], found)
+                else:
+                    _collect_references(item, found)
+
+
+def block_expressions(block):
+    """Yield every attribute expression in a block and its nested blocks."""
+    for expr in block.attributes.values():
+        yield expr
+    for inner in block.blocks:
+        yield from block_expressions(inner)
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+def _convert(value, type_expr):
+    """Coerce a tfvars/env value to a variable's declared primitive type."""
+    if value is UNKNOWN or type_expr is None or type_expr[0] != "ref":
+        return value
+    kind = type_expr[1]
+    try:
+        if kind == "number" and isinstance(value, str):
+            return float(value) if "." in value else int(value)
+        if kind == "bool" and isinstance(value, str):
+            return value.strip().lower() == "true"
+        if kind == "string" and not isinstance(value, str):
+            return _tostring(value)
+    except ValueError:
+        pass
+    return value
+
+
+class _LazyLocals(dict):
+    """Evaluate `locals` entries on first access (they may reference each other)."""
+
+    def __init__(self, config, exprs):
+        super().__init__()
+        self._config = config
+        self._exprs = exprs
+        self._active = set()
+
+    def __contains__(self, name):
+        return name in self._exprs
+
+    def __getitem__(self, name):
+        if dict.__contains__(self, name):
+            return dict.__getitem__(self, name)
+        if name not in self._exprs:
+            raise EvaluationError(f"undefined local.{name}")
+        if name in self._active:
+            raise EvaluationError(f"local.{name} refers to itself")
+        self._active.add(name)
+        try:
+            value = evaluate(self._exprs[name], Scope(self._config))
+        finally:
+            self._active.discard(name)
+        dict.__setitem__(self, name, value)
+        return value
+
+
+class _Variables(dict):
+    def __getitem__(self, name):
+        if not dict.__contains__(self, name):
+            raise EvaluationError(f"undeclared var.{name}")
+        return dict.__getitem__(self, name)
+
+
+def _literal_value(node):
+    """Evaluate a tfvars expression, which may only use literals."""
+    return evaluate(node, Scope(None))
+
+
+class TerraformConfig:
+    """The root module of a Terraform working directory."""
+
+    def __init__(self, root="."):
+        self.root = root
+        self.blocks = []
+        self.errors = []
+        self.variables = _Variables()
+        self.locals = _LazyLocals(self, {})
+
+    @classmethod
+    def load(cls, root=".", var_files=(), files=None):
+        """Read every *.tf file in `root` and resolve input variables.
+
+        `files` may be a list of (filename, text) pairs to use instead of
+        reading the directory. Files that fail to parse are recorded in
+        `errors` and otherwise ignored.
+        """
+        config = cls(root)
+        if files is None:
+            files = []
+            for path in sorted(glob.glob(os.path.join(root, "*.tf"))):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        files.append((os.path.basename(path), f.read()))
+                except OSError as e:
+                    config.errors.append(f"{path}: {e}")
+        for filename, text in files:
+            config.add_source(text, filename)
+        config.resolve_variables(var_files)
+        return config
+
+    def add_source(self, text, filename=""):
+        try:
+            _, blocks = parse_hcl(text, filename)
+        except HCLSyntaxError as e:
+            self.errors.append(str(e))
+            return
+        self.blocks.extend(blocks)
+
+    def blocks_of(self, kind):
+        return [b for b in self.blocks if b.kind == kind]
+
+    def resolve_variables(self, var_files=()):
+        """Apply Terraform's precedence: default < env < tfvars < -var-file."""
+        declared = {}
+        for block in self.blocks_of("variable"):
+            if not block.labels:
+                continue
+            name = block.labels[0]
+            declared[name] = block.attributes.get("type")
+            default = block.attributes.get("default")
+            value = None
+            if default is not None:
+                try:
+                    value = evaluate(default, Scope(self))
+                except EvaluationError:
+                    value = UNKNOWN
+            self.variables[name] = value
+
+        for name in declared:
+            env_value = os.environ.get(f"TF_VAR_{name}")
+            if env_value is not None:
+                self.variables[name] = _convert(env_value, declared[name])
+
+        auto = []
+        for candidate in ("terraform.tfvars", "terraform.tfvars.json"):
+            path = os.path.join(self.root, candidate)
+            if os.path.isfile(path):
+                auto.append(path)
+        auto += sorted(glob.glob(os.path.join(self.root, "*.auto.tfvars")) +
+                       glob.glob(os.path.join(self.root, "*.auto.tfvars.json")))
+
+        for path in auto + list(var_files):
+            for name, value in self._read_tfvars(path).items():
+                if name in declared:
+                    self.variables[name] = _convert(value, declared[name])
+
+        exprs = {}
+        for block in self.blocks_of("locals"):
+            exprs.update(block.attributes)
+        self.locals = _LazyLocals(self, exprs)
+
+    def _read_tfvars(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            self.errors.append(f"{path}: {e}")
+            return {}
+        if path.endswith(".json"):
+            try:
+                return json.loads(text)
+            except ValueError as e:
+                self.errors.append(f"{path}: {e}")
+                return {}
+        try:
+            attributes, _ = parse_hcl(text, os.path.basename(path))
+            return {k: _literal_value(v) for k, v in attributes.items()}
+        except (HCLSyntaxError, EvaluationError) as e:
+            self.errors.append(f"{path}: {e}")
+            return {}
+
+    def evaluate(self, expr, count_index=None, each=None):
+        """Evaluate an expression (AST or source text) in the root module."""
+        if isinstance(expr, str):
+            expr = parse_expression(expr)
+        return evaluate(expr, Scope(self, count_index, each))
+
+    def variable(self, name, default=None):
+        """Return the resolved value of var.<name>, or `default`."""
+        value = dict.get(self.variables, name, default)
+        return default if value is UNKNOWN else value
+
+    def resources(self, mode="resource"):
+        """Yield (block, type, name) for every resource or data block."""
+        for block in self.blocks_of(mode):
+            if len(block.labels) == 2:
+                yield block, block.labels[0], block.labels[1]
+
+    def dependencies(self, block):
+        """Return the addresses a block depends on, e.g. {"aws_vpc.main"}.
+
+        Covers resource, data source and module references in any
+        attribute or nested block plus `depends_on`, and follows `local.*`
+        values through to the resources they reference.
+        """
+        managed = {rtype for _, rtype, _ in self.resources()}
+        data = {rtype for _, rtype, _ in self.resources("data")}
+        local_exprs = {}
+        for locals_block in self.blocks_of("locals"):
+            local_exprs.update(locals_block.attributes)
+
+        deps = set()
+        pending = list(block_expressions(block))
+        seen_locals = set()
+        while pending:
+            for path in expression_references(pending.pop()):
+                root = path[0]
+                if root in managed and len(path) > 1:
+                    deps.add(f"{root}.{path[1]}")
+                elif root == "data" and len(path) > 2 and path[1] in data:
+                    deps.add(f"data.{path[1]}.{path[2]}")
+                elif root == "module" and len(path) > 1:
+                    deps.add(f"module.{path[1]}")
+                elif root == "local" and len(path) > 1 and path[1] not in seen_locals:
+                    seen_locals.add(path[1])
+                    if path[1] in local_exprs:
+                        pending.append(local_exprs[path[1]])
+        return deps
+
+    def instance_keys(self, block):
+        """Return the instance keys a block expands to.
+
+        [None] for a single instance, [0, 1, ...] for `count`, the sorted
+        map/set keys for `for_each`, or UNKNOWN when the expansion depends
+        on values only known after apply.
+        """
+        if "count" in block.attributes:
+            try:
+                count = self.evaluate(block.attributes["count"])
+            except EvaluationError:
+                return UNKNOWN
+            if count is UNKNOWN or count is None:
+                return UNKNOWN
+            return list(range(int(count)))
+        if "for_each" in block.attributes:
+            try:
+                each = self.evaluate(block.attributes["for_each"])
+            except EvaluationError:
+                return UNKNOWN
+            if _has_unknown(each) or each is None:
+                return UNKNOWN
+            if isinstance(each, dict):
+                return sorted(each)
+            return sorted(_tostring(v) for v in each)
+        return [None]
+
+    def expected_instances(self, mode="resource"):
+        """Expand every resource block into ResourceInstance entries.
+
+        Blocks whose count/for_each cannot be resolved statically yield a
+        single instance with key UNKNOWN.
+        """
+        instances = []
+        prefix = "data." if mode == "data" else ""
+        for block, rtype, name in self.resources(mode):
+            base = f"{prefix}{rtype}.{name}"
+            keys = self.instance_keys(block)
+            if keys is UNKNOWN:
+                instances.append(ResourceInstance(f"{base}[?]", rtype, name, UNKNOWN, mode, block))
+                continue
+            for key in keys:
+                if key is None:
+                    address = base
+                elif isinstance(key, int):
+                    address = f"{base}[{key}]"
+                else:
+                    address = f'{base}["{key}"]'
+                instances.append(ResourceInstance(address, rtype, name, key, mode, block))
+        return instances
+
+    def expected_counts(self, by="type"):
+        """Count expected instances per resource type (or per "type.name").
+
+        Every declared type appears, so a block with `count = 0` reports 0
+        while a type that is not declared at all is absent. A count of None
+        means some block of that type can't be expanded without a plan.
+        """
+        counts = {}
+        for block, rtype, name in self.resources():
+            group = rtype if by == "type" else f"{rtype}.{name}"
+            keys = self.instance_keys(block)
+            if keys is UNKNOWN or counts.get(group, 0) is None:
+                counts[group] = None
+            else:
+                counts[group] = counts.get(group, 0) + len(keys)
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the resources Terraform would plan, without Terraform")
+    parser.add_argument("root", nargs="?", default=".", help="Terraform working directory")
+    parser.add_argument("--var-file", action="append", default=[], help="Extra .tfvars file (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    args = parser.parse_args()
+
+    config = TerraformConfig.load(args.root, args.var_file)
+    instances = config.expected_instances()
+    try:
+        if args.json:
+            print(json.dumps({
+                "variables": {k: (None if v is UNKNOWN else v) for k, v in config.variables.items()},
+                "resources": [i.address for i in instances],
+                "counts": config.expected_counts(),
+                "errors": config.errors,
+            }, indent=2, default=str))
+            return 0
+
+        for inst in instances:
+            print(f"  {inst.address}")
+        print(f"\n  {len(instances)} resource instance(s)")
+        for error in config.errors:
+            print(f"  [!] {error}")
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) went away; keep the exit-time flush quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 1 if config.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture Challenge - Source Discovery
+==========================================================
+Finds every .tf file that belongs to a configuration and indexes its
+top-level blocks, so run.py can score a VPC whether it lives in vpc.tf,
+network.tf or a local module such as modules/vpc/.
+
+The tree is walked once. The configuration is the root directory plus
+every local module it reaches (`source = "./..."`, followed recursively).
+Each file is scanned for block headers (`resource "aws_vpc" "main" {`),
+skipping commented-out blocks, and every block is recorded with its file
+and byte range. Files of MMAP_THRESHOLD bytes or more are scanned through
+mmap and never decoded whole: a section gets only the byte ranges of the
+blocks it asks for. Smaller files are read whole.
+
+Usage:
+    python tfsources.py                 # Resource -> file index of the cwd
+    python tfsources.py submissions/alice --json
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import argparse
+from collections import namedtuple
+
+MMAP_THRESHOLD = 1 << 20
+SKIPPED_DIRS = (".terraform", ".git")
+
+# A top-level block: `resource "aws_vpc" "main" {` in modules/vpc/main.tf
+#   kind   - "resource", "data", "module", "variable", "provider", ...
+#   type   - first label (resource type, provider or variable name), or None
+#   name   - second label for resources and data sources, else None
+#   file   - path relative to the configuration root
+#   line   - 1-based line of the header
+#   start, end - byte range of the block, up to the next top-level header
+BlockRef = namedtuple("BlockRef", "kind type name file line start end")
+
+# Comments are matched first so headers inside them are skipped, the same
+# way run.strip_comments() drops them
+_HEADER = re.compile(
+    rb'/\*.*?\*/'
+    rb'|^[ \t]*(?:#|//)[^\n]*'
+    rb'|^[ \t]*(resource|data|module|variable|output|provider)[ \t]+"([^"\n]*)"(?:[ \t]+"([^"\n]*)")?[ \t]*\{'
+    rb'|^[ \t]*(terraform|locals)[ \t]*\{',
+    re.MULTILINE | re.DOTALL)
+_MODULE_SOURCE = re.compile(rb'^[ \t]*source[ \t]*=[ \t]*"(\.\.?/[^"\n]*)"', re.MULTILINE)
+
+
+def block_key(block):
+    """Key a block the way section specs name it: "aws_vpc", "data.aws_ami", "variable"."""
+    if block.kind == "resource":
+        return block.type
+    if block.kind == "data":
+        return f"data.{block.type}"
+    return block.kind
+
+
+def _scan(data, rel):
+    """Index the top-level blocks in `data` (bytes or mmap)."""
+    blocks = []
+    line, last = 1, 0
+    for match in _HEADER.finditer(data):
+        kind = match.group(1) or match.group(4)
+        if kind is None:
+            continue  # A comment
+        line += data[last:match.start()].count(b"\n")  # mmap has no count()
+        last = match.start()
+        if blocks:
+            blocks[-1] = blocks[-1]._replace(end=match.start())
+        label1, label2 = match.group(2), match.group(3)
+        blocks.append(BlockRef(kind.decode(), label1.decode() if label1 is not None else None,
+                               label2.decode() if label2 is not None else None,
+                               rel, line, match.start(), len(data)))
+    return blocks
+
+
+class SourceTree:
+    """The .tf files of one configuration and an index of their blocks."""
+
+    def __init__(self, root="."):
+        self.root = os.path.abspath(root)
+        self.files = []      # Paths relative to root, root module first
+        self.modules = {}    # Module directory (relative) -> calling file
+        self.blocks = []
+        self._sizes = {}
+        self._stamps = {}      # File -> (mtime, size) when indexed
+        self._dir_stamps = {}  # Configuration directory -> mtime (files added or removed)
+        self._discover()
+
+    def _discover(self):
+        # One walk of the tree; module directories are picked from it
+        tf_files = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS and not d.startswith("."))
+            names = sorted(n for n in filenames if n.endswith(".tf"))
+            if names:
+                tf_files[os.path.normpath(dirpath)] = names
+
+        pending = [(self.root, None)]
+        seen = set()
+        while pending:
+            directory, caller = pending.pop(0)
+            directory = os.path.normpath(directory)
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                self._dir_stamps[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+            names = tf_files.get(directory)
+            if names is None:
+                # A module outside the root (source = "../shared") is listed on its own
+                try:
+                    names = sorted(n for n in os.listdir(directory) if n.endswith(".tf"))
+                except OSError:
+                    names = []
+            if caller is not None:
+                self.modules[os.path.relpath(directory, self.root)] = caller
+            for name in names:
+                rel = os.path.relpath(os.path.join(directory, name), self.root)
+                blocks = self._index(rel)
+                if blocks is None:
+                    continue
+                self.files.append(rel)
+                self.blocks.extend(blocks)
+                for block in blocks:
+                    if block.kind == "module":
+                        for source in self._module_sources(block):
+                            pending.append((os.path.join(directory, source), rel))
+
+    def _path(self, rel):
+        return os.path.join(self.root, rel)
+
+    def _open(self, rel, stamp=False):
+        """Return (data, closer) for a file: bytes, or an mmap for large files."""
+        f = open(self._path(rel), "rb")
+        try:
+            st = os.fstat(f.fileno())
+            if stamp:
+                self._stamps[rel] = (st.st_mtime_ns, st.st_size)
+            if st.st_size >= MMAP_THRESHOLD:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                f.close()
+                return mapped, mapped.close
+            data = f.read()
+        finally:
+            if not f.closed:
+                f.close()
+        return data, lambda: None
+
+    def _index(self, rel):
+        try:
+            data, close = self._open(rel, stamp=True)
+        except OSError:
+            return None
+        try:
+            self._sizes[rel] = len(data)
+            return _scan(data, rel)
+        finally:
+            close()
+
+    def _module_sources(self, block):
+        data, close = self._open(block.file)
+        try:
+            return [m.group(1).decode() for m in _MODULE_SOURCE.finditer(data, block.start, block.end)]
+        finally:
+            close()
+
+    def unchanged(self):
+        """True if no indexed file or configuration directory changed since discovery."""
+        try:
+            for directory, stamp in self._dir_stamps.items():
+                if os.stat(directory).st_mtime_ns != stamp:
+                    return False
+            for rel, stamp in self._stamps.items():
+                st = os.stat(self._path(rel))
+                if (st.st_mtime_ns, st.st_size) != stamp:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    def read(self, rel):
+        """Whole contents of one file, or None if it is not part of the configuration."""
+        if rel not in self._sizes:
+            return None
+        try:
+            data, close = self._open(rel)
+        except OSError:
+            return None
+        try:
+            return str(data, "utf-8")  # Decodes an mmap in place, without copying it to bytes first
+        except UnicodeDecodeError:
+            return None
+        finally:
+            close()
+
+    def find(self, keys, exclude_file=None):
+        """Blocks whose block_key() is in `keys` ("aws_ecs_*" matches a prefix)."""
+        exact = {k for k in keys if not k.endswith("*")}
+        prefixes = tuple(k[:-1] for k in keys if k.endswith("*"))
+        return [b for b in self.blocks
+                if b.file != exclude_file and (block_key(b) in exact or
+                                               (prefixes and block_key(b).startswith(prefixes)))]
+
+    def has(self, kind, type_, name=None):
+        return any(b.kind == kind and b.type == type_ and (name is None or b.name == name) for b in self.blocks)
+
+    def text_of(self, blocks):
+        """Decoded source of `blocks`, reading each file once."""
+        parts = []
+        by_file = {}
+        for block in blocks:
+            by_file.setdefault(block.file, []).append(block)
+        for rel, file_blocks in by_file.items():
+            try:
+                data, close = self._open(rel)
+            except OSError:
+                continue
+            try:
+                for block in file_blocks:
+                    parts.append(data[block.start:block.end].decode("utf-8", errors="replace"))
+            finally:
+                close()
+        return parts
+
+    def section_text(self, filename, keys):
+        """The conventional file (e.g. vpc.tf) plus matching blocks from anywhere else.
+
+        A conventional file of MMAP_THRESHOLD bytes or more contributes only
+        its matching blocks. Returns None when neither exists, so checks can
+        report the file as missing.
+        """
+        parts = []
+        size = self._sizes.get(filename)
+        if size is not None and size >= MMAP_THRESHOLD:
+            parts += self.text_of(b for b in self.find(keys) if b.file == filename)
+            if not parts:
+                parts.append("")  # The file is there, it just has none of the section's blocks
+        else:
+            content = self.read(filename)
+            if content is not None:
+                parts.append(content)
+        parts += self.text_of(self.find(keys, exclude_file=filename))
+        return "\n".join(parts) if parts else None
+
+    def resource_index(self):
+        """Map "type.name" (or "data.type.name", "module.name") to the file declaring it."""
+        index = {}
+        for block in self.blocks:
+            if block.kind in ("resource", "data", "module"):
+                address = ".".join(p for p in (None if block.kind == "resource" else block.kind,
+                                               block.type, block.name) if p)
+                index.setdefault(address, []).append(block.file)
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the .tf files of a configuration and its local modules")
+    parser.add_argument("root", nargs="?", default=".", help="Terraform working directory")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    args = parser.parse_args()
+
+    tree = SourceTree(args.root)
+    index = tree.resource_index()
+    if args.json:
+        print(json.dumps({"files": tree.files, "modules": tree.modules, "resources": index}, indent=2))
+        return 0
+    for address, files in sorted(index.items()):
+        print(f"  {address:<55} {', '.join(files)}")
+    print(f"\n  {len(index)} block(s) in {len(tree.files)} file(s), {len(tree.modules)} local module(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
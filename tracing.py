@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Terraform 3-Tier Architecture - Trace Recorder
+==============================================
+Records timed spans in Chrome trace-event format, so a grading or
+dashboard run can be opened in Perfetto (https://ui.perfetto.dev) or
+chrome://tracing to see where the wall time goes.
+
+Tracing is off until enable() is called; spans are then no-ops costing one
+check each.
+
+Usage:
+    import tracing
+
+    tracing.enable("trace.json")     # Written at interpreter exit
+
+    @tracing.traced("checks")
+    def check_vpc_config(): ...
+
+    with tracing.span("terraform validate", "subprocess"):
+        ...
+"""
+
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+
+# Stop recording after this many events so a long-running dashboard
+# cannot grow the trace without bound.
+MAX_EVENTS = 500000
+
+_events = None
+_lock = threading.Lock()
+_threads = set()
+_origin = time.perf_counter_ns()
+_path = None
+
+
+def enable(path=None):
+    """Start recording; if `path` is given, write the trace there at exit."""
+    global _events, _path
+    with _lock:
+        if _events is None:
+            _events = []
+        if path and _path is None:
+            _path = path
+            atexit.register(write, path)
+
+
+def enabled():
+    return _events is not None
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _origin) / 1000
+
+
+def _record(event):
+    tid = threading.get_native_id()
+    event["pid"] = os.getpid()
+    event["tid"] = tid
+    with _lock:
+        if len(_events) >= MAX_EVENTS:
+            return
+        if tid not in _threads:
+            _threads.add(tid)
+            _events.append({"name": "thread_name", "ph": "M", "pid": event["pid"], "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+        _events.append(event)
+
+
+class span:
+    """Context manager recording one complete ("X") event."""
+
+    __slots__ = ("name", "cat", "args", "_start")
+
+    def __init__(self, name, cat="", args=None):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        if _events is not None:
+            self._start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if _events is None:
+            return False
+        event = {"name": self.name, "cat": self.cat, "ph": "X",
+                 "ts": self._start, "dur": _now_us() - self._start}
+        args = dict(self.args or {})
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        if args:
+            event["args"] = args
+        _record(event)
+        return False
+
+
+def traced(cat="", name=None, describe=None):
+    """Decorator wrapping every call of a function in a span.
+
+    `describe(*args, **kwargs)` may return a dict of span args, such as the
+    command a subprocess wrapper is about to run.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return func(*args, **kwargs)
+            with span(label, cat, describe(*args, **kwargs) if describe else None):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def write(path):
+    """Write the recorded events as a Chrome trace JSON file."""
+    with _lock:
+        events = list(_events or ())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)